@@ -1,17 +1,26 @@
 """Bansoko - Space-themed Sokoban clone created in Python using Pyxel.
 
 Usage:
-    bansoko [-h] [--version] [--bundle <name>]
+    bansoko [-h] [--version] [--bundle <name>] [--turbo] [--record] [--profile] [--trace <file>]
 
 Options:
     -h, --help       Show this screen.
     --version        Show version.
     --bundle <name>  Specify resources bundle name [default: main]
+    --turbo          Speed up robot moves when they are queued faster than they're animated.
+    --record         Record the input (next to the log file), so the game can be replayed.
+    --profile        Measure frame times (F3 toggles the overlay) and log them on exit.
+    --trace <file>   Trace draw calls (F4 toggles tracing) and write them to Chrome trace file.
 """
+import atexit
 import logging
 import os
+import time
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
 
 import pyxel
 from docopt import docopt
@@ -21,12 +30,19 @@ from bansoko.game import GameError
 from bansoko.game.bundle import load_bundle, Bundle
 from bansoko.game.context import GameContext
 from bansoko.game.profile import create_or_load_profile, GAME_PROFILE_LOCATION, \
-    GAME_PROFILE_FILENAME, GAME_LOG_FILENAME
+    GAME_PROFILE_FILENAME, GAME_LOG_FILENAME, GAME_RECORDING_FILENAME, \
+    GAME_VALIDATION_CACHE_FILENAME
+from bansoko.game.recording import InputRecorder
 from bansoko.game.screens.error import show_error_message
 from bansoko.graphics import SCREEN_WIDTH, SCREEN_HEIGHT
+from bansoko.graphics.backend import get_backend, use_backend
+from bansoko.graphics.tracing import TracingBackend
+from bansoko.gui.input import InputSource, PyxelInputSource, use_input_source
 from bansoko.gui.navigator import ScreenNavigator
+from bansoko.gui.profiler import ProfilingScreenNavigator
 
 GAME_TITLE = "Bansoko"
+TRACING_TOGGLE_KEY = pyxel.KEY_F4
 
 
 @dataclass(frozen=True)
@@ -36,6 +52,8 @@ class FileNames:
     metadata_file: str
     profile_file_path: Path
     log_file: str
+    recording_file: str
+    validation_cache_file: str
 
 
 def generate_filenames(base_name: str) -> FileNames:
@@ -52,7 +70,10 @@ def generate_filenames(base_name: str) -> FileNames:
     os.makedirs(profile_dir, exist_ok=True)
     profile_file_path = profile_dir.joinpath(GAME_PROFILE_FILENAME)
     log_file = profile_dir.joinpath(GAME_LOG_FILENAME)
-    return FileNames(str(resource_file), str(metadata_file), profile_file_path, str(log_file))
+    recording_file = profile_dir.joinpath(GAME_RECORDING_FILENAME)
+    validation_cache_file = profile_dir.joinpath(GAME_VALIDATION_CACHE_FILENAME)
+    return FileNames(str(resource_file), str(metadata_file), profile_file_path, str(log_file),
+                     str(recording_file), str(validation_cache_file))
 
 
 def configure_logger(log_filename: str) -> None:
@@ -66,41 +87,143 @@ def configure_logger(log_filename: str) -> None:
     logging.info("Starting Bansoko %s", __version__)
 
 
+@contextmanager
+def startup_phase(phase_name: str) -> Iterator[None]:
+    """Context manager logging how long given phase of game startup takes.
+
+    :param phase_name: name of the startup phase
+    """
+    start_time = time.perf_counter()
+    yield
+    logging.info("Startup phase '%s' took %.1f ms", phase_name,
+                 (time.perf_counter() - start_time) * 1_000)
+
+
 def load_game_resources(filenames: FileNames) -> Bundle:
-    """Load Pyxel's resource file containing bundle."""
+    """Load Pyxel's resource file containing bundle.
+
+    Metadata is validated only when it has changed since the last time it was validated (see
+    load_bundle), which saves importing jsonschema and validating on most of startups.
+    """
     logging.info("Loading Pyxel resources file '%s'", filenames.resource_file)
     if not os.path.isfile(filenames.resource_file):
         # This is the only way we can pre-check whether pyxel.load() will fail or not
         # In current version of Pyxel it's not possible to react to error or capture the error
         # reason
         raise GameError(f"Unable to find Pyxel resource file '{filenames.resource_file}'")
-    pyxel.load(filenames.resource_file)
+    with startup_phase("pyxel.load"):
+        pyxel.load(filenames.resource_file)
 
     logging.info("Loading resources metadata file '%s'", filenames.metadata_file)
     if not os.path.isfile(filenames.metadata_file):
         raise GameError(f"Unable to find resources metadata file '{filenames.metadata_file}'")
 
-    return load_bundle(filenames.metadata_file)
+    with startup_phase("load_bundle"):
+        return load_bundle(filenames.metadata_file, filenames.validation_cache_file)
+
+
+def game_started(start_time: float) -> None:
+    """Log time to the first frame.
+
+    :param start_time: time the game startup began at (as returned by time.perf_counter)
+    """
+    logging.info("Game started (first frame drawn %.1f ms after startup).",
+                 (time.perf_counter() - start_time) * 1_000)
+
+
+def on_first_frame(draw: Callable[[], None], callback: Callable[[], None]) -> Callable[[], None]:
+    """Wrap draw callback of the game, so given callback is called once the first frame is drawn.
+
+    :param draw: draw callback of the game
+    :param callback: callback to be called after the first frame is drawn
+    :return: wrapped draw callback
+    """
+    first_frame = True
+
+    def draw_frame() -> None:
+        nonlocal first_frame
+        draw()
+        if first_frame:
+            first_frame = False
+            callback()
+
+    return draw_frame
+
+
+def trace_game_loop(tracer: TracingBackend, navigator: ScreenNavigator) \
+        -> Tuple[Callable[[], None], Callable[[], None]]:
+    """Wrap update and draw callbacks of the navigator, so they are traced (and tracing can be
+    toggled with TRACING_TOGGLE_KEY).
+
+    :param tracer: backend tracing draw calls
+    :param navigator: navigator the game is run with
+    :return: traced update and draw callbacks
+    """
+    def update() -> None:
+        if pyxel.btnp(TRACING_TOGGLE_KEY):
+            tracer.enabled = not tracer.enabled
+            logging.info("Tracing %s", "enabled" if tracer.enabled else "disabled")
+        navigator.update()
+
+    return tracer.traced("update", update), tracer.traced("draw", navigator.draw)
+
+
+def export_trace(tracer: TracingBackend, trace_filename: str) -> None:
+    """Log statistics of traced draw calls and write trace events to Chrome trace file."""
+    logging.info("Draw calls:\n%s", "\n".join(tracer.report()))
+    logging.info("Writing Chrome trace file '%s'", trace_filename)
+    tracer.export_chrome_trace(trace_filename)
 
 
 def main() -> None:
     """Main entry point."""
+    start_time = time.perf_counter()
     arguments = docopt(__doc__, version=__version__)
-    bundle_name = arguments["--bundle"]
-    filenames = generate_filenames(bundle_name)
+    filenames = generate_filenames(arguments["--bundle"])
     configure_logger(filenames.log_file)
+    # CPU time is the only measure of time spent before main is called
+    logging.info("Startup phase 'imports' took %.1f ms (of CPU time)", time.process_time() * 1_000)
     logging.info("Initializing Pyxel window")
-    pyxel.init(width=SCREEN_WIDTH, height=SCREEN_HEIGHT, title=GAME_TITLE, fps=GAME_FRAME_RATE,
-               quit_key=pyxel.KEY_F12, capture_sec=0)
+    with startup_phase("pyxel.init"):
+        pyxel.init(width=SCREEN_WIDTH, height=SCREEN_HEIGHT, title=GAME_TITLE,
+                   fps=GAME_FRAME_RATE, quit_key=pyxel.KEY_F12, capture_sec=0)
     try:
         bundle = load_game_resources(filenames)
-        logging.info("Bundle name: %s", bundle_name)
+        logging.info("Bundle name: %s", arguments["--bundle"])
         logging.info("Bundle SHA1: %s", bundle.sha1.decode())
-        player_profile = create_or_load_profile(bundle, filenames.profile_file_path)
-        game_context = GameContext(bundle, player_profile)
-        navigator = ScreenNavigator(game_context.get_main_menu(), pyxel.quit, GAME_FRAME_TIME_IN_MS)
-        logging.info("Game started.")
-        pyxel.run(navigator.update, navigator.draw)
+        with startup_phase("create_or_load_profile"):
+            player_profile = create_or_load_profile(bundle, filenames.profile_file_path)
+        game_context = GameContext(bundle, player_profile, turbo_mode=arguments["--turbo"])
+        input_source: InputSource = PyxelInputSource()
+        if arguments["--record"]:
+            input_source = InputRecorder.start(input_source, filenames.recording_file, bundle,
+                                               arguments["--turbo"], filenames.profile_file_path)
+            # Pyxel's quit key exits without calling exit_game
+            atexit.register(input_source.close)
+
+        def exit_game() -> None:
+            input_source.close()
+            pyxel.quit()
+
+        with use_input_source(input_source), ExitStack() as stack:
+            tracer: Optional[TracingBackend] = None
+            if arguments["--trace"]:
+                tracer = TracingBackend(get_backend())
+                stack.enter_context(use_backend(tracer))
+                atexit.register(export_trace, tracer, arguments["--trace"])
+            navigator: ScreenNavigator
+            with startup_phase("main menu"):
+                if arguments["--profile"]:
+                    navigator = ProfilingScreenNavigator(game_context.get_main_menu(), exit_game,
+                                                         GAME_FRAME_TIME_IN_MS)
+                    # Pyxel's quit key exits without calling exit_game
+                    atexit.register(navigator.log_report)
+                else:
+                    navigator = ScreenNavigator(game_context.get_main_menu(), exit_game,
+                                                GAME_FRAME_TIME_IN_MS)
+            update, draw = trace_game_loop(tracer, navigator) if tracer \
+                else (navigator.update, navigator.draw)
+            pyxel.run(update, on_first_frame(draw, partial(game_started, start_time)))
     except GameError as error:
         logging.exception(error)
         show_error_message(error.message)
@@ -0,0 +1,304 @@
+"""Module exposing Board - a headless game-logic core of a level.
+
+Nothing in this module depends on Pyxel, so the game logic can be simulated without a window
+(for example in solvers, batch tools or tests).
+"""
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+from bansoko.game.tiles import TileGrid, LevelDescriptor
+from bansoko.graphics import Direction, TilePosition
+
+MOVE_DIRECTION_MASK = 0x03
+MOVE_PUSH_FLAG = 0x04
+KEYFRAME_INTERVAL = 64
+
+
+@dataclass
+class GameStats:
+    """Statistics of currently played game.
+
+    Attributes:
+        game_time - total time spent on playing the level (in ms)
+        pushes - number of moves that player made
+        steps - number of steps that player made
+    """
+    game_time = 0.0
+    pushes: int = 0
+    steps: int = 0
+
+
+@dataclass(frozen=True)
+class Move:
+    """Move is a single step of the robot in given direction.
+
+    Attributes:
+        direction - direction of the step
+        push - does the robot push a crate during the step
+    """
+    direction: Direction
+    push: bool = False
+
+    @property
+    def code(self) -> int:
+        """Single byte encoding of the move (direction index and push flag)."""
+        return self.direction.direction_index | (MOVE_PUSH_FLAG if self.push else 0)
+
+    @staticmethod
+    def from_code(code: int) -> "Move":
+        """Decode a move from its single byte encoding.
+
+        :param code: encoded move (as returned by code property)
+        :return: decoded move
+        """
+        return MOVES_BY_CODE[code]
+
+
+MOVES_BY_CODE: Tuple[Move, ...] = tuple(
+    Move(direction, push) for push in (False, True) for direction in list(Direction))
+
+
+@dataclass(frozen=True)
+class BoardSnapshot:
+    """Snapshot of the board state (used as a keyframe for seeking through the history).
+
+    Attributes:
+        robot_position - position of the robot
+        face_direction - direction the robot is facing to
+        crates - positions of all crates (crate id is the index in this tuple)
+        pushes - number of pushes made until the snapshot was taken
+    """
+    robot_position: TilePosition
+    face_direction: Direction
+    crates: Tuple[TilePosition, ...]
+    pushes: int
+
+
+class Board:  # pylint: disable=too-many-instance-attributes
+    """Board holds the state of a level and implements the rules of the game.
+
+    Robot can step on walkable tiles and push a single crate, as long as there is no obstacle
+    (wall or other crate) behind it. Every move is recorded in history, so it can be undone.
+    History is stored compactly (a single byte per move), so even very long games take little
+    memory. Undone moves are kept in history (so they can be redone) until a new move is made.
+    Snapshots of the board are taken every KEYFRAME_INTERVAL moves, so seeking to any move in
+    history replays at most KEYFRAME_INTERVAL moves.
+
+    Attributes:
+        grid - static tile grid of the level
+        robot_position - current position of the robot
+        face_direction - direction the robot is facing to
+        crates - current positions of all crates (crate id is the index in this list)
+        crates_index - crate ids indexed by crates positions
+        placed_crates - number of crates that are currently "in place" (in cargo bays)
+        statistics - statistics of the game played on the board
+        history - encoded moves made on the board (used for undo and redo, see Move.code)
+        move_index - number of moves from history that are currently applied to the board
+        keyframes - snapshots of the board taken every KEYFRAME_INTERVAL moves of history
+    """
+
+    def __init__(self, grid: TileGrid, descriptor: LevelDescriptor) -> None:
+        self.grid = grid
+        self.robot_position = descriptor.start
+        self.face_direction = descriptor.face_direction
+        self.crates: List[TilePosition] = list(descriptor.crate_spawns)
+        self.crates_index: Dict[TilePosition, int] = {
+            position: crate_id for crate_id, position in enumerate(self.crates)}
+        self.placed_crates = sum(1 for position in self.crates if grid.is_cargo_bay(position))
+        self.statistics = GameStats()
+        self.history = bytearray()
+        self.move_index = 0
+        self.keyframes = [self._snapshot()]
+
+    @property
+    def is_completed(self) -> bool:
+        """Test if level objectives are completed.
+
+        Level is completed when all crates are in cargo bays.
+        """
+        return self.placed_crates == len(self.crates)
+
+    @property
+    def last_move(self) -> Optional[Move]:
+        """The last move made on the board (None if there were no moves)."""
+        return Move.from_code(self.history[self.move_index - 1]) if self.move_index else None
+
+    @property
+    def can_redo(self) -> bool:
+        """Value indicating whether there are undone moves that can be redone."""
+        return self.move_index < len(self.history)
+
+    def crate_at(self, position: TilePosition) -> Optional[int]:
+        """Return id of the crate at given position.
+
+        :param position: position to test the presence of crate at
+        :return: id of the crate at given position *OR* None - if there is no crate there
+        """
+        return self.crates_index.get(position)
+
+    def is_crate_in_place(self, crate_id: int) -> bool:
+        """Test whether the crate with given id is "in place" (at cargo bay).
+
+        :param crate_id: id of the crate to be tested
+        :return: True - if crate is "in place" *OR* False - otherwise
+        """
+        return self.grid.is_cargo_bay(self.crates[crate_id])
+
+    def can_move_crate_to(self, position: TilePosition) -> bool:
+        """Test whether a crate can be moved to given position.
+
+        Crate can be moved to a position only when there are no obstacles there (crates, walls).
+
+        :param position: position to test whether the crate can be moved to
+        :return: True - if crate can be moved to given location *OR* False - otherwise
+        """
+        return self.grid.is_walkable(position) and position not in self.crates_index
+
+    def plan_move(self, direction: Direction) -> Optional[Move]:
+        """Check what would happen if the robot moved in given direction (without moving it).
+
+        :param direction: direction of the movement
+        :return: move the robot can make *OR* None - if the robot cannot move in given direction
+        """
+        robot_dest = self.robot_position.move(direction)
+        if not self.grid.is_walkable(robot_dest):
+            return None
+        if robot_dest not in self.crates_index:
+            return Move(direction)
+        if self.can_move_crate_to(robot_dest.move(direction)):
+            return Move(direction, push=True)
+        return None
+
+    def move(self, direction: Direction) -> Optional[Move]:
+        """Move the robot in given direction (pushing a crate if there is one).
+
+        If the robot cannot move because of a wall, it only turns in given direction.
+
+        :param direction: direction of the movement
+        :return: move that has been made *OR* None - if the robot was not able to move
+        """
+        move = self.plan_move(direction)
+        if move:
+            self.apply(move)
+        elif self.can_turn(direction):
+            self.turn(direction)
+        return move
+
+    def can_turn(self, direction: Direction) -> bool:
+        """Test whether the robot would turn (without moving) when moved in given direction.
+
+        Robot turns only when it bumps into a wall (but not into a crate it cannot push).
+
+        :param direction: direction to test
+        :return: True - if the robot would only turn *OR* False - otherwise
+        """
+        return not self.grid.is_walkable(self.robot_position.move(direction))
+
+    def turn(self, direction: Direction) -> None:
+        """Turn the robot in given direction (without moving it).
+
+        :param direction: direction to turn the robot in
+        """
+        self.face_direction = direction
+
+    def apply(self, move: Move) -> None:
+        """Apply given move to the board and record it in history.
+
+        Move is expected to be a valid one (for example, returned by plan_move).
+        All undone moves are removed from history, so they can no longer be redone.
+
+        :param move: move to be applied
+        """
+        del self.history[self.move_index:]
+        del self.keyframes[self.move_index // KEYFRAME_INTERVAL + 1:]
+        self.history.append(move.code)
+        self._apply(move)
+
+    def redo(self) -> Optional[Move]:
+        """Apply again the last undone move.
+
+        :return: move that has been redone *OR* None - if there was nothing to redo
+        """
+        if not self.can_redo:
+            return None
+
+        move = Move.from_code(self.history[self.move_index])
+        self._apply(move)
+        return move
+
+    def seek(self, move_index: int) -> None:
+        """Instantly jump to the state after given number of moves from history.
+
+        Board is restored from the nearest keyframe (unless undoing or redoing moves one by one is
+        cheaper), so seeking takes at most KEYFRAME_INTERVAL steps.
+
+        :param move_index: number of moves from history to be applied (it's clamped to the
+                           history length)
+        """
+        move_index = max(0, min(move_index, len(self.history)))
+        backward = move_index < self.move_index
+        keyframe_index = move_index // KEYFRAME_INTERVAL
+        if abs(move_index - self.move_index) > move_index % KEYFRAME_INTERVAL:
+            self._restore(self.keyframes[keyframe_index], keyframe_index * KEYFRAME_INTERVAL)
+        while self.move_index < move_index:
+            self.redo()
+        while self.move_index > move_index:
+            self.undo()
+        if backward:
+            # The same direction as if all the moves were undone one by one
+            self.face_direction = Move.from_code(self.history[move_index]).direction
+
+    def _apply(self, move: Move) -> None:
+        robot_dest = self.robot_position.move(move.direction)
+        if move.push:
+            self._move_crate(robot_dest, robot_dest.move(move.direction))
+            self.statistics.pushes += 1
+        self.robot_position = robot_dest
+        self.face_direction = move.direction
+        self.statistics.steps += 1
+        self.move_index += 1
+        if self.move_index == len(self.keyframes) * KEYFRAME_INTERVAL:
+            self.keyframes.append(self._snapshot())
+
+    def undo(self) -> Optional[Move]:
+        """Revert the last move made on the board (move is kept in history, so it can be redone).
+
+        :return: move that has been undone *OR* None - if there was nothing to undo
+        """
+        if not self.move_index:
+            return None
+
+        self.move_index -= 1
+        move = Move.from_code(self.history[self.move_index])
+        robot_dest = self.robot_position.move(move.direction.opposite)
+        if move.push:
+            crate_position = self.robot_position.move(move.direction)
+            self._move_crate(crate_position, self.robot_position)
+            self.statistics.pushes -= 1
+        self.robot_position = robot_dest
+        self.face_direction = move.direction
+        self.statistics.steps -= 1
+        return move
+
+    def _snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(robot_position=self.robot_position,
+                             face_direction=self.face_direction, crates=tuple(self.crates),
+                             pushes=self.statistics.pushes)
+
+    def _restore(self, snapshot: BoardSnapshot, move_index: int) -> None:
+        self.robot_position = snapshot.robot_position
+        self.face_direction = snapshot.face_direction
+        self.crates = list(snapshot.crates)
+        self.crates_index = {position: crate_id for crate_id, position in enumerate(self.crates)}
+        self.placed_crates = sum(1 for position in self.crates if self.grid.is_cargo_bay(position))
+        self.statistics.pushes = snapshot.pushes
+        self.statistics.steps = move_index
+        self.move_index = move_index
+
+    def _move_crate(self, position: TilePosition, destination: TilePosition) -> None:
+        crate_id = self.crates_index.pop(position)
+        was_in_place = self.grid.is_cargo_bay(position)
+        is_in_place = self.grid.is_cargo_bay(destination)
+        self.crates[crate_id] = destination
+        self.crates_index[destination] = crate_id
+        self.placed_crates += int(is_in_place) - int(was_in_place)
@@ -1,15 +1,16 @@
 """Module exposing a Bundle, which is a repository of sprites, screens and level templates."""
+import hashlib
+import logging
 from dataclasses import dataclass
-from json import JSONDecodeError, load
-from typing import Dict, Tuple, Any
-
-from jsonschema import validate, ValidationError
+from json import JSONDecodeError, loads
+from typing import Dict, Any, List, Optional, Sequence, Union, overload
 
 from bansoko.game import GameError
 from bansoko.game.level_template import LevelTemplate, LevelSpritePacks
 from bansoko.game.metadata_schema import METADATA_JSON_SCHEMA
 from bansoko.game.screens.gui_consts import GuiConsts, GuiPosition, GuiColor, GuiSprite
 from bansoko.graphics import Rect, Point
+from bansoko.graphics.backend import RenderBackend, get_backend, use_backend
 from bansoko.graphics.sprite import Sprite, SpritePack
 from bansoko.graphics.tilemap import Tilemap
 from bansoko.gui.screen import Screen, ScreenElement
@@ -27,7 +28,7 @@ class Bundle:
     sprite_packs: Dict[str, SpritePack]
     screens: Dict[str, Screen]
     gui_consts: GuiConsts
-    level_templates: Tuple[LevelTemplate, ...]
+    level_templates: Sequence[LevelTemplate]
 
     def get_sprite(self, sprite_name: str) -> Sprite:
         """ Return sprite with given sprite name.
@@ -82,27 +83,117 @@ class Bundle:
         return self.num_levels - 1
 
 
-def load_bundle(metadata_filename: str) -> Bundle:
+class LevelTemplates(Sequence[LevelTemplate]):
+    """Level templates of a bundle, each of them is created when it's accessed for the first time.
+
+    Building level templates (tile grids and level descriptors) takes most of the time
+    of loading a bundle, so levels that are not played are never built. Level templates read
+    tilemaps through the render backend that was used when the bundle was loaded, so they can be
+    accessed while any other backend is used (for example, the one tracing draw calls).
+
+    Attributes:
+        json_data - input JSON containing level templates metadata
+        sprite_packs - collection of available sprite packs
+        backend - render backend tilemaps of level templates are read from
+        templates - level templates created so far (None for the ones that are not created yet)
+    """
+
+    def __init__(self, json_data: Any, sprite_packs: Dict[str, SpritePack],
+                 backend: RenderBackend) -> None:
+        self.json_data = json_data
+        self.sprite_packs = sprite_packs
+        self.backend = backend
+        self.templates: List[Optional[LevelTemplate]] = [None] * len(json_data)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    @overload
+    def __getitem__(self, index: int) -> LevelTemplate:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[LevelTemplate]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        template = self.templates[index]
+        if template is None:
+            with use_backend(self.backend):
+                template = self.templates[index] = create_level_template(
+                    index % len(self), self.json_data[index], self.sprite_packs)
+        return template
+
+
+def load_bundle(metadata_filename: str, validation_cache_filename: Optional[str] = None) -> Bundle:
     """Load game resources into bundle using metadata file.
 
+    Level templates are bound to the render backend used while the bundle is loaded.
+    Metadata is validated against its JSON schema, unless the validation cache file contains its
+    SHA1 (which means it has been validated before). Once the metadata is validated, its SHA1 is
+    written to the cache file. Most of the time of validation is importing jsonschema, so with a
+    valid cache it's not imported at all.
+
     :param metadata_filename: name of the metadata file
+    :param validation_cache_filename: name of the file SHA1 of validated metadata is stored in
+                                      (None if metadata should always be validated)
     :return: bundle with game resources
     """
     try:
-        with open(metadata_filename, encoding="utf-8") as metadata_file:
-            metadata = load(metadata_file)
-            validate(metadata, METADATA_JSON_SCHEMA)
-            sprites = create_sprites(metadata["sprites"])
-            sprite_packs = create_sprite_packs(metadata["sprite_packs"], sprites)
-            screens = create_screens(metadata["screens"], sprites)
-            gui_consts = create_gui_consts(metadata["gui_consts"], sprites)
-            sha1 = bytearray(metadata["levels"]["sha1"], "utf-8").zfill(
-                SHA1_SIZE_IN_BYTES)[-SHA1_SIZE_IN_BYTES:]
-            level_templates = create_level_templates(
-                metadata["levels"]["level_templates"], sprite_packs)
-            return Bundle(sha1, sprites, sprite_packs, screens, gui_consts, level_templates)
-    except JSONDecodeError as decode_error:
+        with open(metadata_filename, "rb") as metadata_file:
+            metadata_bytes = metadata_file.read()
+        metadata = loads(metadata_bytes)
+    except (JSONDecodeError, UnicodeDecodeError) as decode_error:
         raise GameError("Incorrect format of resource metadata file") from decode_error
+
+    metadata_sha1 = hashlib.sha1(metadata_bytes).hexdigest()
+    if _read_validated_sha1(validation_cache_filename) != metadata_sha1:
+        _validate_metadata(metadata)
+        _write_validated_sha1(validation_cache_filename, metadata_sha1)
+    try:
+        sprites = create_sprites(metadata["sprites"])
+        sprite_packs = create_sprite_packs(metadata["sprite_packs"], sprites)
+        screens = create_screens(metadata["screens"], sprites)
+        gui_consts = create_gui_consts(metadata["gui_consts"], sprites)
+        sha1 = bytearray(metadata["levels"]["sha1"], "utf-8").zfill(
+            SHA1_SIZE_IN_BYTES)[-SHA1_SIZE_IN_BYTES:]
+        level_templates = LevelTemplates(metadata["levels"]["level_templates"], sprite_packs,
+                                         get_backend())
+        return Bundle(sha1, sprites, sprite_packs, screens, gui_consts, level_templates)
+    except (KeyError, IndexError, TypeError, ValueError) as error:
+        raise GameError("Incorrect format of resource metadata file") from error
+
+
+def _read_validated_sha1(validation_cache_filename: Optional[str]) -> Optional[str]:
+    if not validation_cache_filename:
+        return None
+    try:
+        with open(validation_cache_filename, encoding="utf-8") as cache_file:
+            return cache_file.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _write_validated_sha1(validation_cache_filename: Optional[str], metadata_sha1: str) -> None:
+    if not validation_cache_filename:
+        return
+    try:
+        with open(validation_cache_filename, "w", encoding="utf-8") as cache_file:
+            cache_file.write(metadata_sha1)
+    except OSError:
+        # Metadata is validated again next time, so the game can still run
+        logging.warning("Unable to write metadata validation cache file '%s'",
+                        validation_cache_filename)
+
+
+def _validate_metadata(metadata: Any) -> None:
+    # jsonschema takes a while to import, so it's not imported unless metadata is validated
+    from jsonschema import validate, ValidationError  # pylint: disable=import-outside-toplevel
+
+    try:
+        validate(metadata, METADATA_JSON_SCHEMA)
     except ValidationError as validation_error:
         raise GameError("Incorrect format of resource metadata file") from validation_error
 
@@ -209,20 +300,19 @@ def _screen_from_json(json_data: Any, sprites: Dict[str, Sprite]) -> Screen:
         menu_scrollbar_rect=menu_scrollbar_rect)
 
 
-def create_level_templates(json_data: Any, sprite_packs: Dict[str, SpritePack]) \
-        -> Tuple[LevelTemplate, ...]:
-    """Create level templates from metadata.
+def create_level_template(level_num: int, json_data: Any,
+                          sprite_packs: Dict[str, SpritePack]) -> LevelTemplate:
+    """Create level template from metadata.
 
+    :param level_num: level number of the template
     :param json_data: input JSON containing level template metadata
     :param sprite_packs: collection of available sprite packs
-    :return: collection of level templates
+    :return: level template
     """
-    return tuple(
-        LevelTemplate.from_level_num(
-            level_num=level_num,
-            tileset_index=data["tileset"],
-            draw_offset=Point.from_list(data["draw_offset"]),
-            sprite_packs=LevelSpritePacks(
-                robot_sprite_pack=sprite_packs[data["robot_sprite_pack_ref"]],
-                crate_sprite_pack=sprite_packs[data["crate_sprite_pack_ref"]]))
-        for level_num, data in enumerate(json_data))
+    return LevelTemplate.from_level_num(
+        level_num=level_num,
+        tileset_index=json_data["tileset"],
+        draw_offset=Point.from_list(json_data["draw_offset"]),
+        sprite_packs=LevelSpritePacks(
+            robot_sprite_pack=sprite_packs[json_data["robot_sprite_pack_ref"]],
+            crate_sprite_pack=sprite_packs[json_data["crate_sprite_pack_ref"]]))
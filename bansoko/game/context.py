@@ -1,26 +1,30 @@
-"""Module defining game context shared between all game screens."""
+"""Module defining game context shared between all game screens.
+
+Screen controller modules (except the main menu, which is shown first) are imported when their
+screens are created for the first time, so they don't slow the game startup down.
+"""
 from typing import Callable
 
 from bansoko.game.bundle import Bundle
 from bansoko.game.profile import PlayerProfile, LevelScore
-from bansoko.game.screens.choose_level import ChooseLevelController
-from bansoko.game.screens.exit import ExitController
-from bansoko.game.screens.game_paused import GamePausedController
-from bansoko.game.screens.how_to_play import HowToPlayController
-from bansoko.game.screens.level_completed import LevelCompletedController
 from bansoko.game.screens.main_menu import MainMenuController
-from bansoko.game.screens.playfield import PlayfieldScreen
 from bansoko.game.screens.screen_factory import ScreenFactory
-from bansoko.game.screens.victory import VictoryController
 from bansoko.gui.navigator import ScreenController
 
 
 class GameContext(ScreenFactory):
-    """GameContext is a screen factory that is shared between all game screens."""
+    """GameContext is a screen factory that is shared between all game screens.
+
+    Attributes:
+        bundle - bundle the game is played with
+        player_profile - profile of the player
+        turbo_mode - are robot moves sped up when player queues them faster than they're animated
+    """
 
-    def __init__(self, bundle: Bundle, player_profile: PlayerProfile):
+    def __init__(self, bundle: Bundle, player_profile: PlayerProfile, turbo_mode: bool = False):
         self.bundle = bundle
         self.player_profile = player_profile
+        self.turbo_mode = turbo_mode
 
     def get_bundle(self) -> Bundle:
         return self.bundle
@@ -33,23 +37,38 @@ class GameContext(ScreenFactory):
 
     def get_playfield_screen(self, level_num: int,
                              skip_how_to_play: bool = False) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.playfield import PlayfieldScreen
         skip_how_to_play = (level_num == 0) and not skip_how_to_play
-        return PlayfieldScreen(self, level_num, show_how_to_play=skip_how_to_play)
+        return PlayfieldScreen(self, level_num, show_how_to_play=skip_how_to_play,
+                               turbo_mode=self.turbo_mode)
 
     def get_choose_level_screen(self) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.choose_level import ChooseLevelController
         return ChooseLevelController(self)
 
     def get_game_paused_screen(self, level_num: int) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.game_paused import GamePausedController
         return GamePausedController(self, level_num)
 
     def get_level_completed_screen(self, level_score: LevelScore) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.level_completed import LevelCompletedController
         return LevelCompletedController(self, level_score)
 
     def get_how_to_play_screen(self) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.how_to_play import HowToPlayController
         return HowToPlayController(self)
 
     def get_victory_screen(self) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.victory import VictoryController
         return VictoryController(self)
 
     def get_exit_screen(self, exit_callback: Callable[[], None]) -> ScreenController:
+        # pylint: disable-next=import-outside-toplevel
+        from bansoko.game.screens.exit import ExitController
         return ExitController(self, exit_callback)
@@ -1,9 +1,13 @@
-"""Module defining actions that can be executed during game."""
+"""Module defining actions that can be executed during game.
+
+Game actions animate game objects only. The game logic itself (and statistics) is handled by
+Board, and Level commits moves to the board once their actions are completed.
+"""
 import abc
-from typing import Optional
+from typing import Optional, Dict, Tuple
 
 from bansoko import GAME_FRAME_TIME_IN_MS
-from bansoko.game.game_object import GameStats, GameObject, Robot, RobotState, Crate
+from bansoko.game.game_object import GameObject, Robot, RobotState, Crate
 from bansoko.graphics import Direction, Point, TILE_SIZE
 
 
@@ -24,20 +28,19 @@ class GameAction(abc.ABC):
         self.elapsed_time = 0.0
         self.backward = False
 
-    def update(self, dt_in_ms: float, stats: GameStats) -> Optional["GameAction"]:
+    def update(self, dt_in_ms: float) -> Optional["GameAction"]:
         """Update action with given delta time.
 
         Called once per frame.
 
         :param dt_in_ms: delta time since last update (in ms)
-        :param stats: statistics the action can contribute to
         :return: None if action has complete *OR* self (or any instance of type(self)) otherwise
         """
         if self.chain_action:
-            self.chain_action.update(dt_in_ms, stats)
+            self.chain_action.update(dt_in_ms)
         self.elapsed_time += dt_in_ms
         if self.elapsed_time >= self.time_to_complete:
-            self._on_complete(stats)
+            self._on_complete()
             return None
         return self
 
@@ -51,10 +54,16 @@ class GameAction(abc.ABC):
         self.elapsed_time = 0.0
         self.backward = backward
 
-    def _on_complete(self, stats: GameStats) -> None:
+    def _on_complete(self) -> None:
         pass
 
 
+MOVE_OFFSETS: Dict[Direction, Tuple[Point, ...]] = {
+    direction: tuple(Point(delta * direction.dx, delta * direction.dy)
+                     for delta in range(TILE_SIZE))
+    for direction in list(Direction)}
+
+
 class MoveAction(GameAction):
     """MoveAction is an abstract class responsible for handling game object movement in tilemap."""
 
@@ -64,17 +73,16 @@ class MoveAction(GameAction):
         self.game_object = game_object
         self.direction = direction
 
-    def update(self, dt_in_ms: float, stats: GameStats) -> Optional[GameAction]:
-        running_action = super().update(dt_in_ms, stats)
+    def update(self, dt_in_ms: float) -> Optional[GameAction]:
+        running_action = super().update(dt_in_ms)
         if running_action:
             move_direction = self.direction.opposite if self.backward else self.direction
-            delta = self.elapsed_time / self.time_to_complete * TILE_SIZE
-            self.game_object.position.offset = Point(
-                int(delta * move_direction.dx), int(delta * move_direction.dy))
+            delta = int(self.elapsed_time / self.time_to_complete * TILE_SIZE)
+            self.game_object.position.offset = MOVE_OFFSETS[move_direction][delta]
 
         return running_action
 
-    def _on_complete(self, stats: GameStats) -> None:
+    def _on_complete(self) -> None:
         move_direction = self.direction.opposite if self.backward else self.direction
         self.game_object.position.move(move_direction)
 
@@ -92,8 +100,8 @@ class TurnRobot(GameAction):
         self.robot = robot
         self.direction = direction
 
-    def update(self, dt_in_ms: float, stats: GameStats) -> Optional[GameAction]:
-        running_action = super().update(dt_in_ms, stats)
+    def update(self, dt_in_ms: float) -> Optional[GameAction]:
+        running_action = super().update(dt_in_ms)
         self.robot.face_direction = self.direction
         return running_action
 
@@ -119,10 +127,6 @@ class MoveRobot(MoveAction):
         super().reset(backward)
         self.robot.init_state(self.move_state, reverse_animation=True)
 
-    def _on_complete(self, stats: GameStats) -> None:
-        super()._on_complete(stats)
-        stats.steps += 1 if not self.backward else -1
-
 
 TIME_TO_COMPLETE_CRATE_PUSH = TILE_SIZE * GAME_FRAME_TIME_IN_MS
 
@@ -134,7 +138,3 @@ class PushCrate(MoveAction):
         super().__init__(crate, direction, TIME_TO_COMPLETE_CRATE_PUSH,
                          chain_action=MoveRobot(robot, direction, RobotState.PUSHING))
         self.crate = crate
-
-    def _on_complete(self, stats: GameStats) -> None:
-        super()._on_complete(stats)
-        stats.pushes += 1 if not self.backward else -1
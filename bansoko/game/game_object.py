@@ -1,29 +1,19 @@
 """Module exposing all game objects."""
 import abc
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import IntEnum, unique
-from typing import Dict
+from functools import reduce
+from typing import Dict, Hashable, Iterable, Optional, Tuple
 
-from bansoko.graphics import Point, Direction, Layer
+from bansoko.graphics import Point, Direction, Layer, TilePosition, Rect, slotted
 from bansoko.graphics.animation import AnimationPlayer, Animation
 from bansoko.graphics.sprite import Sprite
-from bansoko.graphics.tilemap import TilePosition
 
 
-@dataclass
-class GameStats:
-    """Statistics of currently played game.
-
-    Attributes:
-        game_time - total time spent on playing the level (in ms)
-        pushes - number of moves that player made
-        steps - number of steps that player made
-    """
-    game_time = 0.0
-    pushes: int = 0
-    steps: int = 0
+NO_OFFSET = Point(0, 0)
 
 
+@slotted
 @dataclass
 class ObjectPosition:
     """Position of game object in the level.
@@ -31,9 +21,16 @@ class ObjectPosition:
     Attributes:
         tile_position - game object position in tilemap space
         offset - position offset relative to tile_position (expressed in pixels)
+        point_cache - tile position and offset the last point in screen space was calculated for
+                      (along with that point)
     """
     tile_position: TilePosition
-    offset: Point = Point(0, 0)
+    offset: Point = NO_OFFSET
+    point_cache: Optional[Tuple[TilePosition, Point, Point]] = field(
+        init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.point_cache = None
 
     def move(self, direction: Direction) -> None:
         """Move object position in given direction by one tile.
@@ -43,11 +40,19 @@ class ObjectPosition:
         :param direction: direction of the movement
         """
         self.tile_position = self.tile_position.move(direction)
-        self.offset = Point(0, 0)
+        self.offset = NO_OFFSET
 
     def to_point(self) -> Point:
-        """Convert tile position to a point in screen space (taking into account the offset)."""
-        return self.tile_position.to_point().offset(self.offset)
+        """Convert tile position to a point in screen space (taking into account the offset).
+
+        The point is recalculated only when tile position or offset has changed since the last call.
+        """
+        cache = self.point_cache
+        if cache and cache[0] is self.tile_position and cache[1] is self.offset:
+            return cache[2]
+        point = self.tile_position.to_point().offset(self.offset)
+        self.point_cache = (self.tile_position, self.offset, point)
+        return point
 
 
 class GameObject(abc.ABC):
@@ -55,11 +60,14 @@ class GameObject(abc.ABC):
 
     Attributes:
         position - game object position
+        screen_rect_cache - sprite, point and layers the last screen rectangle was calculated for
+                            (along with that rectangle)
     """
     position: ObjectPosition
 
     def __init__(self, tile_position: TilePosition) -> None:
         self.position = ObjectPosition(tile_position)
+        self.screen_rect_cache: Optional[Tuple[Sprite, Point, Iterable[Layer], Rect]] = None
 
     @property
     def tile_position(self) -> TilePosition:
@@ -74,6 +82,36 @@ class GameObject(abc.ABC):
         :param dt_in_ms: delta time since last update (in ms)
         """
 
+    @property
+    @abc.abstractmethod
+    def sprite(self) -> Sprite:
+        """The sprite game object is currently drawn with."""
+
+    @property
+    @abc.abstractmethod
+    def draw_state(self) -> Hashable:
+        """Everything that affects what the game object looks like (used for detecting whether
+        game object has to be redrawn)."""
+
+    def screen_rect(self, layers: Iterable[Layer]) -> Rect:
+        """Return the rectangle of the screen covered by the game object drawn on given layers.
+
+        The rectangle is recalculated only when sprite, position or layers have changed since the
+        last call.
+
+        :param layers: all layers game object is drawn on
+        :return: rectangle covered by the game object (in screen space)
+        """
+        sprite = self.sprite
+        position = self.position.to_point()
+        cache = self.screen_rect_cache
+        if cache and cache[0] is sprite and cache[1] is position and cache[2] is layers:
+            return cache[3]
+        rect = reduce(Rect.union, (sprite.screen_rect(position, layer) for layer in layers
+                                   if layer.layer_index < sprite.num_layers))
+        self.screen_rect_cache = (sprite, position, layers, rect)
+        return rect
+
     @abc.abstractmethod
     def draw(self, layer: Layer) -> None:
         """Draw game object on given layer.
@@ -127,6 +165,15 @@ class Robot(GameObject):
         self.animation_player.play(self.robot_animations[robot_state], backwards=reverse_animation)
         self._robot_state = robot_state
 
+    @property
+    def sprite(self) -> Sprite:
+        return self.robot_animations[self._robot_state].sprite
+
+    @property
+    def draw_state(self) -> Hashable:
+        return (self.position.to_point(), self.face_direction, self._robot_state,
+                self.animation_player.current_frame)
+
     def update(self, dt_in_ms: float) -> None:
         self.animation_player.update(dt_in_ms)
 
@@ -165,6 +212,13 @@ class Crate(GameObject):
         """Is the crate placed on a cargo bay tile."""
         return self.state == CrateState.PLACED
 
+    @property
+    def sprite(self) -> Sprite:
+        return self.crate_sprites[self.state]
+
+    @property
+    def draw_state(self) -> Hashable:
+        return self.position.to_point(), self.state
+
     def draw(self, layer: Layer) -> None:
-        sprite = self.crate_sprites[self.state]
-        sprite.draw(self.position.to_point(), layer)
+        self.sprite.draw(self.position.to_point(), layer)
@@ -1,14 +1,20 @@
 """Module containing level related classes."""
+from collections import deque
 from enum import Enum
 from itertools import chain
-from typing import Optional, List, Iterable
+from typing import Optional, Iterable, Deque
 
+from bansoko.game.board import Board, GameStats, Move
 from bansoko.game.game_action import GameAction, PushCrate, MoveRobot, TurnRobot
-from bansoko.game.game_object import GameObject, Crate, RobotState, CrateState, GameStats
+from bansoko.game.game_object import GameObject, RobotState, CrateState, ObjectPosition
 from bansoko.game.level_template import LevelTemplate
 from bansoko.game.profile import LevelScore
-from bansoko.graphics import Direction
-from bansoko.graphics.tilemap import TilePosition
+from bansoko.graphics import Direction, Rect
+from bansoko.graphics.dirty_rects import DirtyRects
+
+MAX_QUEUED_INPUT_ACTIONS = 4
+TURBO_QUEUE_LENGTH = 2
+TURBO_SPEED_UP = 2.0
 
 
 class InputAction(Enum):
@@ -28,30 +34,46 @@ class InputAction(Enum):
         return self.direction is not None
 
 
-class Level:
-    """Level encapsulates the game logic for playing a level.
+class Level:  # pylint: disable=too-many-instance-attributes
+    """Level is a rendering adapter on top of Board (which implements the game logic).
 
-    It draws the level with all game objects, it handles the input (used for controlling Robot) and
-    it evaluates victory condition.
+    It translates the input (used for controlling Robot) into moves on the board, animates game
+    objects while the moves are being made and draws the level with all game objects.
+    Moves are committed to the board once their animations are completed. Additionally, level
+    can instantly jump through the history of moves (without animating them).
+    Input actions triggered while a game action is running are queued (up to
+    MAX_QUEUED_INPUT_ACTIONS), so they are not lost. In turbo mode, game actions run
+    TURBO_SPEED_UP times faster while at least TURBO_QUEUE_LENGTH input actions are queued.
 
     Attributes:
-        statistics - statistics captures during the play of the level
         template - template the level is crated from
+        tilemap - static layers of the level (pre-rendered when the level is created)
+        board - headless game-logic core of the level
         robot - instance of Robot game object, that player can control
-        crates - collection of all Crate game objects for the level
+        crates - collection of all Crate game objects for the level (indexed by board's crate ids)
         running_action - currently running game action (updated in update method)
+        running_move - move on the board animated by running_action (None for turns)
         last_input_action - input action that triggered running_action
-        history - list of historical game actions (used for undo)
+        input_queue - input actions waiting for running_action to complete (oldest first)
+        turbo_mode - are game actions sped up when input queue is backed up
     """
 
-    def __init__(self, template: LevelTemplate) -> None:
-        self.statistics = GameStats()
+    def __init__(self, template: LevelTemplate, turbo_mode: bool = False) -> None:
         self.template = template
+        self.tilemap = template.prerender_tilemap()
+        self.board = Board(template.grid, template.descriptor)
         self.robot = template.create_robot()
         self.crates = template.create_crates()
         self.running_action: Optional[GameAction] = None
+        self.running_move: Optional[Move] = None
         self.last_input_action: Optional[InputAction] = None
-        self.history: List[GameAction] = []
+        self.input_queue: Deque[InputAction] = deque()
+        self.turbo_mode = turbo_mode
+
+    @property
+    def statistics(self) -> GameStats:
+        """Statistics captured during the play of the level."""
+        return self.board.statistics
 
     @property
     def level_score(self) -> LevelScore:
@@ -70,43 +92,82 @@ class Level:
 
         Level is completed when all crates are in cargo bays.
         """
-        return not next((crate for crate in self.crates if not crate.in_place), None)
+        return self.board.is_completed
 
     @property
     def game_objects(self) -> Iterable[GameObject]:
         """Collection of all game objects."""
         return chain([self.robot], self.crates)
 
-    def crate_at_pos(self, position: TilePosition) -> Optional[Crate]:
-        """Test if there is a crate at given position.
+    @property
+    def move_index(self) -> int:
+        """Number of moves from history that are currently applied."""
+        return self.board.move_index
+
+    @property
+    def can_redo(self) -> bool:
+        """Value indicating whether there are undone moves that can be redone."""
+        return self.board.can_redo
+
+    @property
+    def history_length(self) -> int:
+        """Number of moves in history (including undone ones, that can still be redone)."""
+        return len(self.board.history)
+
+    @property
+    def is_turbo_active(self) -> bool:
+        """Value indicating whether game actions are currently sped up (by turbo mode)."""
+        return self.turbo_mode and len(self.input_queue) >= TURBO_QUEUE_LENGTH
+
+    def undo_moves(self, num_moves: int) -> None:
+        """Instantly undo given number of moves (without animating them).
+
+        :param num_moves: number of moves to be undone
+        """
+        self.seek(self.board.move_index - num_moves)
+
+    def redo_moves(self, num_moves: int) -> None:
+        """Instantly redo given number of undone moves (without animating them).
 
-        :param position: position to test the presence of crate at
-        :return: True - if there is a crate in given position *OR* False - otherwise
+        :param num_moves: number of moves to be redone
         """
-        return next((crate for crate in self.crates if crate.tile_position == position), None)
+        self.seek(self.board.move_index + num_moves)
 
-    def can_move_crate_to(self, position: TilePosition) -> bool:
-        """Test whether a crate can be moved to given position.
+    def seek(self, move_index: int) -> None:
+        """Instantly jump to the state after given number of moves from history.
 
-        Crate can be moved to a position only when there are no obstacles there (crates, walls).
+        Currently running action (if any) and all queued input actions are cancelled. Undone
+        moves can be redone (by seeking forward) until a new move is made.
 
-        :param position: position to test whether the crate can be moved to
-        :return: True - if crate can be moved to given location *OR* False - otherwise
+        :param move_index: number of moves from history to be applied
         """
-        return self.template.tile_at(position).is_walkable and not self.crate_at_pos(position)
+        self.running_action = None
+        self.running_move = None
+        self.input_queue.clear()
+        self.board.seek(move_index)
+        self._sync_game_objects()
+
+    def queue_input(self, input_action: Optional[InputAction]) -> None:
+        """Queue an input action triggered while a game action is running (so it's processed as
+        soon as running action completes, instead of being lost).
 
-    def is_crate_in_place(self, position: TilePosition) -> bool:
-        """Test whether the crate is "in place" (at cargo bay) in given position.
+        Input actions triggered when there is no running action are not queued (they are handled
+        by process_input right away), neither are the ones exceeding MAX_QUEUED_INPUT_ACTIONS.
 
-        :param position: position to test whether the crate is "in place" or not
-        :return: True - if crate is "in place" at given position *OR* False - otherwise
+        :param input_action: input action to be queued (None is ignored)
         """
-        tile = self.template.tile_at(position)
-        return tile.is_cargo_bay or tile.is_crate_initially_placed
+        if input_action and self.running_action \
+                and len(self.input_queue) < MAX_QUEUED_INPUT_ACTIONS:
+            self.input_queue.append(input_action)
 
     def process_input(self, input_action: Optional[InputAction]) -> None:
         """Transform given input action to game action and queue it (so it can be run later,
-        during update call)."""
+        during update call).
+
+        Queued input actions (see queue_input) take precedence over given input action.
+        Turning the robot in place is not a move, so it's not recorded in history (and undo skips
+        it, reverting the last move instead).
+        """
 
         if self.running_action:
             # TODO: Add movement cancellation when movement with opposite direction was triggered
@@ -120,51 +181,91 @@ class Level:
         # movement or not. That's why we cannot put robot to standing state when action finishes.
         # We have to do it here. The same applies to last_input_action.
         self.robot.init_state(RobotState.STANDING)
+        if self.input_queue:
+            input_action = self.input_queue.popleft()
         self.last_input_action = input_action
 
         if not input_action:
             return
 
-        if input_action == InputAction.UNDO and self.history:
-            self.running_action = self.history.pop()
+        if input_action == InputAction.UNDO and self.board.last_move:
+            self.running_move = self.board.last_move
+            self.running_action = self._create_action(self.running_move)
             self.running_action.reset(backward=True)
         if input_action.is_movement:
-            robot_dest = self.robot.tile_position.move(input_action.direction)
-            if self.template.tile_at(robot_dest).is_walkable:
-                crate = self.crate_at_pos(robot_dest)
-                if crate:
-                    crate_dest = crate.tile_position.move(input_action.direction)
-                    if self.can_move_crate_to(crate_dest):
-                        self.running_action = PushCrate(self.robot, crate, input_action.direction)
-                else:
-                    self.running_action = MoveRobot(self.robot, input_action.direction)
-            else:
+            self.running_move = self.board.plan_move(input_action.direction)
+            if self.running_move:
+                self.running_action = self._create_action(self.running_move)
+            elif self.board.can_turn(input_action.direction):
+                self.board.turn(input_action.direction)
                 self.running_action = TurnRobot(self.robot, input_action.direction)
 
     def update(self, dt_in_ms: float) -> None:
         """Perform an update on the level's game logic."""
-        self._update_running_action(dt_in_ms)
-        self._evaluate_crates()
+        # Speeding up the running action shortens the time needed to complete it
+        self._update_running_action(
+            dt_in_ms * TURBO_SPEED_UP if self.is_turbo_active else dt_in_ms)
         for game_object in self.game_objects:
             game_object.update(dt_in_ms)
         self.statistics.game_time += dt_in_ms
 
-    def draw(self) -> None:
-        """Draw all layers of level in order (from bottom to top)."""
-        for layer in self.template.layers:
-            self.template.tilemap.draw(layer)
-            for game_object in self.game_objects:
+    def draw(self, region: Optional[Rect] = None) -> None:
+        """Draw all layers of level in order (from bottom to top).
+
+        :param region: region of the screen the drawing is clipped to (game objects outside of it
+                       are not drawn at all), None means the whole screen
+        """
+        layers = self.template.layers
+        game_objects = [game_object for game_object in self.game_objects
+                        if region is None or game_object.screen_rect(layers).intersects(region)]
+        for layer in layers:
+            self.tilemap.draw(layer)
+            for game_object in game_objects:
                 game_object.draw(layer)
 
+    def track_changes(self, dirty_rects: DirtyRects) -> None:
+        """Mark rectangles of game objects that changed since the last frame as dirty.
+
+        :param dirty_rects: dirty rectangles of the screen the level is drawn on
+        """
+        for game_object in self.game_objects:
+            dirty_rects.track(game_object, game_object.draw_state,
+                              game_object.screen_rect(self.template.layers))
+
+    def _create_action(self, move: Move) -> GameAction:
+        if move.push:
+            crate_id = self.board.crate_at(self.board.robot_position.move(move.direction))
+            if crate_id is not None:
+                return PushCrate(self.robot, self.crates[crate_id], move.direction)
+        return MoveRobot(self.robot, move.direction)
+
     def _update_running_action(self, dt_in_ms: float) -> None:
         if self.running_action:
             last_action = self.running_action
-            self.running_action = self.running_action.update(dt_in_ms, self.statistics)
+            self.running_action = self.running_action.update(dt_in_ms)
 
-            if last_action is not self.running_action and not last_action.backward:
-                self.history.append(last_action)
+            if not self.running_action and self.running_move:
+                self._commit_move(self.running_move, backward=last_action.backward)
+                self.running_move = None
 
-    def _evaluate_crates(self) -> None:
-        for crate in self.crates:
-            crate_in_place = self.is_crate_in_place(crate.tile_position)
+    def _sync_game_objects(self) -> None:
+        self.robot.position = ObjectPosition(self.board.robot_position)
+        self.robot.face_direction = self.board.face_direction
+        self.robot.init_state(RobotState.STANDING)
+        for crate_id, crate in enumerate(self.crates):
+            crate.position = ObjectPosition(self.board.crates[crate_id])
+            crate_in_place = self.board.is_crate_in_place(crate_id)
             crate.state = CrateState.PLACED if crate_in_place else CrateState.MISPLACED
+
+    def _commit_move(self, move: Move, backward: bool) -> None:
+        if backward:
+            self.board.undo()
+        else:
+            self.board.apply(move)
+
+        if move.push:
+            crate_id = self.board.crate_at(self.board.robot_position.move(move.direction))
+            if crate_id is not None:
+                crate_in_place = self.board.is_crate_in_place(crate_id)
+                self.crates[crate_id].state = \
+                    CrateState.PLACED if crate_in_place else CrateState.MISPLACED
@@ -4,13 +4,12 @@ from typing import Tuple, Dict
 
 from bansoko import GAME_FRAME_TIME_IN_MS, LEVEL_WIDTH, LEVEL_HEIGHT, LEVEL_NUM_LAYERS, \
     LEVEL_BASE_TILEMAP
-from bansoko.game import GameError
 from bansoko.game.game_object import Crate, Robot, RobotState, CrateState
-from bansoko.game.tiles import Tileset, TileType
-from bansoko.graphics import Layer, Point, Rect, Direction, TILE_SIZE
+from bansoko.game.tiles import Tileset, TileType, TileGrid, LevelDescriptor
+from bansoko.graphics import Layer, Point, Rect, TilePosition, TILE_SIZE
 from bansoko.graphics.animation import Animation
 from bansoko.graphics.sprite import SpritePack, Sprite
-from bansoko.graphics.tilemap import Tilemap, TilePosition
+from bansoko.graphics.tilemap import Tilemap, PrerenderedTilemap
 
 
 @dataclass(frozen=True)
@@ -59,12 +58,16 @@ class LevelTemplate:
         level_num - the level number
         tilemap - tilemap to be used in the level
         tileset -  tileset to be used in the level
+        grid - static tile grid (built from tilemap and tileset) used by game logic
+        descriptor - initial setup of the level (start position, crates, cargo bays)
         layers - list of layers level will be drawn on
         sprite_packs - sprite packs to be used in the level
     """
     level_num: int
     tilemap: Tilemap
     tileset: Tileset
+    grid: TileGrid
+    descriptor: LevelDescriptor
     layers: Tuple[Layer, ...]
     sprite_packs: LevelSpritePacks
 
@@ -84,53 +87,47 @@ class LevelTemplate:
         tilemap_uv_rect = Rect.from_coords(tilemap_u, tilemap_v, LEVEL_WIDTH, LEVEL_HEIGHT)
         tilemap = Tilemap(LEVEL_BASE_TILEMAP, tilemap_uv_rect, LEVEL_NUM_LAYERS)
         tileset = Tileset(tileset_index)
+        grid = TileGrid.from_tile_types(
+            tilemap.width, tilemap.height,
+            (tileset.tile_of(tilemap.tile_index_at(tile_position))
+             for tile_position in tilemap.tiles_positions()))
         layers = tuple(
             Layer(i, opaque=(i == 0), global_offset=draw_offset) for i in range(LEVEL_NUM_LAYERS))
-        return cls(level_num=level_num, tilemap=tilemap, tileset=tileset, layers=layers,
+        return cls(level_num=level_num, tilemap=tilemap, tileset=tileset, grid=grid,
+                   descriptor=LevelDescriptor.from_grid(grid, level_num), layers=layers,
                    sprite_packs=sprite_packs)
 
     def tile_at(self, position: TilePosition) -> TileType:
         """Return the type of tile at given position in tilemap.
 
+        Tiles are read from the static tile grid, so Pyxel's tilemap is not touched here.
+
         :param position: position of the tile to check tile type of
         :return: type of the tile at given position
         """
-        return self.tileset.tile_of(self.tilemap.tile_index_at(position))
+        return self.grid.tile_at(position)
 
-    def create_crates(self) -> Tuple[Crate, ...]:
-        """Create a collection of crates based on information from tilemap about their initial
-        positions.
+    def prerender_tilemap(self) -> PrerenderedTilemap:
+        """Pre-render all static layers of the level (walls, floors and background) into
+        offscreen images, so each of them can be drawn with a single blit.
 
-        :return: collection of crates created from level template
+        :return: pre-rendered tilemap of the level
         """
-        crates_positions = []
-        for tile_position in self.tilemap.tiles_positions():
-            if self.tile_at(tile_position).is_crate_spawn_point:
-                crates_positions.append(tile_position)
+        return PrerenderedTilemap.from_tilemap(self.tilemap)
 
-        crates = []
-        for crate_position in crates_positions:
-            is_initially_placed = self.tile_at(crate_position).is_crate_initially_placed
-            crates.append(
-                Crate(crate_position, is_initially_placed, self.sprite_packs.crate_sprites))
-        if not crates:
-            raise GameError(f"Level {self.level_num} does not have any crates")
+    def create_crates(self) -> Tuple[Crate, ...]:
+        """Create a collection of crates based on information from level descriptor about their
+        initial positions.
 
-        return tuple(crates)
+        :return: collection of crates created from level template
+        """
+        return tuple(
+            Crate(crate_position, self.grid.is_cargo_bay(crate_position),
+                  self.sprite_packs.crate_sprites)
+            for crate_position in self.descriptor.crate_spawns)
 
     def create_robot(self) -> Robot:
-        """Create robot instance based on information from tilemap about its start position."""
-        start = None
-        for tile_position in self.tilemap.tiles_positions():
-            if self.tile_at(tile_position).is_start:
-                start = tile_position
-        if not start:
-            raise GameError(f"Level {self.level_num} does not have player start tile")
-
-        face_direction = Direction.UP
-        for direction in list(Direction):
-            if self.tile_at(start.move(direction)).is_walkable:
-                face_direction = direction
-                break
-
-        return Robot(start, face_direction, self.sprite_packs.robot_animations)
+        """Create robot instance based on information from level descriptor about its start
+        position."""
+        return Robot(self.descriptor.start, self.descriptor.face_direction,
+                     self.sprite_packs.robot_animations)
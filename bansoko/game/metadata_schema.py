@@ -1,6 +1,19 @@
 """Module exposing JSON schema for Bansoko's resources metadata file."""
+from typing import Dict, Any
+
 from bansoko.game.screens.gui_consts import GuiSprite, GuiColor, GuiPosition
 
+# Shared by schemas of the metadata file and of the level analysis
+RECT_JSON_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "description": "A rectangle expressed as position and size",
+    "items": {
+        "type": "integer"
+    },
+    "minItems": 4,
+    "maxItems": 4
+}
+
 METADATA_JSON_SCHEMA = {
     "$schema": "http://json-schema.org/draft-07/schema#",
     "title": "Bansoko resources metadata schema",
@@ -21,15 +34,7 @@ METADATA_JSON_SCHEMA = {
             "minItems": 2,
             "maxItems": 2
         },
-        "rect": {
-            "type": "array",
-            "description": "A rectangle expressed as position and size",
-            "items": {
-                "type": "integer"
-            },
-            "minItems": 4,
-            "maxItems": 4
-        },
+        "rect": RECT_JSON_SCHEMA,
         "color": {
             "type": "integer",
             "description": "One of 16 available colors",
@@ -270,6 +275,13 @@ METADATA_JSON_SCHEMA = {
                             "crate_sprite_pack_ref": {
                                 "$ref": "#/definitions/resource_name",
                                 "description": "Reference to sprite pack containing crate sprites"
+                            },
+                            "analysis": {
+                                "type": "object",
+                                "description": "Static analysis of the level precomputed by "
+                                               "resource builder. It's used only by solver "
+                                               "tools, so the game does not validate it (see "
+                                               "LEVEL_ANALYSIS_JSON_SCHEMA)"
                             }
                         }
                     }
@@ -279,3 +291,41 @@ METADATA_JSON_SCHEMA = {
     },
     "additionalProperties": False
 }
+
+LEVEL_ANALYSIS_JSON_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "Bansoko level analysis schema",
+    "description": "Schema describing format of static analysis of a level (stored in resources "
+                   "metadata file under level template)",
+    "type": "object",
+    "definitions": {
+        "rect": RECT_JSON_SCHEMA,
+        "marked_cells": {
+            "type": "string",
+            "description": "Cells of a rectangle (row by row) with marked cells denoted by 'X'",
+            "pattern": "^[X.]*$"
+        }
+    },
+    "properties": {
+        "rect": {
+            "$ref": "#/definitions/rect",
+            "description": "Bounding rectangle of analysed cells (relative to the level's tilemap)"
+        },
+        "dead_squares": {
+            "$ref": "#/definitions/marked_cells",
+            "description": "Cells from which a crate can never be pushed to any cargo bay"
+        },
+        "tunnels": {
+            "$ref": "#/definitions/marked_cells",
+            "description": "Cells enclosed by walls from both sides"
+        },
+        "goal_distances": {
+            "type": "string",
+            "description": "Base64 encoded distances (in pushes) from every analysed cell to every "
+                           "cargo bay",
+            "pattern": "^[A-Za-z0-9+/]*={0,2}$"
+        }
+    },
+    "required": ["rect", "dead_squares", "tunnels", "goal_distances"],
+    "additionalProperties": False
+}
@@ -11,6 +11,8 @@ from bansoko.game.bundle import Bundle, SHA1_SIZE_IN_BYTES
 GAME_PROFILE_LOCATION = ".bansoko"
 GAME_PROFILE_FILENAME = "profile.data"
 GAME_LOG_FILENAME = "bansoko.log"
+GAME_RECORDING_FILENAME = "bansoko.rec"
+GAME_VALIDATION_CACHE_FILENAME = "metadata.sha1"
 
 FILE_HEADER = bytes.fromhex("42 41 4E 53 01")
 INITIALLY_UNLOCKED_LEVEL = 2
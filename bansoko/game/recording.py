@@ -0,0 +1,189 @@
+"""Module exposing input recording - the state of virtual buttons recorded frame by frame.
+
+Recording starts with a snapshot of the player profile (and game options), so the game can be
+deterministically replayed from it (see bansoko.tools.replay).
+"""
+import logging
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple, BinaryIO
+
+from bansoko.game import GameError
+from bansoko.game.bundle import Bundle, SHA1_SIZE_IN_BYTES
+from bansoko.gui.input import InputSource, InputState
+
+FILE_HEADER = bytes.fromhex("42 52 45 43 01")
+TURBO_MODE_FLAG = 0x01
+# Run of identical states: number of frames and encoded state (see InputState.code)
+RUN_FORMAT = struct.Struct(">HI")
+MAX_RUN_LENGTH = 0xFFFF
+INT_FORMAT = struct.Struct(">I")
+
+
+@dataclass(frozen=True)
+class InputRecording:
+    """Input recorded while playing the game.
+
+    Attributes:
+        bundle_sha1 - SHA1 of the bundle the game was played with
+        turbo_mode - was the game played in turbo mode
+        profile_data - content of the player profile file when recording started
+        runs - recorded states of virtual buttons (run-length encoded as pairs of number of frames
+               and the state)
+    """
+    bundle_sha1: bytes
+    turbo_mode: bool
+    profile_data: bytes
+    runs: Tuple[Tuple[int, InputState], ...]
+
+    @property
+    def num_frames(self) -> int:
+        """Number of recorded frames."""
+        return sum(run_length for run_length, _ in self.runs)
+
+    @classmethod
+    def load(cls, filename: str) -> "InputRecording":
+        """Load input recording from a file.
+
+        :param filename: name of the input recording file
+        :return: loaded input recording
+        """
+        try:
+            data = Path(filename).read_bytes()
+        except IOError as io_error:
+            raise GameError(f"Unable to open input recording file '{filename}'") from io_error
+        if not data.startswith(FILE_HEADER):
+            raise GameError(f"File '{filename}' is not a valid input recording file")
+
+        try:
+            offset = len(FILE_HEADER)
+            bundle_sha1 = data[offset:offset + SHA1_SIZE_IN_BYTES]
+            offset += SHA1_SIZE_IN_BYTES
+            flags = data[offset]
+            (profile_size,) = INT_FORMAT.unpack_from(data, offset + 1)
+            offset += 1 + INT_FORMAT.size
+            profile_data = data[offset:offset + profile_size]
+            offset += profile_size
+            runs_data = data[offset:len(data) - (len(data) - offset) % RUN_FORMAT.size]
+            runs = tuple((run_length, InputState.from_code(code))
+                         for run_length, code in RUN_FORMAT.iter_unpack(runs_data))
+        except (IndexError, struct.error) as error:
+            raise GameError(f"Unexpected end of input recording file '{filename}'") from error
+
+        return cls(bundle_sha1, bool(flags & TURBO_MODE_FLAG), profile_data, runs)
+
+
+class InputRecorder(InputSource):
+    """Input source recording the state of virtual buttons polled from another source to a file.
+
+    Consecutive identical states are run-length encoded. The file is kept open while recording
+    and every run is written to it (through a buffer) as soon as it ends. Buffered runs are
+    flushed when the recorder is closed, so it has to be closed even when the game exits
+    abruptly (for example, with Pyxel's quit key).
+
+    Attributes:
+        source - input source the state of virtual buttons is polled from
+        recording_file - input recording file opened for writing
+        state - state polled in the last frame
+        run_length - number of frames the last state has been polled in a row
+    """
+
+    def __init__(self, source: InputSource, recording_file: BinaryIO) -> None:
+        self.source = source
+        self.recording_file = recording_file
+        self.state: Optional[InputState] = None
+        self.run_length = 0
+
+    @classmethod
+    def start(cls, source: InputSource, filename: str, bundle: Bundle, turbo_mode: bool,
+              profile_file_path: Path) -> "InputRecorder":
+        """Create input recording file (with a snapshot of the player profile) and start
+        recording.
+
+        :param source: input source the state of virtual buttons is polled from
+        :param filename: name of the input recording file
+        :param bundle: bundle the game is played with
+        :param turbo_mode: is the game played in turbo mode
+        :param profile_file_path: path to player profile file
+        :return: input recorder writing to the file
+        """
+        logging.info("Recording input to file '%s'", filename)
+        try:
+            profile_data = profile_file_path.read_bytes()
+            recording_file = open(filename, "wb")  # pylint: disable=consider-using-with
+        except IOError as io_error:
+            raise GameError(f"Unable to create input recording file '{filename}'") from io_error
+        try:
+            recording_file.write(FILE_HEADER)
+            recording_file.write(bundle.sha1)
+            recording_file.write(bytes([TURBO_MODE_FLAG if turbo_mode else 0]))
+            recording_file.write(INT_FORMAT.pack(len(profile_data)))
+            recording_file.write(profile_data)
+            recording_file.flush()
+        except IOError as io_error:
+            recording_file.close()
+            raise GameError(f"Unable to write input recording file '{filename}'") from io_error
+        return cls(source, recording_file)
+
+    def poll(self) -> InputState:
+        state = self.source.poll()
+        if state == self.state and self.run_length < MAX_RUN_LENGTH:
+            self.run_length += 1
+        else:
+            self._write_run()
+            self.state = state
+            self.run_length = 1
+        return state
+
+    def close(self) -> None:
+        """Write the last run, flush and close the recording file (it can be called repeatedly,
+        the file is closed only once)."""
+        if self.recording_file.closed:
+            return
+        self._write_run()
+        self.run_length = 0
+        try:
+            self.recording_file.close()
+        except IOError:
+            logging.exception("Unable to write to input recording file")
+        self.source.close()
+
+    def _write_run(self) -> None:
+        if self.state is not None and self.run_length:
+            try:
+                self.recording_file.write(RUN_FORMAT.pack(self.run_length, self.state.code))
+            except IOError:
+                logging.exception("Unable to write to input recording file")
+
+
+class InputPlayer(InputSource):
+    """Input source replaying the state of virtual buttons from input recording.
+
+    When the recording is finished, all virtual buttons are up.
+
+    Attributes:
+        recording - input recording to be replayed
+        run_index - index of currently replayed run of the recording
+        run_frame - number of frames of current run that have been replayed
+    """
+
+    def __init__(self, recording: InputRecording) -> None:
+        self.recording = recording
+        self.run_index = 0
+        self.run_frame = 0
+
+    @property
+    def finished(self) -> bool:
+        """Value indicating whether all recorded frames have been replayed."""
+        return self.run_index >= len(self.recording.runs)
+
+    def poll(self) -> InputState:
+        if self.finished:
+            return InputState()
+        run_length, state = self.recording.runs[self.run_index]
+        self.run_frame += 1
+        if self.run_frame >= run_length:
+            self.run_index += 1
+            self.run_frame = 0
+        return state
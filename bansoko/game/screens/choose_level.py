@@ -1,11 +1,10 @@
 """Module defining screen controller for choosing a level to be played."""
 
-import pyxel
-
 from bansoko import LEVEL_THUMBNAIL_IMAGE_BANK, LEVEL_WIDTH, LEVEL_HEIGHT
 from bansoko.game.screens.gui_consts import GuiPosition, GuiColor, GuiSprite
 from bansoko.game.screens.screen_factory import ScreenFactory
 from bansoko.graphics import Point, Size
+from bansoko.graphics.backend import get_backend
 from bansoko.graphics.sprite import Sprite
 from bansoko.graphics.text import draw_text, TextStyle
 from bansoko.gui.menu import MenuController, MenuItem, Menu, MenuLayout
@@ -73,10 +72,9 @@ class LevelMenuItem(MenuItem):
         self._draw_frame(position, selected)
 
     def _draw_level_thumbnail(self, position: Point) -> None:
-        pyxel.blt(position.x, position.y, LEVEL_THUMBNAIL_IMAGE_BANK,
-                  LEVEL_WIDTH * (self.level_num % 8),
-                  LEVEL_HEIGHT * (self.level_num // 8),
-                  LEVEL_WIDTH, LEVEL_HEIGHT, colkey=0)
+        get_backend().blt(position.x, position.y, LEVEL_THUMBNAIL_IMAGE_BANK,
+                          (LEVEL_WIDTH * (self.level_num % 8), LEVEL_HEIGHT * (self.level_num // 8),
+                           LEVEL_WIDTH, LEVEL_HEIGHT), colkey=0)
 
     def _draw_level_score(self, position: Point) -> None:
         level_score = self.player_profile.levels_scores[self.level_num]
@@ -93,7 +91,8 @@ class LevelMenuItem(MenuItem):
     def _draw_frame(self, position: Point, selected: bool) -> None:
         level_item_size = self._get_position(GuiPosition.LEVEL_ITEM_SIZE)
         style = self._get_text_style(GuiColor.LEVEL_SELECTED_COLOR) if selected else self.text_style
-        pyxel.rectb(position.x, position.y, level_item_size.x, level_item_size.y, style.color)
+        get_backend().rectb(position.x, position.y, level_item_size.x, level_item_size.y,
+                            style.color)
 
     def _get_sprite(self, gui_sprite: GuiSprite) -> Sprite:
         return self.gui_consts.get_sprite(gui_sprite)
@@ -136,5 +135,5 @@ class ChooseLevelController(MenuController):
         scrollbar_rect = self.screen.menu_scrollbar_rect
         scrollbar_size_in_pixels = round(super().scrollbar_size * scrollbar_rect.h)
         scrollbar_position_in_pixels = round(super().scrollbar_position * scrollbar_rect.h)
-        pyxel.rect(scrollbar_rect.x, scrollbar_rect.y + scrollbar_position_in_pixels,
-                   scrollbar_rect.w, scrollbar_size_in_pixels, self.level_selected_color)
+        get_backend().rect(scrollbar_rect.x, scrollbar_rect.y + scrollbar_position_in_pixels,
+                           scrollbar_rect.w, scrollbar_size_in_pixels, self.level_selected_color)
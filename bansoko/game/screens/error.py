@@ -5,6 +5,7 @@ import pyxel
 
 from bansoko import GAME_FRAME_TIME_IN_MS
 from bansoko.graphics import Point, center_in_rect, Rect
+from bansoko.graphics.backend import get_backend
 from bansoko.graphics.text import draw_text, text_size
 from bansoko.gui.menu import MenuController, Menu, TextMenuItem, MenuLayout
 from bansoko.gui.navigator import ScreenNavigator
@@ -32,16 +33,18 @@ class ErrorScreen(MenuController):
         super().draw(draw_as_secondary=draw_as_secondary)
 
     def _draw_frame(self) -> None:
-        pyxel.rectb(self.frame_rect.x, self.frame_rect.y, self.frame_rect.w, self.frame_rect.h, 8)
-        pyxel.rect(self.frame_rect.x + 1, self.frame_rect.y + 1, self.frame_rect.w - 2,
-                   self.frame_rect.h - 2, 2)
+        backend = get_backend()
+        backend.rectb(self.frame_rect.x, self.frame_rect.y, self.frame_rect.w, self.frame_rect.h, 8)
+        backend.rect(self.frame_rect.x + 1, self.frame_rect.y + 1, self.frame_rect.w - 2,
+                     self.frame_rect.h - 2, 2)
         draw_text(self.frame_rect.position.offset(PADDING), self.error_message)
 
     @staticmethod
     def _draw_background() -> None:
+        backend = get_backend()
         for i in range(7, 255, 16):
-            pyxel.line(i, 0, i, 255, 1)
-            pyxel.line(0, i, 255, i, 1)
+            backend.line(i, 0, i, 255, 1)
+            backend.line(0, i, 255, i, 1)
 
     @staticmethod
     def _build_error_message(message: str) -> str:
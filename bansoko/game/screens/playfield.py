@@ -1,18 +1,38 @@
 """Module defining the main game screen."""
-from typing import Optional
-
-import pyxel
+from functools import reduce
+from typing import Optional, List, Tuple, NamedTuple, Callable
 
 from bansoko.game.level import InputAction, Level
 from bansoko.game.screens.gui_consts import GuiSprite, GuiPosition
 from bansoko.game.screens.screen_factory import ScreenFactory
-from bansoko.graphics import Point, Direction
+from bansoko.graphics import Point, Direction, Rect, Size
 from bansoko.graphics.animation import AnimationPlayer, Animation
+from bansoko.graphics.backend import get_backend
+from bansoko.graphics.dirty_rects import DirtyRects
 from bansoko.graphics.sprite import Sprite
 from bansoko.gui.input import VirtualButton
 from bansoko.gui.navigator import ScreenController, BaseScreenController
 
 PRINTING_RECEIPT_ANIMATION_FRAME_TIME = 120
+# Cost of a single redraw pass over the frame (see DirtyRects.regions) expressed in pixels: a pass
+# clipped to a single tile takes 0.12-0.15 ms, which is as long as drawing 25k-54k pixels takes
+# (depending on the level)
+REDRAW_PASS_COST = 35_000
+# Virtual buttons triggering input actions (in order of precedence)
+INPUT_ACTION_BUTTONS = (
+    (VirtualButton.UP, InputAction.MOVE_UP),
+    (VirtualButton.DOWN, InputAction.MOVE_DOWN),
+    (VirtualButton.LEFT, InputAction.MOVE_LEFT),
+    (VirtualButton.RIGHT, InputAction.MOVE_RIGHT),
+    (VirtualButton.ACTION, InputAction.UNDO))
+
+
+class CockpitSprite(NamedTuple):
+    """Sprite of the dynamic part of the cockpit (joystick, rewind button and hand)."""
+    gui_sprite: GuiSprite
+    gui_position: GuiPosition
+    frame: int = 0
+    direction: Direction = Direction.UP
 
 
 class PlayfieldScreen(BaseScreenController):
@@ -22,22 +42,42 @@ class PlayfieldScreen(BaseScreenController):
     and switches to Level Completed screen when those are met.
     It is also possible to pause the game by pressing either 'Escape' or 'Start'
     (on a gamepad). That switches to Game Paused screen.
+
+    Buttons pressed while the robot is moving are queued by the level (so they are not lost).
+    Besides the animated undo, moves can be instantly undone and redone one by one ('Page Up' and
+    'Page Down') and the level can jump to the first and the last move of history ('Home' and
+    'End'), without animating the moves.
+    Only the parts of the screen that changed since the last frame (game objects, cockpit and
+    statistics) are redrawn, on top of the frame drawn previously.
     """
 
     def __init__(self, screen_factory: ScreenFactory, level_num: int,
-                 show_how_to_play: bool = False):
+                 show_how_to_play: bool = False, turbo_mode: bool = False):
         bundle = screen_factory.get_bundle()
         profile = screen_factory.get_player_profile()
         super().__init__(screen=bundle.get_screen("playfield"))
         self.screen_factory = screen_factory
-        self.level = Level(bundle.get_level_template(level_num))
+        self.level = Level(bundle.get_level_template(level_num), turbo_mode)
         self.gui_consts = screen_factory.get_bundle().get_gui_consts()
         self.printing_animation = Animation(bundle.get_sprite("printing_receipt"),
                                             PRINTING_RECEIPT_ANIMATION_FRAME_TIME)
         self.level_completed_animation_player: Optional[AnimationPlayer] = None
         self.how_to_play_shown = not show_how_to_play
+        self.dirty_rects = DirtyRects()
         profile.last_played_level = level_num
 
+    @property
+    def is_animating(self) -> bool:
+        # Game time is counted (and displayed) all the time
+        return True
+
+    def invalidate(self) -> None:
+        self.dirty_rects.invalidate()
+
+    def activate(self) -> None:
+        super().activate()
+        self.dirty_rects.invalidate()
+
     def update(self, dt_in_ms: float) -> ScreenController:
         if not self.how_to_play_shown:
             self.how_to_play_shown = True
@@ -54,76 +94,127 @@ class PlayfieldScreen(BaseScreenController):
         if self.level.is_completed:
             return self._start_level_completed_player()
 
-        self.level.process_input(self._get_input_action())
+        if not self._seek_history():
+            self.level.queue_input(self._get_input_action(self.input.is_button_just_pressed))
+            self.level.process_input(self._get_input_action(self.input.is_button_down))
         self.level.update(dt_in_ms)
 
         return self
 
     def draw(self, draw_as_secondary: bool = False) -> None:
-        pyxel.cls(0)
+        backend = get_backend()
+        if draw_as_secondary:
+            self.dirty_rects.invalidate()
+            backend.cls(0)
+            self._draw_frame(draw_as_secondary)
+            return
+
+        self._track_changes()
+        if self.dirty_rects.full_redraw:
+            backend.cls(0)
+            self._draw_frame(draw_as_secondary)
+        elif not self.dirty_rects.is_clean:
+            # Frame is drawn once for every region of dirty rectangles, clipped to the region
+            for region in self.dirty_rects.regions(REDRAW_PASS_COST):
+                backend.clip(region)
+                backend.rect(region.x, region.y, region.w, region.h, 0)
+                self._draw_frame(draw_as_secondary, region)
+            backend.clip()
+        self.dirty_rects.clear()
+
+    def _draw_frame(self, draw_as_secondary: bool, region: Optional[Rect] = None) -> None:
         if not draw_as_secondary:
-            self.level.draw()
+            self.level.draw(region)
 
         super().draw(draw_as_secondary)
-        self._draw_dynamic_cockpit()
-        self._draw_level_statistics()
+        for cockpit_sprite in self._get_cockpit_sprites():
+            self._get_sprite(cockpit_sprite.gui_sprite).draw(
+                self._get_position(cockpit_sprite.gui_position), frame=cockpit_sprite.frame,
+                direction=cockpit_sprite.direction)
+        for gui_position, text, gui_sprite, colon_size in self._get_level_statistics():
+            self._draw_digits(gui_position, text, gui_sprite, colon_size)
         if self.level_completed_animation_player:
             self.level_completed_animation_player.draw(
                 self._get_position(GuiPosition.COCKPIT_RECEIPT_POS))
 
-    def _draw_dynamic_cockpit(self) -> None:
-        if not self.level.last_input_action:
-            self._draw_sprite(GuiSprite.JOYSTICK_NEUTRAL, GuiPosition.COCKPIT_JOYSTICK_POS)
-            self._draw_sprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
-                              frame=0)
-            self._draw_sprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_NEUTRAL_POS)
-            return
+    def _track_changes(self) -> None:
+        self.level.track_changes(self.dirty_rects)
+        cockpit_sprites = self._get_cockpit_sprites()
+        self.dirty_rects.track("cockpit", tuple(cockpit_sprites), reduce(Rect.union, (
+            self._get_sprite(cockpit_sprite.gui_sprite).screen_rect(
+                self._get_position(cockpit_sprite.gui_position))
+            for cockpit_sprite in cockpit_sprites)))
+        for gui_position, text, gui_sprite, colon_size in self._get_level_statistics():
+            self.dirty_rects.track(gui_position, text,
+                                   self._get_digits_rect(gui_position, text, gui_sprite,
+                                                         colon_size))
+        if self.level_completed_animation_player:
+            self.dirty_rects.track(
+                "receipt", self.level_completed_animation_player.current_frame,
+                self.printing_animation.sprite.screen_rect(
+                    self._get_position(GuiPosition.COCKPIT_RECEIPT_POS)))
 
+    def _get_cockpit_sprites(self) -> List[CockpitSprite]:
         input_action = self.level.last_input_action
+        if not input_action:
+            return [CockpitSprite(GuiSprite.JOYSTICK_NEUTRAL, GuiPosition.COCKPIT_JOYSTICK_POS),
+                    CockpitSprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
+                                  frame=0),
+                    CockpitSprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_NEUTRAL_POS)]
+
         if input_action == InputAction.UNDO:
-            self._draw_sprite(GuiSprite.JOYSTICK_NEUTRAL, GuiPosition.COCKPIT_JOYSTICK_POS)
-            self._draw_sprite(GuiSprite.REWIND_ICON, GuiPosition.COCKPIT_REWIND_ICON_POS)
-            self._draw_sprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
-                              frame=1)
-            self._draw_sprite(GuiSprite.LEFT_HAND_PRESSING_BUTTON,
-                              GuiPosition.LEFT_HAND_PRESSING_BUTTON_POS)
-        elif input_action.is_movement:
-            self._draw_sprite(GuiSprite.JOYSTICK_MOVE, GuiPosition.COCKPIT_JOYSTICK_POS,
-                              direction=input_action.direction)
-            if input_action.direction == Direction.LEFT:
-                self._draw_sprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_LEFT_POS)
-            elif input_action.direction == Direction.RIGHT:
-                self._draw_sprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_RIGHT_POS)
-            elif input_action.direction == Direction.UP:
-                self._draw_sprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_UP_POS)
-            elif input_action.direction == Direction.DOWN:
-                self._draw_sprite(GuiSprite.LEFT_HAND, GuiPosition.LEFT_HAND_DOWN_POS)
-            self._draw_sprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
-                              frame=0)
-
-    def _draw_level_statistics(self) -> None:
+            return [CockpitSprite(GuiSprite.JOYSTICK_NEUTRAL, GuiPosition.COCKPIT_JOYSTICK_POS),
+                    CockpitSprite(GuiSprite.REWIND_ICON, GuiPosition.COCKPIT_REWIND_ICON_POS),
+                    CockpitSprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
+                                  frame=1),
+                    CockpitSprite(GuiSprite.LEFT_HAND_PRESSING_BUTTON,
+                                  GuiPosition.LEFT_HAND_PRESSING_BUTTON_POS)]
+
+        hand_positions = {
+            Direction.LEFT: GuiPosition.LEFT_HAND_LEFT_POS,
+            Direction.RIGHT: GuiPosition.LEFT_HAND_RIGHT_POS,
+            Direction.UP: GuiPosition.LEFT_HAND_UP_POS,
+            Direction.DOWN: GuiPosition.LEFT_HAND_DOWN_POS
+        }
+        return [CockpitSprite(GuiSprite.JOYSTICK_MOVE, GuiPosition.COCKPIT_JOYSTICK_POS,
+                              direction=input_action.direction),
+                CockpitSprite(GuiSprite.LEFT_HAND, hand_positions[input_action.direction]),
+                CockpitSprite(GuiSprite.REWIND_BUTTON, GuiPosition.COCKPIT_REWIND_BUTTON_POS,
+                              frame=0)]
+
+    def _get_level_statistics(self) \
+            -> List[Tuple[GuiPosition, str, GuiSprite, Optional[int]]]:
         score = self.level.level_score
-        self._draw_digits(GuiPosition.COCKPIT_LEVEL_NUM_POS, f"{score.level_num:>3d}",
-                          GuiSprite.LEVEL_DIGITS)
-        self._draw_digits(GuiPosition.COCKPIT_LEVEL_TIME_POS, score.time, GuiSprite.TIME_DIGITS,
-                          colon_size=4)
-        self._draw_digits(GuiPosition.COCKPIT_LEVEL_STEPS_POS, f"{score.steps:>4d}",
-                          GuiSprite.STEPS_DIGITS)
-        self._draw_digits(GuiPosition.COCKPIT_LEVEL_PUSHES_POS, f"{score.pushes:>4d}",
-                          GuiSprite.PUSHES_DIGITS)
-
-    def _get_input_action(self) -> Optional[InputAction]:
-        if self.input.is_button_down(VirtualButton.UP):
-            return InputAction.MOVE_UP
-        if self.input.is_button_down(VirtualButton.DOWN):
-            return InputAction.MOVE_DOWN
-        if self.input.is_button_down(VirtualButton.LEFT):
-            return InputAction.MOVE_LEFT
-        if self.input.is_button_down(VirtualButton.RIGHT):
-            return InputAction.MOVE_RIGHT
-        if self.input.is_button_down(VirtualButton.ACTION):
-            return InputAction.UNDO
-        return None
+        return [
+            (GuiPosition.COCKPIT_LEVEL_NUM_POS, f"{score.level_num:>3d}", GuiSprite.LEVEL_DIGITS,
+             None),
+            (GuiPosition.COCKPIT_LEVEL_TIME_POS, score.time, GuiSprite.TIME_DIGITS, 4),
+            (GuiPosition.COCKPIT_LEVEL_STEPS_POS, f"{score.steps:>4d}", GuiSprite.STEPS_DIGITS,
+             None),
+            (GuiPosition.COCKPIT_LEVEL_PUSHES_POS, f"{score.pushes:>4d}", GuiSprite.PUSHES_DIGITS,
+             None)
+        ]
+
+    def _seek_history(self) -> bool:
+        # Jumps through the history of moves (cancelling running and queued input actions) when
+        # one of seeking buttons is pressed
+        if self.input.is_button_pressed(VirtualButton.PAGE_UP):
+            self.level.undo_moves(1)
+        elif self.input.is_button_pressed(VirtualButton.PAGE_DOWN):
+            self.level.redo_moves(1)
+        elif self.input.is_button_pressed(VirtualButton.HOME):
+            self.level.seek(0)
+        elif self.input.is_button_pressed(VirtualButton.END):
+            self.level.seek(self.level.history_length)
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def _get_input_action(is_button_active: Callable[[VirtualButton], bool]) \
+            -> Optional[InputAction]:
+        return next((input_action for button, input_action in INPUT_ACTION_BUTTONS
+                     if is_button_active(button)), None)
 
     def _start_level_completed_player(self) -> ScreenController:
         self.level_completed_animation_player = AnimationPlayer(self.printing_animation)
@@ -142,11 +233,6 @@ class PlayfieldScreen(BaseScreenController):
     def _get_sprite(self, gui_sprite: GuiSprite) -> Sprite:
         return self.gui_consts.get_sprite(gui_sprite)
 
-    def _draw_sprite(self, gui_sprite: GuiSprite, gui_position: GuiPosition,
-                     frame: int = 0, direction: Direction = Direction.UP) -> None:
-        self._get_sprite(gui_sprite).draw(self._get_position(gui_position), frame=frame,
-                                          direction=direction)
-
     def _draw_digits(self, gui_position: GuiPosition, text: str, gui_sprite: GuiSprite,
                      colon_size: Optional[int] = None) -> None:
         position = self._get_position(gui_position)
@@ -157,3 +243,10 @@ class PlayfieldScreen(BaseScreenController):
                 sprite.draw(position=char_pos, frame=int(char))
             char_size = colon_size if (char == ":" and colon_size) else sprite.width
             char_pos = char_pos.offset(Point(char_size + 1, 0))
+
+    def _get_digits_rect(self, gui_position: GuiPosition, text: str, gui_sprite: GuiSprite,
+                         colon_size: Optional[int] = None) -> Rect:
+        sprite = self._get_sprite(gui_sprite)
+        width = sum((colon_size if (char == ":" and colon_size) else sprite.width) + 1
+                    for char in text)
+        return Rect(self._get_position(gui_position), Size(width, sprite.height))
@@ -1,6 +1,19 @@
 """Module exposing tile-related types."""
 from dataclasses import dataclass
-from enum import Enum, unique, auto
+from enum import Enum, IntFlag, unique, auto
+from typing import Iterable, Tuple, Optional
+
+from bansoko.game import GameError
+from bansoko.graphics import Direction, TilePosition
+
+
+@unique
+class TileFlag(IntFlag):
+    """Game-logic properties of a tile packed as bit flags (used by TileGrid)."""
+    WALKABLE = 0x10
+    CARGO_BAY = 0x20
+    CRATE_SPAWN = 0x40
+    START = 0x80
 
 
 @unique
@@ -54,8 +67,24 @@ class TileType(Enum):
         return self in (TileType.START, TileType.FLOOR, TileType.INITIAL_CRATE_POSITION,
                         TileType.CRATE_INITIALLY_PLACED, TileType.CARGO_BAY)
 
+    @property
+    def flags(self) -> TileFlag:
+        """Game-logic properties of the tile expressed as bit flags."""
+        flags = TileFlag(0)
+        if self.is_walkable:
+            flags |= TileFlag.WALKABLE
+        if self.is_cargo_bay or self.is_crate_initially_placed:
+            flags |= TileFlag.CARGO_BAY
+        if self.is_crate_spawn_point:
+            flags |= TileFlag.CRATE_SPAWN
+        if self.is_start:
+            flags |= TileFlag.START
+        return flags
+
 
 INDEX_TO_TILE = tuple(list(TileType))
+# Packed tiles (type and flags) of all tile types (see TileGrid)
+PACKED_TILES = {tile: index | int(tile.flags) for index, tile in enumerate(INDEX_TO_TILE)}
 
 
 @dataclass(frozen=True)
@@ -81,3 +110,124 @@ class Tileset:
         num_tiles = len(TileType)
         index_in_range = self.first_tile_index <= tile_index < self.first_tile_index + num_tiles
         return INDEX_TO_TILE[tile_index % num_tiles] if index_in_range else TileType.VOID
+
+
+TILE_TYPE_MASK = 0x0F
+
+
+@dataclass(frozen=True)
+class TileGrid:
+    """TileGrid is a compact, static representation of level's tiles in terms of game logic.
+
+    Each tile is stored in a single byte: lower bits keep the index of the tile type and upper bits
+    keep tile flags (see TileFlag). Tiles outside the grid are treated as VOID.
+
+    Attributes:
+        width - width of the grid (expressed as a number of horizontal tiles)
+        height - height of the grid (expressed as a number of vertical tiles)
+        cells - flat array of packed tiles (row by row, from top-left to bottom-right)
+    """
+    width: int
+    height: int
+    cells: bytes
+
+    @classmethod
+    def from_tile_types(cls, width: int, height: int,
+                        tile_types: Iterable[TileType]) -> "TileGrid":
+        """Create a new tile grid from tile types listed row by row.
+
+        :param width: width of the grid
+        :param height: height of the grid
+        :param tile_types: types of all tiles of the grid (from top-left to bottom-right)
+        :return: newly created tile grid
+        """
+        cells = bytes(map(PACKED_TILES.__getitem__, tile_types))
+        if len(cells) != width * height:
+            raise ValueError("Number of tiles does not match the size of tile grid")
+        return cls(width=width, height=height, cells=cells)
+
+    def cell_at(self, position: TilePosition) -> int:
+        """Return packed tile (type and flags) at given position.
+
+        :param position: position of the tile
+        :return: packed tile at given position (0 - which is VOID - for positions outside the grid)
+        """
+        if 0 <= position.tile_x < self.width and 0 <= position.tile_y < self.height:
+            return self.cells[position.tile_y * self.width + position.tile_x]
+        return 0
+
+    def tile_at(self, position: TilePosition) -> TileType:
+        """Return the type of tile at given position.
+
+        :param position: position of the tile to check tile type of
+        :return: type of the tile at given position
+        """
+        return INDEX_TO_TILE[self.cell_at(position) & TILE_TYPE_MASK]
+
+    def has_flag(self, position: TilePosition, flag: TileFlag) -> bool:
+        """Test whether tile at given position has given flag set.
+
+        :param position: position of the tile to test
+        :param flag: flag to test the tile against
+        :return: True - if tile has the flag set *OR* False - otherwise
+        """
+        return bool(self.cell_at(position) & flag)
+
+    def is_walkable(self, position: TilePosition) -> bool:
+        """Test whether tile at given position is walkable (see TileType.is_walkable)."""
+        return self.has_flag(position, TileFlag.WALKABLE)
+
+    def is_cargo_bay(self, position: TilePosition) -> bool:
+        """Test whether tile at given position is a cargo bay (with or without crate initially
+        placed on it)."""
+        return self.has_flag(position, TileFlag.CARGO_BAY)
+
+
+@dataclass(frozen=True)
+class LevelDescriptor:
+    """LevelDescriptor is an immutable description of the level's initial setup.
+
+    Attributes:
+        start - player's start position
+        face_direction - initial face direction of the robot
+        crate_spawns - positions crates are placed at during level initialization
+        cargo_bays - positions of all cargo bays (crates' destinations)
+    """
+    start: TilePosition
+    face_direction: Direction
+    crate_spawns: Tuple[TilePosition, ...]
+    cargo_bays: Tuple[TilePosition, ...]
+
+    @classmethod
+    def from_grid(cls, grid: TileGrid, level_num: int) -> "LevelDescriptor":
+        """Create level descriptor by scanning given tile grid (in a single pass).
+
+        :param grid: tile grid to be scanned
+        :param level_num: number of the level the grid belongs to (used in error messages)
+        :return: newly created level descriptor
+        """
+        start: Optional[TilePosition] = None
+        crate_spawns = []
+        cargo_bays = []
+        for i, cell in enumerate(grid.cells):
+            if not cell & TileFlag.WALKABLE:
+                continue
+            position = TilePosition.at(i % grid.width, i // grid.width)
+            if cell & TileFlag.START:
+                start = position
+            if cell & TileFlag.CRATE_SPAWN:
+                crate_spawns.append(position)
+            if cell & TileFlag.CARGO_BAY:
+                cargo_bays.append(position)
+
+        if not start:
+            raise GameError(f"Level {level_num} does not have player start tile")
+        if not crate_spawns:
+            raise GameError(f"Level {level_num} does not have any crates")
+
+        face_direction = next(
+            (direction for direction in list(Direction)
+             if grid.is_walkable(start.move(direction))), Direction.UP)
+
+        return cls(start=start, face_direction=face_direction, crate_spawns=tuple(crate_spawns),
+                   cargo_bays=tuple(cargo_bays))
@@ -1,8 +1,10 @@
 """Module exposing graphic related classes and routines."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from enum import unique, Enum
 from functools import total_ordering
-from typing import List, Optional, Tuple, Generator
+from typing import List, Optional, Tuple, Generator, Type, TypeVar, Dict, Any, cast
+
+from bansoko import LEVEL_WIDTH, LEVEL_HEIGHT
 
 TILEMAP_WIDTH = 256
 TILEMAP_HEIGHT = 256
@@ -14,6 +16,40 @@ IMAGE_BANK_HEIGHT = 256
 SCREEN_WIDTH = 256
 SCREEN_HEIGHT = 256
 
+T = TypeVar("T")
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    """Recreate given dataclass as a class with __slots__ (it has to be applied *after* dataclass
+    decorator).
+
+    Slotted instances have no __dict__, so they are much smaller and faster to create (it's a
+    backport of dataclass(slots=True) which is available since Python 3.10).
+
+    Fields which are not initialized in __init__ must not have default values (they should be set
+    in __post_init__ instead).
+
+    :param cls: dataclass to be recreated with __slots__
+    :return: slotted version of given dataclass
+    """
+    field_names = tuple(cls_field.name for cls_field in fields(cast(Any, cls)))
+    cls_dict = {name: value for name, value in cls.__dict__.items()
+                if name not in field_names + ("__dict__", "__weakref__")}
+    cls_dict["__slots__"] = field_names
+    cls_dict["__getstate__"] = _get_slots_state
+    cls_dict["__setstate__"] = _set_slots_state
+    return cast(Type[T], type(cls.__name__, cls.__bases__, cls_dict))
+
+
+def _get_slots_state(instance: Any) -> Dict[str, Any]:
+    return {name: getattr(instance, name) for name in instance.__slots__}
+
+
+def _set_slots_state(instance: Any, state: Dict[str, Any]) -> None:
+    # object.__setattr__ has to be used for frozen dataclasses
+    for name, value in state.items():
+        object.__setattr__(instance, name, value)
+
 
 @unique
 class Direction(Enum):
@@ -62,6 +98,7 @@ class Direction(Enum):
         raise AssertionError(f"Direction {str(self)} is not supported")
 
 
+@slotted
 @dataclass(frozen=True)
 class Point:
     """A point representing a location in (x, y) screen space."""
@@ -87,7 +124,49 @@ class Point:
         return Point(self.x + direction.dx, self.y + direction.dy)
 
 
+@slotted
+@dataclass(frozen=True)
+class TilePosition:
+    """Position of tile in tilemap space.
+
+    Tile positions inside the level (LEVEL_WIDTH x LEVEL_HEIGHT) are interned, so use at() to get
+    them without creating new instances.
+    """
+    tile_x: int = 0
+    tile_y: int = 0
+
+    @classmethod
+    def at(cls, tile_x: int, tile_y: int) -> "TilePosition":
+        """Get tile position with given coordinates (interned one if it's inside the level).
+
+        :param tile_x: x coordinate of the tile
+        :param tile_y: y coordinate of the tile
+        :return: tile position with given coordinates
+        """
+        if 0 <= tile_x < LEVEL_WIDTH and 0 <= tile_y < LEVEL_HEIGHT:
+            return LEVEL_TILE_POSITIONS[tile_y * LEVEL_WIDTH + tile_x]
+        return cls(tile_x, tile_y)
+
+    def move(self, direction: Direction) -> "TilePosition":
+        """Get tile position that is a result of moving this tile position in specified
+        direction by one tile.
+
+        :param direction: direction to move tile position in
+        :return: moved tile position
+        """
+        return TilePosition.at(self.tile_x + direction.dx, self.tile_y + direction.dy)
+
+    def to_point(self) -> Point:
+        """Convert tile position to a point in screen space."""
+        return Point(self.tile_x * TILE_SIZE, self.tile_y * TILE_SIZE)
+
+
+LEVEL_TILE_POSITIONS = tuple(
+    TilePosition(tile_x, tile_y) for tile_y in range(LEVEL_HEIGHT) for tile_x in range(LEVEL_WIDTH))
+
+
 @total_ordering
+@slotted
 @dataclass(frozen=True)
 class Size:
     """Size describes width and height dimensions in pixels."""
@@ -126,6 +205,7 @@ def min_size(size1: Size, size2: Size) -> Size:
 SCREEN_RECT = Size(SCREEN_WIDTH, SCREEN_HEIGHT)
 
 
+@slotted
 @dataclass(frozen=True)
 class Rect:
     """A rectangle represented by position and size.
@@ -204,6 +284,18 @@ class Rect:
         """Create a new Rect enlarged with given size (w, h)."""
         return Rect(position=self.position, size=self.size.enlarge(w, h))
 
+    def intersects(self, other: "Rect") -> bool:
+        """Test whether this Rect has any common point with other Rect."""
+        return self.left <= other.right and other.left <= self.right \
+            and self.top <= other.bottom and other.top <= self.bottom
+
+    def union(self, other: "Rect") -> "Rect":
+        """Create the smallest Rect containing both this Rect and other Rect."""
+        left = min(self.left, other.left)
+        top = min(self.top, other.top)
+        return Rect.from_coords(left, top, max(self.right, other.right) - left + 1,
+                                max(self.bottom, other.bottom) - top + 1)
+
     def inside_points(self) -> Generator[Point, None, None]:
         """Generator for iterating over all valid positions inside the rectangle (from top-left to
         bottom-right)."""
@@ -231,6 +323,7 @@ def center_in_rect(size: Size, target_rect: Rect = Rect.from_size(SCREEN_RECT))
     return Rect(Point(x, y), size)
 
 
+@slotted
 @dataclass(frozen=True)
 class Layer:
     """Layer is an abstract surface on which elements can be drawn.
@@ -242,15 +335,17 @@ class Layer:
         layer_index - index of the layer (used to calculate layer offset)
         opaque - is layer opaque *OR* transparent
         global_offset - offset of elements drawn on the layer
+        offset - position offset for all graphical objects drawn on this layer (calculated when
+                 the layer is created)
     """
     layer_index: int
     opaque: bool = False
     global_offset: Point = Point(0, 0)
+    offset: Point = field(init=False, repr=False, compare=False)
 
-    @property
-    def offset(self) -> Point:
-        """Position offset for all graphical objects drawn on this layer."""
-        return self.global_offset.offset(Point(-self.layer_index, -self.layer_index))
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "offset",
+                           self.global_offset.offset(Point(-self.layer_index, -self.layer_index)))
 
     @property
     def transparency_color(self) -> int:
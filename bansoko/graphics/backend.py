@@ -0,0 +1,216 @@
+"""Module exposing render backends - everything graphics (and GUI) is drawn with.
+
+All drawing goes through the current render backend (see get_backend), so the game can be
+rendered either by Pyxel (which is the default) or offscreen by any other backend.
+"""
+import abc
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple, Union, cast, List, Iterator
+
+import pyxel
+
+from bansoko.graphics import Rect, SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class Surface(abc.ABC):
+    """Surface is an abstract, rectangular area of pixels that can be drawn on.
+
+    Drawing routines mirror Pyxel's API. Fragments of images are given as (u, v, w, h) tuples.
+
+    Attributes:
+        width - width of the surface (in pixels)
+        height - height of the surface (in pixels)
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+
+    @abc.abstractmethod
+    def clip(self, rect: Optional[Rect] = None) -> None:
+        """Restrict drawing to given rectangle of the surface.
+
+        :param rect: rectangle drawing is restricted to (None resets the restriction)
+        """
+
+    @abc.abstractmethod
+    def cls(self, color: int) -> None:
+        """Fill the surface (or its clipping rectangle) with given color.
+
+        :param color: color to fill the surface with
+        """
+
+    @abc.abstractmethod
+    def rect(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        """Draw a filled rectangle.
+
+        :param x: x coordinate of top-left corner of the rectangle
+        :param y: y coordinate of top-left corner of the rectangle
+        :param w: width of the rectangle
+        :param h: height of the rectangle
+        :param color: color of the rectangle
+        """
+
+    @abc.abstractmethod
+    def rectb(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        """Draw an outline of a rectangle.
+
+        :param x: x coordinate of top-left corner of the rectangle
+        :param y: y coordinate of top-left corner of the rectangle
+        :param w: width of the rectangle
+        :param h: height of the rectangle
+        :param color: color of the outline
+        """
+
+    @abc.abstractmethod
+    def line(self, x1: int, y1: int, x2: int, y2: int, color: int) -> None:
+        """Draw a line between two points.
+
+        :param x1: x coordinate of the first point
+        :param y1: y coordinate of the first point
+        :param x2: x coordinate of the second point
+        :param y2: y coordinate of the second point
+        :param color: color of the line
+        """
+
+    @abc.abstractmethod
+    def text(self, x: int, y: int, text: str, color: int) -> None:
+        """Draw a text with the built-in font.
+
+        :param x: x coordinate of the text
+        :param y: y coordinate of the text
+        :param text: text to be drawn
+        :param color: color of the text
+        """
+
+    @abc.abstractmethod
+    def blt(self, x: int, y: int, image: "ImageSource", uv: Tuple[int, int, int, int],
+            colkey: Optional[int] = None) -> None:
+        """Copy a fragment of an image bank (or another surface) to the surface.
+
+        :param x: x coordinate the fragment is copied to
+        :param y: y coordinate the fragment is copied to
+        :param image: id of image bank *OR* surface created by the same backend
+        :param uv: fragment of the image to be copied (u, v, w, h)
+        :param colkey: transparency color (None if fragment is opaque)
+        """
+
+    @abc.abstractmethod
+    def bltm(self, x: int, y: int, tilemap_id: int, uv: Tuple[int, int, int, int],
+             colkey: Optional[int] = None) -> None:
+        """Draw a fragment of a tilemap on the surface.
+
+        :param x: x coordinate the fragment is drawn at
+        :param y: y coordinate the fragment is drawn at
+        :param tilemap_id: id of the tilemap
+        :param uv: fragment of the tilemap to be drawn (u, v, w, h - expressed in pixels)
+        :param colkey: transparency color (None if fragment is opaque)
+        """
+
+
+ImageSource = Union[int, Surface]
+
+
+class RenderBackend(Surface):
+    """RenderBackend is a surface of the screen which also provides access to resources (image
+    banks and tilemaps) and can create offscreen surfaces.
+    """
+
+    @abc.abstractmethod
+    def create_surface(self, width: int, height: int) -> Surface:
+        """Create an offscreen surface (filled with color 0).
+
+        :param width: width of the surface
+        :param height: height of the surface
+        :return: newly created surface
+        """
+
+    @abc.abstractmethod
+    def tile_at(self, tilemap_id: int, tile_x: int, tile_y: int) -> Tuple[int, int]:
+        """Return the tile stored in a tilemap at given position.
+
+        :param tilemap_id: id of the tilemap
+        :param tile_x: x coordinate of the tile (in tiles)
+        :param tile_y: y coordinate of the tile (in tiles)
+        :return: coordinates of the tile in tilemap's image bank (in tiles)
+        """
+
+
+class PyxelSurface(Surface):
+    """Surface drawn by Pyxel.
+
+    Attributes:
+        target - Pyxel's image the surface draws on (or pyxel module itself for the screen)
+    """
+
+    def __init__(self, target: Any, width: int, height: int) -> None:
+        super().__init__(width, height)
+        self.target = target
+
+    def clip(self, rect: Optional[Rect] = None) -> None:
+        if rect:
+            self.target.clip(rect.x, rect.y, rect.w, rect.h)
+        else:
+            self.target.clip()
+
+    def cls(self, color: int) -> None:
+        self.target.cls(color)
+
+    def rect(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        self.target.rect(x, y, w, h, color)
+
+    def rectb(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        self.target.rectb(x, y, w, h, color)
+
+    def line(self, x1: int, y1: int, x2: int, y2: int, color: int) -> None:
+        self.target.line(x1, y1, x2, y2, color)
+
+    def text(self, x: int, y: int, text: str, color: int) -> None:
+        self.target.text(x, y, text, color)
+
+    def blt(self, x: int, y: int, image: ImageSource, uv: Tuple[int, int, int, int],
+            colkey: Optional[int] = None) -> None:
+        pyxel_image = image if isinstance(image, int) else cast(PyxelSurface, image).target
+        self.target.blt(x, y, pyxel_image, uv[0], uv[1], uv[2], uv[3], colkey)
+
+    def bltm(self, x: int, y: int, tilemap_id: int, uv: Tuple[int, int, int, int],
+             colkey: Optional[int] = None) -> None:
+        self.target.bltm(x, y, tilemap_id, uv[0], uv[1], uv[2], uv[3], colkey)
+
+
+class PyxelBackend(PyxelSurface, RenderBackend):
+    """Render backend drawing on Pyxel's screen (Pyxel has to be initialized before drawing)."""
+
+    def __init__(self) -> None:
+        super().__init__(pyxel, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def create_surface(self, width: int, height: int) -> Surface:
+        return PyxelSurface(pyxel.Image(width, height), width, height)
+
+    def tile_at(self, tilemap_id: int, tile_x: int, tile_y: int) -> Tuple[int, int]:
+        return cast(Tuple[int, int], pyxel.tilemap(tilemap_id).pget(tile_x, tile_y))
+
+
+# Backends stack (the top one is used for drawing, see use_backend)
+_BACKENDS: List[RenderBackend] = [PyxelBackend()]
+
+
+def get_backend() -> RenderBackend:
+    """Return the render backend currently used for drawing."""
+    return _BACKENDS[-1]
+
+
+@contextmanager
+def use_backend(backend: RenderBackend) -> Iterator[RenderBackend]:
+    """Context manager for drawing with given render backend (instead of the current one).
+
+    Surfaces created by the backend must not be used once the context is exited.
+
+    :param backend: render backend to be used within the context
+    :return: given render backend
+    """
+    _BACKENDS.append(backend)
+    try:
+        yield backend
+    finally:
+        _BACKENDS.pop()
@@ -0,0 +1,97 @@
+"""Module exposing tracking of screen regions that have to be redrawn."""
+from itertools import combinations
+from typing import Dict, Hashable, Tuple, List
+
+from bansoko.graphics import Rect
+
+
+class DirtyRects:
+    """DirtyRects tracks rectangles of the screen that changed since the last drawn frame.
+
+    Drawables are tracked by comparing their draw state (anything that affects what they look
+    like) and the rectangle they cover with the ones from the previous frame. Whenever any of them
+    changes, both old and new rectangles are marked as dirty. Overlapping dirty rectangles are
+    merged, so every pixel is redrawn at most once.
+
+    Attributes:
+        tracked - draw states and rectangles of all tracked drawables (as of the last frame)
+        rects - rectangles that have to be redrawn
+        full_redraw - does the whole screen have to be redrawn (for example when the screen was
+                      drawn over by another screen)
+    """
+
+    def __init__(self) -> None:
+        self.tracked: Dict[Hashable, Tuple[Hashable, Rect]] = {}
+        self.rects: List[Rect] = []
+        self.full_redraw = True
+
+    @property
+    def is_clean(self) -> bool:
+        """Value indicating whether nothing has to be redrawn."""
+        return not self.full_redraw and not self.rects
+
+    def regions(self, pass_cost: int) -> List[Rect]:
+        """Group dirty rectangles into regions, each one redrawn by a separate pass over the scene.
+
+        Every pass costs the same (all draw calls of the scene are made, even though they are
+        clipped to the region) on top of the cost of pixels it draws. So dirty rectangles close to
+        each other are merged (the pixels between them cost less than another pass), while
+        distant ones are redrawn separately (rather than redrawing everything between them).
+
+        :param pass_cost: cost of a single pass expressed as a number of pixels (that could be
+                          drawn in the time it takes to make all draw calls of the scene)
+        :return: non-overlapping regions covering all dirty rectangles
+        """
+        regions = list(self.rects)
+        merged = True
+        while merged:
+            merged = False
+            for first, second in combinations(regions, 2):
+                union = first.union(second)
+                if union.w * union.h <= first.w * first.h + second.w * second.h + pass_cost \
+                        or first.intersects(second):
+                    regions.remove(first)
+                    regions.remove(second)
+                    regions.append(union)
+                    merged = True
+                    break
+        return regions
+
+    def invalidate(self) -> None:
+        """Mark the whole screen as dirty."""
+        self.full_redraw = True
+
+    def track(self, drawable: Hashable, draw_state: Hashable, rect: Rect) -> None:
+        """Mark the rectangles of given drawable as dirty if it changed since the last frame.
+
+        :param drawable: key identifying the drawable
+        :param draw_state: everything that affects what the drawable looks like
+        :param rect: rectangle of the screen covered by the drawable
+        """
+        previous = self.tracked.get(drawable)
+        if previous == (draw_state, rect):
+            return
+        if previous:
+            self.mark(previous[1])
+        self.mark(rect)
+        self.tracked[drawable] = (draw_state, rect)
+
+    def mark(self, rect: Rect) -> None:
+        """Mark given rectangle as dirty (merging it with all dirty rectangles it overlaps).
+
+        :param rect: rectangle to be marked as dirty
+        """
+        if rect.w <= 0 or rect.h <= 0:
+            return
+        overlapping = [dirty_rect for dirty_rect in self.rects if dirty_rect.intersects(rect)]
+        while overlapping:
+            for dirty_rect in overlapping:
+                self.rects.remove(dirty_rect)
+                rect = rect.union(dirty_rect)
+            overlapping = [dirty_rect for dirty_rect in self.rects if dirty_rect.intersects(rect)]
+        self.rects.append(rect)
+
+    def clear(self) -> None:
+        """Mark the whole screen as clean (called once dirty rectangles are redrawn)."""
+        self.rects.clear()
+        self.full_redraw = False
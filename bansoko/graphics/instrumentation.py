@@ -0,0 +1,110 @@
+"""Module exposing InstrumentedBackend - a render backend reporting every call made on it.
+
+It's the base of tools measuring drawing (like the draw calls counter of the frame profiler and
+the draw calls tracer).
+"""
+import time
+from typing import Optional, Tuple
+
+import pyxel
+
+from bansoko.graphics import Rect
+from bansoko.graphics.backend import RenderBackend, Surface, ImageSource
+
+INSTRUMENTED_CALLS = ("clip", "cls", "rect", "rectb", "line", "text", "blt", "bltm", "tile_at")
+
+
+class InstrumentedBackend(RenderBackend):
+    """Render backend passing every call to the wrapped backend and reporting it to on_call hook.
+
+    Instrumentation can be switched on and off at any time (see enabled property). When it's off,
+    calls are bound directly to the wrapped backend, so there is no overhead at all.
+
+    Surfaces are created by the wrapped backend (so they can still be used when the instrumented
+    backend is not), which means that only calls made on the screen are reported. Calls made on
+    offscreen surfaces (like cached texts or pre-rendered tilemaps) are not.
+
+    Attributes:
+        backend - wrapped render backend
+    """
+
+    def __init__(self, backend: RenderBackend, enabled: bool = True) -> None:
+        super().__init__(backend.width, backend.height)
+        self.backend = backend
+        self._enabled = True
+        self.enabled = enabled
+
+    @property
+    def enabled(self) -> bool:
+        """Value indicating whether calls are being reported."""
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool) -> None:
+        self._enabled = enabled
+        for name in INSTRUMENTED_CALLS:
+            if enabled:
+                self.__dict__.pop(name, None)
+            else:
+                # Instance attribute shadows the instrumented method
+                setattr(self, name, getattr(self.backend, name))
+
+    def on_call(self, name: str, start_time: float, pixels: int) -> None:
+        """Hook called right after every call made on the screen (when instrumentation is on).
+
+        :param name: name of the call (one of INSTRUMENTED_CALLS)
+        :param start_time: time the call started at (as returned by time.perf_counter)
+        :param pixels: number of pixels touched by the call
+        """
+
+    def create_surface(self, width: int, height: int) -> Surface:
+        return self.backend.create_surface(width, height)
+
+    def tile_at(self, tilemap_id: int, tile_x: int, tile_y: int) -> Tuple[int, int]:
+        start_time = time.perf_counter()
+        tile = self.backend.tile_at(tilemap_id, tile_x, tile_y)
+        self.on_call("tile_at", start_time, 0)
+        return tile
+
+    def clip(self, rect: Optional[Rect] = None) -> None:
+        start_time = time.perf_counter()
+        self.backend.clip(rect)
+        self.on_call("clip", start_time, 0)
+
+    def cls(self, color: int) -> None:
+        start_time = time.perf_counter()
+        self.backend.cls(color)
+        self.on_call("cls", start_time, self.width * self.height)
+
+    def rect(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        start_time = time.perf_counter()
+        self.backend.rect(x, y, w, h, color)
+        self.on_call("rect", start_time, abs(w * h))
+
+    def rectb(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        start_time = time.perf_counter()
+        self.backend.rectb(x, y, w, h, color)
+        self.on_call("rectb", start_time, min(abs(w * h), 2 * (abs(w) + abs(h)) - 4))
+
+    def line(self, x1: int, y1: int, x2: int, y2: int, color: int) -> None:
+        start_time = time.perf_counter()
+        self.backend.line(x1, y1, x2, y2, color)
+        self.on_call("line", start_time, max(abs(x2 - x1), abs(y2 - y1)) + 1)
+
+    def text(self, x: int, y: int, text: str, color: int) -> None:
+        start_time = time.perf_counter()
+        self.backend.text(x, y, text, color)
+        num_chars = len(text) - text.count("\n")
+        self.on_call("text", start_time, num_chars * pyxel.FONT_WIDTH * pyxel.FONT_HEIGHT)
+
+    def blt(self, x: int, y: int, image: ImageSource, uv: Tuple[int, int, int, int],
+            colkey: Optional[int] = None) -> None:
+        start_time = time.perf_counter()
+        self.backend.blt(x, y, image, uv, colkey)
+        self.on_call("blt", start_time, abs(uv[2] * uv[3]))
+
+    def bltm(self, x: int, y: int, tilemap_id: int, uv: Tuple[int, int, int, int],
+             colkey: Optional[int] = None) -> None:
+        start_time = time.perf_counter()
+        self.backend.bltm(x, y, tilemap_id, uv, colkey)
+        self.on_call("bltm", start_time, abs(uv[2] * uv[3]))
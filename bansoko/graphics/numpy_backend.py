@@ -0,0 +1,278 @@
+"""Module exposing headless render backend which draws on NumPy arrays.
+
+It does not need Pyxel to be initialized (nor any display), image banks and tilemaps are read
+directly from Pyxel's resource file. It requires NumPy (which is not a dependency of the game).
+"""
+import importlib
+import zipfile
+from dataclasses import dataclass
+from typing import Optional, Tuple, cast
+
+import numpy as np
+
+from bansoko.game import GameError
+from bansoko.graphics import Rect, TILE_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, IMAGE_BANK_WIDTH, \
+    IMAGE_BANK_HEIGHT, TILEMAP_WIDTH, TILEMAP_HEIGHT
+from bansoko.graphics.backend import RenderBackend, Surface, ImageSource
+
+NUM_IMAGE_BANKS = 3
+NUM_TILEMAPS = 8
+# Pyxel's default palette (RGB values of all 16 colors)
+PALETTE = (
+    0x000000, 0x2B335F, 0x7E2072, 0x19959C, 0x8B4852, 0x395C98, 0xA9C1FF, 0xEEEEEE,
+    0xD4186C, 0xD38441, 0xE9C35B, 0x70C6A9, 0x7696DE, 0xA3A3A3, 0xFF9798, 0xEDC7B0)
+
+FONT_WIDTH = 4
+FONT_HEIGHT = 6
+FONT_MIN_CODE = 32
+# Pyxel's built-in font (every glyph is a 4x6 bitmap, starting from the most significant bit)
+FONT_DATA = (
+    0, 4472896, 11141120, 11447968, 7105600, 8538144, 4868800, 4456448, 2376736, 8668288,
+    10806432, 320512, 1152, 57344, 64, 2246784, 6990528, 4998208, 12732640, 12731072, 11199008,
+    15254208, 6875872, 14829696, 15395552, 15393472, 263168, 263296, 2393120, 921088, 8660096,
+    14827584, 4892768, 4909728, 13290176, 6850656, 13281984, 15263968, 15263872, 6875744,
+    11201184, 14959840, 2239040, 11192992, 8947936, 11463328, 13281952, 4893248, 13289600,
+    4894304, 13298848, 6832832, 14959680, 11184736, 11184704, 11202208, 11160224, 11158592,
+    14829792, 6571104, 8929824, 12862656, 4849664, 224, 8650752, 436832, 9218752, 428128,
+    2533984, 437344, 2417728, 437796, 9218720, 4211776, 2106020, 9096352, 12862688, 978592,
+    830112, 305728, 830152, 436834, 428160, 444096, 5129312, 698976, 698944, 700128, 672928,
+    697892, 926944, 6603872, 4473920, 12870848, 7077888, 15658720)
+FONT_GLYPHS = np.array(
+    [[[bool(code >> (FONT_WIDTH * FONT_HEIGHT - 1 - y * FONT_WIDTH - x) & 1)
+       for x in range(FONT_WIDTH)] for y in range(FONT_HEIGHT)] for code in FONT_DATA])
+
+
+@dataclass(frozen=True)
+class PyxelResources:
+    """Image banks and tilemaps loaded from Pyxel's resource file.
+
+    Attributes:
+        images - pixels of image banks (2d arrays of colors)
+        tilemaps - tiles of tilemaps (3d arrays of (tile_x, tile_y) coordinates in image banks)
+        tilemap_image_banks - ids of image banks tiles of tilemaps are taken from
+    """
+    images: Tuple[np.ndarray, ...]
+    tilemaps: Tuple[np.ndarray, ...]
+    tilemap_image_banks: Tuple[int, ...]
+
+    @classmethod
+    def from_file(cls, filename: str) -> "PyxelResources":
+        """Load image banks and tilemaps from Pyxel's resource file.
+
+        Both the format of Pyxel 1.x and the one of Pyxel 2.x (which can be read only with
+        Python 3.11 or newer) are supported.
+
+        :param filename: name of Pyxel's resource file
+        :return: loaded resources
+        """
+        try:
+            with zipfile.ZipFile(filename) as resource_file:
+                names = resource_file.namelist()
+                if "pyxel_resource.toml" in names:
+                    return cls._from_toml(resource_file.read("pyxel_resource.toml").decode())
+                return cls._from_legacy_files(resource_file)
+        except (OSError, zipfile.BadZipFile, ValueError, KeyError) as error:
+            raise GameError(f"Unable to load Pyxel resource file '{filename}'") from error
+
+    @classmethod
+    def _from_legacy_files(cls, resource_file: zipfile.ZipFile) -> "PyxelResources":
+        names = resource_file.namelist()
+        images = []
+        for image_id in range(NUM_IMAGE_BANKS):
+            image = np.zeros((IMAGE_BANK_HEIGHT, IMAGE_BANK_WIDTH), dtype=np.uint8)
+            name = f"pyxel_resource/image{image_id}"
+            if name in names:
+                rows = resource_file.read(name).decode().split()
+                image[:len(rows)] = [[int(color, 16) for color in row] for row in rows]
+            images.append(image)
+
+        tilemaps = []
+        tilemap_image_banks = []
+        for tilemap_id in range(NUM_TILEMAPS):
+            tilemap = np.zeros((TILEMAP_HEIGHT, TILEMAP_WIDTH, 2), dtype=np.uint8)
+            image_bank = 0
+            name = f"pyxel_resource/tilemap{tilemap_id}"
+            if name in names:
+                rows = resource_file.read(name).decode().split()
+                image_bank = int(rows[TILEMAP_HEIGHT]) if len(rows) > TILEMAP_HEIGHT else 0
+                for tile_y, row in enumerate(rows[:TILEMAP_HEIGHT]):
+                    tilemap[tile_y] = np.frombuffer(bytes.fromhex(row), dtype=np.uint8).reshape(
+                        TILEMAP_WIDTH, 2)
+            tilemaps.append(tilemap)
+            tilemap_image_banks.append(image_bank)
+        return cls(tuple(images), tuple(tilemaps), tuple(tilemap_image_banks))
+
+    @classmethod
+    def _from_toml(cls, toml_data: str) -> "PyxelResources":
+        try:
+            tomllib = importlib.import_module("tomllib")
+        except ImportError as error:
+            raise GameError(
+                "Pyxel 2.x resource files can be read only with Python 3.11 or newer") from error
+
+        resources = tomllib.loads(toml_data)
+        images = []
+        for image_data in resources.get("images", [])[:NUM_IMAGE_BANKS]:
+            image = np.zeros((image_data["height"], image_data["width"]), dtype=np.uint8)
+            for y, row in enumerate(image_data["data"]):
+                image[y, :len(row)] = row
+            images.append(image)
+
+        tilemaps = []
+        tilemap_image_banks = []
+        for tilemap_data in resources.get("tilemaps", [])[:NUM_TILEMAPS]:
+            tilemap = np.zeros((tilemap_data["height"], tilemap_data["width"], 2), dtype=np.uint8)
+            for tile_y, row in enumerate(tilemap_data["data"]):
+                tilemap[tile_y, :len(row) // 2] = np.array(row, dtype=np.uint8).reshape(-1, 2)
+            tilemaps.append(tilemap)
+            tilemap_image_banks.append(tilemap_data.get("imgsrc", 0))
+        return cls(tuple(images), tuple(tilemaps), tuple(tilemap_image_banks))
+
+    def tilemap_pixels(self, tilemap_id: int, uv: Tuple[int, int, int, int]) -> np.ndarray:
+        """Render a fragment of a tilemap (the part of the fragment outside the tilemap is
+        skipped).
+
+        :param tilemap_id: id of the tilemap
+        :param uv: fragment of the tilemap to be rendered (u, v, w, h - expressed in pixels)
+        :return: pixels of the fragment
+        """
+        tilemap = self.tilemaps[tilemap_id]
+        image = self.images[self.tilemap_image_banks[tilemap_id]]
+        u, v, w, h = uv
+        pixels_v = np.arange(max(v, 0), min(v + h, tilemap.shape[0] * TILE_SIZE))[:, None]
+        pixels_u = np.arange(max(u, 0), min(u + w, tilemap.shape[1] * TILE_SIZE))[None, :]
+        tiles = tilemap[pixels_v // TILE_SIZE, pixels_u // TILE_SIZE].astype(int)
+        return image[tiles[..., 1] * TILE_SIZE + pixels_v % TILE_SIZE,
+                     tiles[..., 0] * TILE_SIZE + pixels_u % TILE_SIZE]
+
+
+class NumpySurface(Surface):
+    """Surface drawn on a NumPy array (it mimics the way Pyxel draws).
+
+    Attributes:
+        pixels - colors of all pixels of the surface (2d array indexed by [y, x])
+        resources - image banks and tilemaps that can be drawn on the surface
+        clip_rect - rectangle drawing is restricted to (left, top, right, bottom - exclusive)
+    """
+
+    def __init__(self, pixels: np.ndarray, resources: PyxelResources) -> None:
+        super().__init__(pixels.shape[1], pixels.shape[0])
+        self.pixels = pixels
+        self.resources = resources
+        self.clip_rect = (0, 0, self.width, self.height)
+
+    def clip(self, rect: Optional[Rect] = None) -> None:
+        if rect:
+            self.clip_rect = (max(rect.x, 0), max(rect.y, 0), min(rect.x + rect.w, self.width),
+                              min(rect.y + rect.h, self.height))
+        else:
+            self.clip_rect = (0, 0, self.width, self.height)
+
+    def cls(self, color: int) -> None:
+        left, top, right, bottom = self.clip_rect
+        self.pixels[top:bottom, left:right] = color
+
+    def rect(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        left, top, right, bottom = self.clip_rect
+        left, top = max(x, left), max(y, top)
+        right, bottom = min(x + w, right), min(y + h, bottom)
+        if left < right and top < bottom:
+            self.pixels[top:bottom, left:right] = color
+
+    def rectb(self, x: int, y: int, w: int, h: int, color: int) -> None:
+        if w <= 0 or h <= 0:
+            return
+        self.rect(x, y, w, 1, color)
+        self.rect(x, y + h - 1, w, 1, color)
+        self.rect(x, y, 1, h, color)
+        self.rect(x + w - 1, y, 1, h, color)
+
+    def line(self, x1: int, y1: int, x2: int, y2: int, color: int) -> None:
+        # Line is drawn the same way Pyxel does it (from the point with lower coordinate along its
+        # longer axis, with single precision calculations), so both draw exactly the same pixels
+        if (x1, y1) > (x2, y2) if abs(x2 - x1) >= abs(y2 - y1) else (y1, x1) > (y2, x2):
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        length = max(abs(x2 - x1), abs(y2 - y1))
+        steps = np.arange(length + 1, dtype=np.float32)
+        if length:
+            xs = x1 + _round_half_away(np.float32(x2 - x1) / np.float32(length) * steps)
+            ys = y1 + _round_half_away(np.float32(y2 - y1) / np.float32(length) * steps)
+        else:
+            xs, ys = np.array([x1]), np.array([y1])
+        left, top, right, bottom = self.clip_rect
+        inside = (xs >= left) & (xs < right) & (ys >= top) & (ys < bottom)
+        self.pixels[ys[inside], xs[inside]] = color
+
+    def text(self, x: int, y: int, text: str, color: int) -> None:
+        char_x = x
+        for char in text:
+            if char == "\n":
+                char_x = x
+                y += FONT_HEIGHT
+                continue
+            code = ord(char) - FONT_MIN_CODE
+            if not 0 <= code < len(FONT_GLYPHS):
+                continue
+            self._draw(char_x, y, np.where(FONT_GLYPHS[code], color, -1), -1)
+            char_x += FONT_WIDTH
+
+    def blt(self, x: int, y: int, image: ImageSource, uv: Tuple[int, int, int, int],
+            colkey: Optional[int] = None) -> None:
+        source = self.resources.images[image] if isinstance(image, int) \
+            else cast(NumpySurface, image).pixels
+        u, v, w, h = uv
+        self._draw(x + max(-u, 0), y + max(-v, 0),
+                   source[max(v, 0):max(v + h, 0), max(u, 0):max(u + w, 0)], colkey)
+
+    def bltm(self, x: int, y: int, tilemap_id: int, uv: Tuple[int, int, int, int],
+             colkey: Optional[int] = None) -> None:
+        self._draw(x + max(-uv[0], 0), y + max(-uv[1], 0),
+                   self.resources.tilemap_pixels(tilemap_id, uv), colkey)
+
+    def _draw(self, x: int, y: int, source: np.ndarray, colkey: Optional[int]) -> None:
+        left, top, right, bottom = self.clip_rect
+        src_left = max(left - x, 0)
+        src_top = max(top - y, 0)
+        src_right = min(right - x, source.shape[1])
+        src_bottom = min(bottom - y, source.shape[0])
+        if src_left >= src_right or src_top >= src_bottom:
+            return
+
+        source = source[src_top:src_bottom, src_left:src_right]
+        target = self.pixels[y + src_top:y + src_bottom, x + src_left:x + src_right]
+        if colkey is None:
+            target[...] = source
+        else:
+            opaque = source != colkey
+            target[opaque] = source[opaque]
+
+
+def _round_half_away(values: np.ndarray) -> np.ndarray:
+    magnitudes = np.abs(values)
+    rounded = np.floor(magnitudes)
+    rounded += magnitudes - rounded >= 0.5
+    return (np.sign(values) * rounded).astype(int)
+
+
+class NumpyBackend(NumpySurface, RenderBackend):
+    """Headless render backend drawing the screen on a NumPy array."""
+
+    def __init__(self, resources: PyxelResources, width: int = SCREEN_WIDTH,
+                 height: int = SCREEN_HEIGHT) -> None:
+        super().__init__(np.zeros((height, width), dtype=np.uint8), resources)
+
+    @classmethod
+    def from_file(cls, resource_filename: str) -> "NumpyBackend":
+        """Create a headless render backend using resources from Pyxel's resource file.
+
+        :param resource_filename: name of Pyxel's resource file
+        :return: newly created render backend
+        """
+        return cls(PyxelResources.from_file(resource_filename))
+
+    def create_surface(self, width: int, height: int) -> Surface:
+        return NumpySurface(np.zeros((height, width), dtype=np.uint8), self.resources)
+
+    def tile_at(self, tilemap_id: int, tile_x: int, tile_y: int) -> Tuple[int, int]:
+        tile_u, tile_v = self.resources.tilemaps[tilemap_id][tile_y, tile_x]
+        return int(tile_u), int(tile_v)
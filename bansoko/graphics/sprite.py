@@ -1,10 +1,9 @@
 """Module exposing Sprite type."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple, Optional
 
-import pyxel
-
 from bansoko.graphics import Rect, Point, Direction, Layer
+from bansoko.graphics.backend import get_backend
 
 
 @dataclass(frozen=True)
@@ -28,6 +27,17 @@ class Sprite:
     transparency_color: int = None
     num_layers: int = 1
     num_frames: int = 1
+    uv_table: Tuple[Tuple[Tuple[Tuple[int, int, int, int], ...], ...], ...] = field(
+        init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Image fragments of all variants of the sprite are calculated once, so drawing the sprite
+        # takes a single lookup: uv_table[layer_index][direction_index][frame] -> (u, v, w, h)
+        object.__setattr__(self, "uv_table", tuple(
+            tuple(tuple(self._uv_rect_of(layer_index, direction, frame)
+                        for frame in range(self.num_frames))
+                  for direction in list(Direction))
+            for layer_index in range(self.num_layers)))
 
     def draw(self, position: Point, layer: Optional[Layer] = None,
              direction: Direction = Direction.UP, frame: int = 0) -> None:
@@ -40,44 +50,57 @@ class Sprite:
         :param direction: direction-specific variant of sprite to be drawn
         :param frame: frame of sprite to be drawn
         """
-        if layer and layer.layer_index >= self.num_layers:
+        if not layer:
+            get_backend().blt(position.x, position.y, self.image_bank,
+                              self.uv_table[0][direction.direction_index][
+                                  min(frame, self.num_frames - 1)],
+                              self.transparency_color)
+            return
+        if layer.layer_index >= self.num_layers:
             return
 
-        clamped_frame = min(frame, self.num_frames - 1)
-        frame_offset_v = clamped_frame * self.uv_rect.h // self.num_frames
-        top_layer_offset = self.num_layers - 1
-
-        u = self.uv_rect.x + top_layer_offset
-        v = self.uv_rect.y + frame_offset_v + top_layer_offset
-
-        if self.directional:
-            u += self.uv_rect.w // Direction.num_directions() * direction.direction_index
+        offset = layer.offset
+        get_backend().blt(position.x + offset.x, position.y + offset.y, self.image_bank,
+                          self.uv_table[layer.layer_index][direction.direction_index][
+                              min(frame, self.num_frames - 1)],
+                          self.transparency_color)
 
-        if layer:
-            u -= layer.layer_index
-            v -= layer.layer_index
+    def screen_rect(self, position: Point, layer: Optional[Layer] = None) -> Rect:
+        """Return the rectangle of the screen covered by the sprite drawn at given position.
 
+        :param position: position of sprite to be drawn at
+        :param layer: layer of sprite to be drawn at
+        :return: rectangle covered by the sprite (in screen space)
+        """
         offset = layer.offset if layer else Point(0, 0)
-
-        pyxel.blt(position.x + offset.x, position.y + offset.y, self.image_bank,
-                  u, v, self.width, self.height, self.transparency_color)
+        return Rect.from_coords(position.x + offset.x, position.y + offset.y, self.width,
+                                self.height)
 
     @property
     def width(self) -> int:
         """The width of sprite in pixels."""
-        width = self.uv_rect.w
+        return self.uv_table[0][0][0][2]
+
+    @property
+    def height(self) -> int:
+        """The height of sprite in pixels."""
+        return self.uv_table[0][0][0][3]
+
+    def _uv_rect_of(self, layer_index: int, direction: Direction,
+                    frame: int) -> Tuple[int, int, int, int]:
+        frame_offset_v = frame * self.uv_rect.h // self.num_frames
+        top_layer_offset = self.num_layers - 1
+
+        u = self.uv_rect.x + top_layer_offset - layer_index
+        v = self.uv_rect.y + frame_offset_v + top_layer_offset - layer_index
 
+        width = self.uv_rect.w
         if self.directional:
             width //= Direction.num_directions()
-
+            u += width * direction.direction_index
         width -= self.num_layers - 1
 
-        return width
-
-    @property
-    def height(self) -> int:
-        """The height of sprite in pixels."""
-        return self.uv_rect.h // self.num_frames - (self.num_layers - 1)
+        return u, v, width, self.uv_rect.h // self.num_frames - (self.num_layers - 1)
 
 
 @dataclass(frozen=True)
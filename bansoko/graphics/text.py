@@ -1,10 +1,19 @@
 """Module exposing text drawing related routines."""
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from itertools import chain
+from typing import Optional, Tuple, Iterator, NamedTuple, List
 
 import pyxel
 
-from bansoko.graphics import Size, Point
+from bansoko.graphics import Size, Point, SCREEN_WIDTH, SCREEN_HEIGHT
+from bansoko.graphics.backend import get_backend, Surface, RenderBackend
+
+NUM_COLORS = 16
+TEXT_CACHE_SIZE = 128
+TEXT_CACHE_MAX_PIXELS = 2 * SCREEN_WIDTH * SCREEN_HEIGHT
+TEXT_LAYOUT_CACHE_SIZE = 512
 
 
 @dataclass(frozen=True)
@@ -15,24 +24,54 @@ class TextStyle:
     vertical_space: int = 0
 
 
-def text_size(text: str, style: TextStyle = TextStyle()) -> Size:
-    """Calculate the size of given text.
+class Glyph(NamedTuple):
+    """Single char of a text (or its shadow) positioned relatively to the text position."""
+    x: int
+    y: int
+    char: str
+    color: int
 
-    Size represents the amount of screen space occupied by text during drawing.
 
-    :param text: string to calculate size for
-    :param style: text style calculation should be performed for
-    :return: size of the string that will be used during text drawing
+@dataclass(frozen=True)
+class TextLayout:
+    """TextLayout is a text parsed for drawing (with color tags resolved and chars positioned).
+
+    Attributes:
+        size - the amount of screen space occupied by the text (see text_size)
+        lines - glyphs (including shadows) of all lines of the text
     """
+    size: Size
+    lines: Tuple[Tuple[Glyph, ...], ...]
+
+    @property
+    def glyphs(self) -> Iterator[Glyph]:
+        """All glyphs of the text (in drawing order)."""
+        return chain.from_iterable(self.lines)
+
+
+@lru_cache(maxsize=TEXT_LAYOUT_CACHE_SIZE)
+def layout_text(text: str, style: TextStyle = TextStyle()) -> TextLayout:
+    """Parse given text and lay it out for drawing with given text style.
+
+    Layouts are memoized (the least recently used ones are evicted once there are more than
+    TEXT_LAYOUT_CACHE_SIZE of them), so every text is parsed only once.
+
+    :param text: text to be laid out
+    :param style: style of text to be drawn with
+    :return: layout of the text
+    """
+    lines: List[List[Glyph]] = [[]]
+    x = 0
+    y = 0
     text_width = 0
-    text_height = pyxel.FONT_HEIGHT
-    line_width = 0
+    current_color = style.color
     color_tag = False
     for char in text:
         if char == '\n':
-            text_width = max(text_width, line_width)
-            text_height += pyxel.FONT_HEIGHT + style.vertical_space
-            line_width = 0
+            text_width = max(text_width, x)
+            x = 0
+            y += pyxel.FONT_HEIGHT + style.vertical_space
+            lines.append([])
             color_tag = False
             continue
         if char == '#':
@@ -41,41 +80,123 @@ def text_size(text: str, style: TextStyle = TextStyle()) -> Size:
                 continue
 
         if color_tag:
+            current_color = int(char, 16)
             color_tag = False
         else:
-            line_width += pyxel.FONT_WIDTH
-    text_height -= style.vertical_space
-    text_width = max(text_width, line_width)
-    return Size(text_width, text_height)
+            if style.shadow_color is not None:
+                lines[-1].append(Glyph(x + 1, y + 1, char, style.shadow_color))
+            lines[-1].append(Glyph(x, y, char, current_color))
+            x += pyxel.FONT_WIDTH
+    size = Size(max(text_width, x), y + pyxel.FONT_HEIGHT - style.vertical_space)
+    return TextLayout(size=size, lines=tuple(tuple(line) for line in lines))
+
+
+def text_size(text: str, style: TextStyle = TextStyle()) -> Size:
+    """Calculate the size of given text.
+
+    Size represents the amount of screen space occupied by text during drawing.
+
+    :param text: string to calculate size for
+    :param style: text style calculation should be performed for
+    :return: size of the string that will be used during text drawing
+    """
+    return layout_text(text, style).size
 
 
 def draw_text(position: Point, text: str, style: TextStyle = TextStyle()) -> None:
     """Draws given text at specified position with defined text style.
 
+    Text is drawn from the text cache, so drawing a recently drawn text takes a single blit.
+
     :param position: position of text to be drawn at
     :param text: text to be drawn
     :param style: style of text to be drawn with
     """
-    x = position.x
-    y = position.y
-    current_color = style.color
-    color_tag = False
-    for char in text:
-        if char == '\n':
-            x = position.x
-            y += pyxel.FONT_HEIGHT + style.vertical_space
-            color_tag = False
-            continue
-        if char == '#':
-            color_tag = not color_tag
-            if color_tag:
-                continue
+    TEXT_CACHE.draw(position, text, style)
 
-        if color_tag:
-            current_color = int(char, 16)
-            color_tag = False
+
+TextCacheEntry = Tuple[Surface, Tuple[int, int, int, int], int]
+
+
+class TextCache:
+    """TextCache keeps texts pre-rendered into offscreen surfaces, so drawing a text which has been
+    drawn recently takes a single blit (instead of drawing it char by char).
+
+    Texts are rendered on a background of a color which is not used by the text (it's used as a
+    transparency color when the text is drawn). The least recently drawn texts are evicted when
+    the number of cached texts exceeds max_entries or their surfaces take more than max_pixels in
+    total (texts larger than max_pixels are never cached, they are drawn char by char). The cache
+    is cleared whenever the render backend changes (surfaces cannot be shared between backends).
+
+    Attributes:
+        max_entries - maximum number of texts kept in the cache
+        max_pixels - maximum number of pixels of all surfaces kept in the cache
+        entries - pre-rendered texts (along with their fragments and transparency colors) by texts
+                  and styles (ordered from the least to the most recently drawn)
+        pixels - number of pixels of all surfaces kept in the cache
+        backend - render backend the texts have been pre-rendered with
+    """
+
+    def __init__(self, max_entries: int, max_pixels: int) -> None:
+        self.max_entries = max_entries
+        self.max_pixels = max_pixels
+        self.entries: "OrderedDict[Tuple[str, TextStyle], TextCacheEntry]" = OrderedDict()
+        self.pixels = 0
+        self.backend: Optional[RenderBackend] = None
+
+    def draw(self, position: Point, text: str, style: TextStyle) -> None:
+        """Draw given text at specified position with defined text style (pre-rendering it first
+        if it's not in the cache yet).
+
+        :param position: position of text to be drawn at
+        :param text: text to be drawn
+        :param style: style of text to be drawn with
+        """
+        backend = get_backend()
+        if backend is not self.backend:
+            self.clear()
+            self.backend = backend
+
+        key = (text, style)
+        entry = self.entries.get(key)
+        if entry:
+            self.entries.move_to_end(key)
         else:
-            if style.shadow_color is not None:
-                pyxel.text(x + 1, y + 1, char, style.shadow_color)
-            pyxel.text(x, y, char, current_color)
-            x += pyxel.FONT_WIDTH
+            entry = self._prerender(backend, text, style)
+            if not entry:
+                for glyph in layout_text(text, style).glyphs:
+                    backend.text(position.x + glyph.x, position.y + glyph.y, glyph.char,
+                                 glyph.color)
+                return
+            self.entries[key] = entry
+            self.pixels += entry[0].width * entry[0].height
+            while len(self.entries) > self.max_entries or self.pixels > self.max_pixels:
+                evicted_image = self.entries.popitem(last=False)[1][0]
+                self.pixels -= evicted_image.width * evicted_image.height
+
+        image, uv, transparency_color = entry
+        backend.blt(position.x, position.y, image, uv, transparency_color)
+
+    def clear(self) -> None:
+        """Remove all pre-rendered texts from the cache."""
+        self.entries.clear()
+        self.pixels = 0
+
+    def _prerender(self, backend: RenderBackend, text: str,
+                   style: TextStyle) -> Optional[TextCacheEntry]:
+        glyphs = list(layout_text(text, style).glyphs)
+        unused_colors = set(range(NUM_COLORS)).difference(glyph.color for glyph in glyphs)
+        width = max((glyph.x for glyph in glyphs), default=0) + pyxel.FONT_WIDTH
+        height = max((glyph.y for glyph in glyphs), default=0) + pyxel.FONT_HEIGHT
+        if not unused_colors or width * height > self.max_pixels:
+            return None
+
+        transparency_color = min(unused_colors)
+        image = backend.create_surface(width, height)
+        image.cls(transparency_color)
+        for glyph in glyphs:
+            image.text(glyph.x, glyph.y, glyph.char, glyph.color)
+        return image, (0, 0, image.width, image.height), transparency_color
+
+
+TEXT_CACHE = TextCache(max_entries=TEXT_CACHE_SIZE, max_pixels=TEXT_CACHE_MAX_PIXELS)
@@ -1,30 +1,9 @@
 """Module for handling tilemaps."""
 from dataclasses import dataclass
-from typing import Generator
+from typing import Generator, Tuple
 
-import pyxel
-
-from bansoko.graphics import Rect, Direction, Point, Layer, TILE_SIZE, TILEMAP_WIDTH
-
-
-@dataclass(frozen=True)
-class TilePosition:
-    """Position of tile in tilemap space."""
-    tile_x: int = 0
-    tile_y: int = 0
-
-    def move(self, direction: Direction) -> "TilePosition":
-        """Create tile position that is a result of moving this tile position in specified
-        direction by one tile.
-
-        :param direction: direction to move tile position in
-        :return: newly created tile position
-        """
-        return TilePosition(self.tile_x + direction.dx, self.tile_y + direction.dy)
-
-    def to_point(self) -> Point:
-        """Convert tile position to a point in screen space."""
-        return Point(self.tile_x * TILE_SIZE, self.tile_y * TILE_SIZE)
+from bansoko.graphics import Rect, Layer, TilePosition, TILE_SIZE, TILEMAP_WIDTH
+from bansoko.graphics.backend import get_backend, Surface
 
 
 @dataclass(frozen=True)
@@ -63,15 +42,15 @@ class Tilemap:
         :return: index of tile at given position
         """
 
-        tile_x, tile_y = pyxel.tilemap(self.tilemap_id).pget(
-            self.rect_uv.x + position.tile_x, self.rect_uv.y + position.tile_y)
+        tile_x, tile_y = get_backend().tile_at(
+            self.tilemap_id, self.rect_uv.x + position.tile_x, self.rect_uv.y + position.tile_y)
 
         return tile_x + tile_y * TILEMAP_WIDTH // TILE_SIZE
 
     def tiles_positions(self) -> Generator[TilePosition, None, None]:
         """Generator for iterating over all valid tile positions for this tilemap."""
         for i in range(self.width * self.height):
-            yield TilePosition(i % self.width, i // self.width)
+            yield TilePosition.at(i % self.width, i // self.width)
 
     def draw(self, layer: Layer) -> None:
         """Draw tilemap on given layer.
@@ -81,7 +60,53 @@ class Tilemap:
         if layer and layer.layer_index >= self.num_layers:
             return
 
-        pyxel.bltm(layer.offset.x, layer.offset.y, self.tilemap_id + layer.layer_index,
-                   self.rect_uv.x * TILE_SIZE, self.rect_uv.y * TILE_SIZE,
-                   self.rect_uv.w * TILE_SIZE, self.rect_uv.h * TILE_SIZE,
-                   colkey=layer.transparency_color)
+        get_backend().bltm(layer.offset.x, layer.offset.y, self.tilemap_id + layer.layer_index,
+                           self.uv, layer.transparency_color)
+
+    @property
+    def uv(self) -> Tuple[int, int, int, int]:
+        """Fragment of Pyxel's mega-tilemap covered by the tilemap (expressed in pixels)."""
+        return (self.rect_uv.x * TILE_SIZE, self.rect_uv.y * TILE_SIZE,
+                self.rect_uv.w * TILE_SIZE, self.rect_uv.h * TILE_SIZE)
+
+
+@dataclass(frozen=True)
+class PrerenderedTilemap:
+    """Tilemap with all its layers pre-rendered into offscreen surfaces (one surface per layer).
+
+    Drawing a pre-rendered layer takes a single blit of the cached surface instead of drawing the
+    tilemap tile by tile, so it's meant for tilemaps that do not change (like level layouts).
+
+    Attributes:
+        tilemap - the pre-rendered tilemap
+        images - offscreen surfaces containing pre-rendered layers of the tilemap
+    """
+    tilemap: Tilemap
+    images: Tuple[Surface, ...]
+
+    @classmethod
+    def from_tilemap(cls, tilemap: Tilemap) -> "PrerenderedTilemap":
+        """Pre-render all layers of given tilemap into offscreen images.
+
+        :param tilemap: tilemap to be pre-rendered
+        :return: newly created pre-rendered tilemap
+        """
+        backend = get_backend()
+        images = []
+        for layer_index in range(tilemap.num_layers):
+            image = backend.create_surface(tilemap.width * TILE_SIZE, tilemap.height * TILE_SIZE)
+            image.bltm(0, 0, tilemap.tilemap_id + layer_index, tilemap.uv)
+            images.append(image)
+        return cls(tilemap=tilemap, images=tuple(images))
+
+    def draw(self, layer: Layer) -> None:
+        """Draw pre-rendered tilemap on given layer.
+
+        :param layer: layer to draw tilemap on
+        """
+        if layer.layer_index >= len(self.images):
+            return
+
+        image = self.images[layer.layer_index]
+        get_backend().blt(layer.offset.x, layer.offset.y, image, (0, 0, image.width, image.height),
+                          layer.transparency_color)
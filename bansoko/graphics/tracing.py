@@ -0,0 +1,140 @@
+"""Module exposing draw calls tracing.
+
+TracingBackend wraps a render backend and records every call made on the screen (which, for the
+default backend, is every call of Pyxel's drawing API made on the screen: blt, bltm, text, rect,
+rectb, cls, line, clip and tilemap's pget). Calls are aggregated by call site and can be exported
+as Chrome trace JSON (which can be opened in chrome://tracing or https://ui.perfetto.dev).
+"""
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from bansoko.graphics.backend import RenderBackend, Surface
+from bansoko.graphics.instrumentation import InstrumentedBackend
+
+MAX_TRACE_EVENTS = 1_000_000
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class CallSiteStats:
+    """Statistics of calls made from a single call site.
+
+    Attributes:
+        calls - number of calls
+        pixels - number of pixels touched by the calls
+        time_in_ms - time spent in the calls (in ms)
+    """
+    calls: int = 0
+    pixels: int = 0
+    time_in_ms: float = 0.0
+
+
+class TracingBackend(InstrumentedBackend):
+    """Render backend recording calls made on the screen.
+
+    Each call is recorded with its call site (the place it was called from, other render backends
+    wrapping this one are skipped), the number of pixels it touched and time spent in it. Tracing
+    can be switched on and off at any time (see enabled property). Calls made on offscreen surfaces
+    are not recorded (see InstrumentedBackend).
+
+    Attributes:
+        stats - statistics of calls (by call name and call site)
+        events - recorded trace events (in Chrome trace format)
+        call_sites - names of call sites (by code object and line number)
+        backend_codes - is code object a method of a surface (by code object)
+        start_time - time the tracing started at (as returned by time.perf_counter)
+    """
+
+    def __init__(self, backend: RenderBackend, enabled: bool = True) -> None:
+        super().__init__(backend, enabled)
+        self.stats: Dict[Tuple[str, str], CallSiteStats] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.call_sites: Dict[Tuple[CodeType, int], str] = {}
+        self.backend_codes: Dict[CodeType, bool] = {}
+        self.start_time = time.perf_counter()
+
+    def traced(self, name: str, func: F) -> F:
+        """Wrap given function, so its calls are recorded as trace events (when tracing is on).
+
+        It can be used to put draw calls in the context of the game loop (for example, by tracing
+        update and draw callbacks of each frame).
+
+        :param name: name of trace events
+        :param func: function to be traced
+        :return: wrapped function
+        """
+        def traced_func(*args: Any, **kwargs: Any) -> Any:
+            if not self._enabled:
+                return func(*args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add_event(name, "frame", start_time, time.perf_counter(), {})
+
+        return traced_func  # type: ignore
+
+    def export_chrome_trace(self, filename: str) -> None:
+        """Write recorded trace events to a file in Chrome trace format.
+
+        :param filename: name of the file trace events are written to
+        """
+        trace = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+        Path(filename).write_text(json.dumps(trace), encoding="utf-8")
+
+    def report(self) -> List[str]:
+        """Describe statistics of calls (call sites that took most time first).
+
+        :return: lines of the report
+        """
+        lines = [f"{'Call':<8} {'Call site':<48} {'Calls':>8} {'Pixels':>11} {'Time [ms]':>10}"]
+        for (name, call_site), stats in sorted(self.stats.items(),
+                                               key=lambda item: -item[1].time_in_ms):
+            lines.append(f"{name:<8} {call_site:<48} {stats.calls:>8} {stats.pixels:>11} "
+                         f"{stats.time_in_ms:>10.2f}")
+        return lines
+
+    def on_call(self, name: str, start_time: float, pixels: int) -> None:
+        end_time = time.perf_counter()
+        call_site = self._find_call_site()
+        stats = self.stats.get((name, call_site))
+        if stats is None:
+            stats = self.stats[(name, call_site)] = CallSiteStats()
+        stats.calls += 1
+        stats.pixels += pixels
+        stats.time_in_ms += (end_time - start_time) * 1_000
+        self._add_event(name, "draw", start_time, end_time,
+                        {"call_site": call_site, "pixels": pixels})
+
+    def _find_call_site(self) -> str:
+        # Frame of the caller of instrumented method (skipping backends wrapping this one)
+        caller = sys._getframe(3)  # pylint: disable=protected-access
+        while caller.f_back and self._is_backend_code(caller):
+            caller = caller.f_back
+        code, line_number = caller.f_code, caller.f_lineno
+        call_site = self.call_sites.get((code, line_number))
+        if call_site is None:
+            call_site = f"{Path(code.co_filename).name}:{line_number} ({code.co_name})"
+            self.call_sites[(code, line_number)] = call_site
+        return call_site
+
+    def _is_backend_code(self, frame: FrameType) -> bool:
+        is_backend_code = self.backend_codes.get(frame.f_code)
+        if is_backend_code is None:
+            is_backend_code = isinstance(frame.f_locals.get("self"), Surface)
+            self.backend_codes[frame.f_code] = is_backend_code
+        return is_backend_code
+
+    def _add_event(self, name: str, category: str, start_time: float, end_time: float,
+                   args: Dict[str, Any]) -> None:
+        if len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append({
+                "name": name, "cat": category, "ph": "X", "pid": 0, "tid": 0,
+                "ts": (start_time - self.start_time) * 1_000_000,
+                "dur": (end_time - start_time) * 1_000_000, "args": args})
@@ -1,9 +1,19 @@
-"""Module exposing basic system for input handling."""
+"""Module exposing basic system for input handling.
+
+The state of virtual buttons is polled once per frame from the current input source (see
+use_input_source), so the input can be either read from Pyxel (which is the default) or fed by
+any other source (for example, replayed from a recording).
+"""
+import abc
+from contextlib import contextmanager
+from dataclasses import dataclass
 from enum import unique, IntFlag
-from typing import Dict, List, Set
+from typing import ClassVar, Dict, Iterator, List, Set
 
 import pyxel
 
+NUM_VIRTUAL_BUTTONS = 12
+
 
 @unique
 class VirtualButton(IntFlag):
@@ -23,11 +33,62 @@ class VirtualButton(IntFlag):
     PAGE_DOWN = 0x800
 
 
+NO_BUTTONS = VirtualButton(0)
+
+
+@dataclass(frozen=True)
+class InputState:
+    """State of all virtual buttons in a single frame.
+
+    Attributes:
+        down - virtual buttons that are down (at least one of their keys is down)
+        pressed - virtual buttons that have been pressed in the frame (at least one of their keys
+                  went down in the frame)
+        suppressed - are virtual buttons suppressed (when ALT key, used by Pyxel's shortcuts,
+                     is down)
+    """
+    down: VirtualButton = NO_BUTTONS
+    pressed: VirtualButton = NO_BUTTONS
+    suppressed: bool = False
+
+    @property
+    def code(self) -> int:
+        """Encoding of the state as a single integer (see from_code)."""
+        return int(self.down) | int(self.pressed) << NUM_VIRTUAL_BUTTONS \
+            | int(self.suppressed) << 2 * NUM_VIRTUAL_BUTTONS
+
+    @staticmethod
+    def from_code(code: int) -> "InputState":
+        """Decode the state from its single integer encoding.
+
+        :param code: encoded state (as returned by code property)
+        :return: decoded state
+        """
+        buttons_mask = (1 << NUM_VIRTUAL_BUTTONS) - 1
+        return InputState(down=VirtualButton(code & buttons_mask),
+                          pressed=VirtualButton(code >> NUM_VIRTUAL_BUTTONS & buttons_mask),
+                          suppressed=bool(code >> 2 * NUM_VIRTUAL_BUTTONS & 1))
+
+
 class InputSystem:
     """InputSystem is a wrapper around Pyxel's input handling.
 
     It operates on VirtualButton which is an abstraction over physical buttons.
-    InputSystem needs to be updated by calling update() method in each frame.
+    The state of virtual buttons is shared by all input systems and it has to be polled once per
+    frame by calling poll() method. Additionally, each InputSystem needs to be updated by calling
+    update() method in each frame it's used in. Update computes bitmasks of virtual buttons once,
+    so testing the button is just a single bit test. Bitmasks are plain integers (bitwise
+    operations on IntFlag are an order of magnitude slower).
+
+    Attributes:
+        hold_times - number of update frames virtual buttons (bits) have been held down for
+        held_buttons - bitmask of virtual buttons held down since they have been pressed (buttons
+                       which were down before the last reset are not held until they are released)
+        down_buttons - bitmask of virtual buttons which are down in current update frame
+        just_pressed_buttons - bitmask of virtual buttons which have just been pressed in current
+                               update frame
+        pressed_buttons - bitmask of virtual buttons which are "pressed" (see is_button_pressed)
+                          in current update frame
     """
 
     KEY_HOLD_TIME: int = 10
@@ -48,10 +109,23 @@ class InputSystem:
     }
     WATCHED_KEYS: Set[int] = set(sum(BUTTONS_MAP.values(), []))
 
-    pressed_keys: Dict[int, int]
+    state: ClassVar[InputState] = InputState()
+    hold_times: Dict[int, int]
+    held_buttons: int
+    down_buttons: int
+    just_pressed_buttons: int
+    pressed_buttons: int
 
     def __init__(self) -> None:
-        self.pressed_keys = {}
+        self.reset()
+
+    @classmethod
+    def poll(cls) -> None:
+        """Poll the state of virtual buttons from current input source (see use_input_source).
+
+        This needs to be called once per frame, before any of input systems is updated.
+        """
+        cls.state = get_input_source().poll()
 
     def is_button_pressed(self, button: VirtualButton) -> bool:
         """Test if given virtual button is "pressed".
@@ -67,7 +141,18 @@ class InputSystem:
         :param button: virtual button to be tested
         :return: True - if button was pressed *OR* False - otherwise
         """
-        return any(self._is_key_pressed(key) for key in self.BUTTONS_MAP[button])
+        return self.pressed_buttons & int(button) != 0
+
+    def is_button_just_pressed(self, button: VirtualButton) -> bool:
+        """Test if given virtual button has just been pressed (it was up in previous update frame
+        and now it's down).
+
+        Unlike is_button_pressed, it does not take key repeats into account.
+
+        :param button: virtual button to be tested
+        :return: True - if button has just been pressed *OR* False - otherwise
+        """
+        return self.just_pressed_buttons & int(button) != 0
 
     def is_button_down(self, button: VirtualButton) -> bool:
         """Test if given virtual button is down at the current update frame.
@@ -75,7 +160,15 @@ class InputSystem:
         :param button: virtual button to be tested
         :return: True - if button is down in current update frame *OR* False - otherwise
         """
-        return any(self._is_key_down(key) for key in self.BUTTONS_MAP[button])
+        return self.down_buttons & int(button) != 0
+
+    @classmethod
+    def is_any_key_down(cls) -> bool:
+        """Test if any of watched keys is down (regardless of the state of input systems).
+
+        :return: True - if any key mapped to virtual buttons is down *OR* False - otherwise
+        """
+        return cls.state.down != NO_BUTTONS
 
     def is_button_up(self, button: VirtualButton) -> bool:
         """Test if given virtual button is up at the current update frame.
@@ -83,50 +176,98 @@ class InputSystem:
         :param button: virtual button to be tested
         :return: True - if button is up in current update frame *OR* False - otherwise
         """
-        return not self.is_button_down(button)
+        return self.down_buttons & int(button) == 0
 
     def update(self) -> None:
-        """Update statuses of all watched keys.
+        """Update statuses of all virtual buttons.
 
         This needs to be called each frame.
         """
-        for key in self.WATCHED_KEYS:
-            if pyxel.btn(key):
-                if key not in self.pressed_keys and not pyxel.btnp(key):
-                    return
-                self._press_key(key)
-            else:
-                self._depress_key(key)
+        state = self.state
+        held_buttons = int(state.down) & (self.held_buttons | int(state.pressed))
+        just_pressed_buttons = held_buttons & ~self.held_buttons
+        pressed_buttons = just_pressed_buttons
+        if self.hold_times or held_buttons:
+            hold_times = {}
+            remaining_buttons = held_buttons
+            while remaining_buttons:
+                button = remaining_buttons & -remaining_buttons
+                remaining_buttons ^= button
+                hold_time = self.hold_times.get(button, -1) + 1
+                hold_times[button] = hold_time
+                if hold_time >= self.KEY_HOLD_TIME \
+                        and (hold_time - self.KEY_HOLD_TIME) % self.KEY_PERIOD_TIME == 0:
+                    pressed_buttons |= button
+            self.hold_times = hold_times
+
+        self.held_buttons = held_buttons
+        if state.suppressed:
+            self.down_buttons = self.just_pressed_buttons = self.pressed_buttons = 0
+        else:
+            self.down_buttons = held_buttons
+            self.just_pressed_buttons = just_pressed_buttons
+            self.pressed_buttons = pressed_buttons
 
     def reset(self) -> None:
-        """Reset the statuses of all watched keys.
+        """Reset the statuses of all virtual buttons.
 
         This should be called when focus switches to another screen.
         """
-        self.pressed_keys.clear()
-
-    def _is_key_pressed(self, key: int) -> bool:
-        if pyxel.btn(pyxel.KEY_ALT):
-            return False
-        if key not in self.pressed_keys:
-            return False
-        hold_time = self.pressed_keys[key]
-        if hold_time == 0:
-            return True
-        if hold_time < self.KEY_HOLD_TIME:
-            return False
-        if (hold_time - self.KEY_HOLD_TIME) % self.KEY_PERIOD_TIME == 0:
-            return True
-        return False
-
-    def _is_key_down(self, key: int) -> bool:
-        if pyxel.btn(pyxel.KEY_ALT):
-            return False
-        return key in self.pressed_keys
-
-    def _press_key(self, key: int) -> None:
-        self.pressed_keys[key] = self.pressed_keys.get(key, -1) + 1
-
-    def _depress_key(self, key: int) -> None:
-        if key in self.pressed_keys:
-            del self.pressed_keys[key]
+        self.hold_times = {}
+        self.held_buttons = 0
+        self.down_buttons = 0
+        self.just_pressed_buttons = 0
+        self.pressed_buttons = 0
+
+
+class InputSource(abc.ABC):
+    """InputSource is an abstract source of the state of virtual buttons."""
+
+    @abc.abstractmethod
+    def poll(self) -> InputState:
+        """Poll the state of virtual buttons in a new frame.
+
+        :return: state of virtual buttons
+        """
+
+    def close(self) -> None:
+        """Release all resources held by the source (it's called before the game exits)."""
+
+
+class PyxelInputSource(InputSource):
+    """Input source reading the state of keys (and gamepad buttons) from Pyxel."""
+
+    def poll(self) -> InputState:
+        down = pressed = 0
+        for button, keys in InputSystem.BUTTONS_MAP.items():
+            for key in keys:
+                if pyxel.btn(key):
+                    down |= int(button)
+                    if pyxel.btnp(key):
+                        pressed |= int(button)
+        return InputState(VirtualButton(down), VirtualButton(pressed),
+                          bool(pyxel.btn(pyxel.KEY_ALT)))
+
+
+# Input sources stack (the top one is polled, see use_input_source)
+_INPUT_SOURCES: List[InputSource] = [PyxelInputSource()]
+
+
+def get_input_source() -> InputSource:
+    """Return the input source currently used for polling the state of virtual buttons."""
+    return _INPUT_SOURCES[-1]
+
+
+@contextmanager
+def use_input_source(input_source: InputSource) -> Iterator[InputSource]:
+    """Context manager for polling the state of virtual buttons from given input source (instead
+    of the current one).
+
+    :param input_source: input source to be used within the context
+    :return: given input source
+    """
+    _INPUT_SOURCES.append(input_source)
+    try:
+        yield input_source
+    finally:
+        _INPUT_SOURCES.pop()
@@ -16,6 +16,22 @@ class ScreenController(abc.ABC):
     def __init__(self, semi_transparent: Optional[bool] = False) -> None:
         self.semi_transparent = semi_transparent
 
+    @property
+    def is_animating(self) -> bool:
+        """Value indicating whether the screen changes even when there is no input (for example
+        because of running animations or timers).
+
+        Screens that are not animating can be throttled by ScreenNavigator when they are idle.
+        """
+        return False
+
+    def invalidate(self) -> None:
+        """Force the screen to be fully redrawn in the next frame.
+
+        Called when something else has been drawn over the screen (for example by a debug overlay).
+        Screens that are fully redrawn in each frame don't need to do anything.
+        """
+
     @abc.abstractmethod
     def activate(self) -> None:
         """Called each time screen controller is put on top of screen stack by ScreenNavigator."""
@@ -67,6 +83,63 @@ class BaseScreenController(ScreenController):
             self.screen.draw()
 
 
+class FrameRateGovernor:
+    """FrameRateGovernor throttles the game when nothing happens on the screen.
+
+    Frame is quiet when there is no input, the active screen controller is not animating and there
+    are no screen transitions. After IDLE_AFTER_FRAMES quiet frames in a row the game becomes
+    idle: drawing is skipped (so the last drawn frame stays on the screen) and the active screen
+    controller is updated only once per IDLE_UPDATE_INTERVAL frames (with the time of all frames
+    since its last update, so its timers keep up with the wall time). Any input wakes the game up
+    immediately.
+
+    Attributes:
+        quiet_frames - number of quiet frames in a row
+        skipped_updates - number of updates skipped since the last update (when idle)
+        elapsed_frames - number of frames since the last update (including current one)
+        input_detected - was there any input in current frame
+    """
+
+    IDLE_AFTER_FRAMES: int = 30
+    IDLE_UPDATE_INTERVAL: int = 10
+
+    def __init__(self) -> None:
+        self.quiet_frames = 0
+        self.skipped_updates = 0
+        self.elapsed_frames = 1
+        self.input_detected = False
+
+    @property
+    def is_idle(self) -> bool:
+        """Value indicating whether the game is idle (so it can be throttled)."""
+        return self.quiet_frames >= self.IDLE_AFTER_FRAMES
+
+    def should_update(self) -> bool:
+        """Check whether the active screen controller should be updated in current frame.
+
+        Called at the beginning of each frame (any input wakes the game up immediately).
+
+        :return: True - if screen controller should be updated *OR* False - if update should be
+                 skipped (as the game is idle)
+        """
+        self.input_detected = InputSystem.is_any_key_down()
+        if self.input_detected:
+            self.quiet_frames = 0
+        if not self.is_idle or self.skipped_updates + 1 >= self.IDLE_UPDATE_INTERVAL:
+            self.elapsed_frames = self.skipped_updates + 1
+            self.skipped_updates = 0
+            return True
+        self.skipped_updates += 1
+        return False
+
+    def end_frame(self, quiet: bool) -> None:
+        """Count the frame in (called after each update of the active screen controller).
+
+        :param quiet: was the frame quiet (no screen transitions and no animations)
+        """
+        self.quiet_frames = self.quiet_frames + 1 if quiet and not self.input_detected else 0
+
+
 class ScreenNavigator:
     """ScreenNavigator manages game screen controllers.
 
@@ -79,6 +152,9 @@ class ScreenNavigator:
           from the stack and then new controller from top will be activated)
     Switching between screen controllers is controlled by update() callback from ScreenController
     class.
+    The state of virtual buttons (shared by all screen controllers) is polled at the beginning of
+    each frame. When nothing happens on the screen, the navigator is throttled by
+    FrameRateGovernor.
     """
 
     def __init__(self, start_controller: ScreenController, exit_callback: Callable[[], None],
@@ -87,21 +163,28 @@ class ScreenNavigator:
         self.exit_callback = exit_callback
         self.frame_time = frame_time
         self.skip_next_draw = False
+        self.governor = FrameRateGovernor()
         start_controller.activate()
 
     def update(self) -> None:
         """Update screen controller from top of controllers stack. Manage screen transitions."""
+        InputSystem.poll()
         if self.controllers_stack:
-            new_screen = self.controllers_stack[-1].update(self.frame_time)
-            if not isinstance(new_screen, type(self.controllers_stack[-1])):
+            if not self.governor.should_update():
+                return
+            active_controller = self.controllers_stack[-1]
+            new_screen = self._update_controller(active_controller)
+            transition = not isinstance(new_screen, type(active_controller))
+            if transition:
                 self._switch_to_screen(new_screen)
+            self.governor.end_frame(quiet=not transition and not active_controller.is_animating)
         else:
             self.exit_callback()
             self.skip_next_draw = True
 
     def draw(self) -> None:
-        """Draw screen controller from top of controllers stack."""
-        if not self.skip_next_draw:
+        """Draw screen controller from top of controllers stack (unless the game is idle)."""
+        if not self.skip_next_draw and not self.governor.is_idle:
             screens_to_be_drawn: List[ScreenController] = []
             for screen in reversed(self.controllers_stack):
                 screens_to_be_drawn.insert(0, screen)
@@ -110,9 +193,15 @@ class ScreenNavigator:
 
             for (i, screen) in enumerate(screens_to_be_drawn):
                 is_top_screen = i == len(screens_to_be_drawn) - 1
-                screen.draw(draw_as_secondary=not is_top_screen)
+                self._draw_screen(screen, draw_as_secondary=not is_top_screen)
         self.skip_next_draw = False
 
+    def _update_controller(self, controller: ScreenController) -> Optional[ScreenController]:
+        return controller.update(self.frame_time * self.governor.elapsed_frames)
+
+    def _draw_screen(self, screen: ScreenController, draw_as_secondary: bool) -> None:
+        screen.draw(draw_as_secondary=draw_as_secondary)
+
     def _switch_to_screen(self, new_screen: Optional[ScreenController]) -> None:
         if new_screen is None:
             self.controllers_stack.pop()
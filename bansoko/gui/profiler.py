@@ -0,0 +1,299 @@
+"""Module exposing frame profiler for measuring how long screen controllers take to update and draw
+(and how many draw calls they make on the screen).
+
+Profiling is enabled by using ProfilingScreenNavigator instead of ScreenNavigator. Metrics are
+displayed in an overlay (toggled with OVERLAY_TOGGLE_KEY) and their percentiles can be logged.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pyxel
+
+from bansoko.graphics import Rect
+from bansoko.graphics.backend import RenderBackend, get_backend, use_backend
+from bansoko.graphics.instrumentation import InstrumentedBackend
+from bansoko.gui.navigator import ScreenNavigator, ScreenController
+
+COUNTED_DRAW_CALLS = ("blt", "bltm", "text")
+LOGGED_PERCENTILES = (50, 95, 99)
+OVERLAY_TOGGLE_KEY = pyxel.KEY_F3
+OVERLAY_POSITION = (1, 1)
+OVERLAY_BACKGROUND_COLOR = 0
+OVERLAY_HEADER_COLOR = 10
+OVERLAY_TEXT_COLOR = 7
+OVERLAY_OVER_BUDGET_COLOR = 8
+
+
+class Histogram:
+    """Histogram of samples with buckets of fixed width (it takes constant memory no matter how
+    many samples are added).
+
+    Samples exceeding the range of buckets are put into the last bucket. Percentiles are
+    approximated by the upper bound of the bucket they fall into.
+
+    Attributes:
+        bucket_width - width of a single bucket
+        buckets - number of samples in each bucket
+        count - number of all samples
+        max_value - the biggest sample
+    """
+
+    def __init__(self, bucket_width: float, num_buckets: int) -> None:
+        self.bucket_width = bucket_width
+        self.buckets = [0] * num_buckets
+        self.count = 0
+        self.max_value = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a sample to the histogram.
+
+        :param value: sample to be added (non-negative)
+        """
+        self.buckets[min(int(value / self.bucket_width), len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.max_value = max(self.max_value, value)
+
+    def percentile(self, percent: float) -> float:
+        """Approximate given percentile of samples (using the nearest-rank method).
+
+        :param percent: percentile to be approximated (0 - 100)
+        :return: upper bound of the bucket the percentile falls into (but not more than the biggest
+                 sample, which is also returned for the last bucket) *OR* 0 - if there are no
+                 samples
+        """
+        rank = max(1, -(-self.count * percent // 100))
+        samples_so_far = 0
+        for i, num_samples in enumerate(self.buckets):
+            samples_so_far += num_samples
+            if samples_so_far >= rank:
+                if i == len(self.buckets) - 1:
+                    return self.max_value
+                return min((i + 1) * self.bucket_width, self.max_value)
+        return 0.0
+
+    def describe(self) -> str:
+        """Describe samples with logged percentiles and the biggest sample."""
+        percentiles = ", ".join(f"p{percent} {self.percentile(percent):.1f}"
+                                for percent in LOGGED_PERCENTILES)
+        return f"{percentiles}, max {self.max_value:.1f}"
+
+
+def _time_histogram() -> Histogram:
+    # 0.1 ms resolution, up to 200 ms
+    return Histogram(0.1, 2_000)
+
+
+def _calls_histogram() -> Histogram:
+    return Histogram(1, 2_048)
+
+
+@dataclass
+class FrameSample:
+    """Metrics of a screen controller measured in a single frame.
+
+    Attributes:
+        update_time - time spent on updating the screen controller (in ms)
+        draw_time - time spent on drawing the screen (in ms)
+        draw_calls - number of draw calls made on the screen while drawing it (by draw call name)
+    """
+    update_time: float = 0.0
+    draw_time: float = 0.0
+    draw_calls: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTED_DRAW_CALLS, 0))
+
+
+@dataclass
+class ScreenMetrics:
+    """Histograms of metrics of a screen controller collected in all frames it was profiled in.
+
+    Attributes:
+        frames - number of frames the screen controller was updated or drawn in
+        frames_over_budget - number of frames that took longer than a frame time while the screen
+                             controller was active
+        frame_time - histogram of time of whole frames (when the screen controller was active)
+        update_time - histogram of time spent on updating the screen controller
+        draw_time - histogram of time spent on drawing the screen
+        draw_calls - histograms of number of draw calls made on the screen (by draw call name)
+    """
+    frames: int = 0
+    frames_over_budget: int = 0
+    frame_time: Histogram = field(default_factory=_time_histogram)
+    update_time: Histogram = field(default_factory=_time_histogram)
+    draw_time: Histogram = field(default_factory=_time_histogram)
+    draw_calls: Dict[str, Histogram] = field(
+        default_factory=lambda: {name: _calls_histogram() for name in COUNTED_DRAW_CALLS})
+
+    def add(self, sample: FrameSample) -> None:
+        """Add metrics measured in a single frame.
+
+        :param sample: metrics of the screen controller measured in the frame
+        """
+        self.frames += 1
+        self.update_time.add(sample.update_time)
+        self.draw_time.add(sample.draw_time)
+        for name, calls in sample.draw_calls.items():
+            self.draw_calls[name].add(calls)
+
+
+class DrawCallCounter(InstrumentedBackend):
+    """Render backend counting blt, bltm and text calls made on the screen.
+
+    Draw calls made on offscreen surfaces (like cached texts or pre-rendered tilemaps) are not
+    counted, only blits of such surfaces to the screen are.
+
+    Attributes:
+        counts - number of draw calls made since the last reset (by draw call name)
+    """
+
+    def __init__(self, backend: RenderBackend) -> None:
+        super().__init__(backend)
+        self.counts = dict.fromkeys(COUNTED_DRAW_CALLS, 0)
+
+    def reset(self) -> Dict[str, int]:
+        """Start counting draw calls from zero.
+
+        :return: number of draw calls made since the last reset (by draw call name)
+        """
+        counts = self.counts
+        self.counts = dict.fromkeys(COUNTED_DRAW_CALLS, 0)
+        return counts
+
+    def on_call(self, name: str, start_time: float, pixels: int) -> None:
+        if name in self.counts:
+            self.counts[name] += 1
+
+
+class ProfilingScreenNavigator(ScreenNavigator):
+    """ScreenNavigator measuring update time, draw time and number of draw calls of screen
+    controllers in every frame.
+
+    Metrics are broken down per screen controller type: update is accounted to the active screen
+    controller, drawing is accounted to each drawn screen (so secondary screens are accounted
+    separately). Frames in which the game was idle (see FrameRateGovernor) are not taken into
+    account.
+    Metrics of the last frame are displayed in an overlay, which is toggled with
+    OVERLAY_TOGGLE_KEY. Draw calls are the ones made on the screen only (see DrawCallCounter).
+
+    Attributes:
+        metrics - histograms of metrics collected so far (by screen controller type name)
+        frame_samples - metrics measured in current frame (by screen controller type name)
+        active_screen - type name of screen controller that was active in current frame
+        draw_call_counter - backend counting draw calls made on the screen
+        overlay_visible - is the overlay displayed
+        overlay_lines - lines of text displayed in the overlay (with their colors)
+        overlay_rect - rectangle of the screen covered by the overlay (None if it's not drawn)
+    """
+
+    def __init__(self, start_controller: ScreenController, exit_callback: Callable[[], None],
+                 frame_time: float):
+        self.metrics: Dict[str, ScreenMetrics] = {}
+        self.frame_samples: Dict[str, FrameSample] = {}
+        self.active_screen: Optional[str] = None
+        self.draw_call_counter = DrawCallCounter(get_backend())
+        self.overlay_visible = False
+        self.overlay_lines: List[Tuple[str, int]] = []
+        self.overlay_rect: Optional[Rect] = None
+        super().__init__(start_controller, exit_callback, frame_time)
+
+    def update(self) -> None:
+        if pyxel.btnp(OVERLAY_TOGGLE_KEY):
+            self.overlay_visible = not self.overlay_visible
+            self.governor.quiet_frames = 0
+        super().update()
+
+    def draw(self) -> None:
+        with use_backend(self.draw_call_counter):
+            super().draw()
+        self._end_frame()
+        self._draw_overlay()
+
+    def log_report(self) -> None:
+        """Log percentiles of metrics of all profiled screen controllers."""
+        logging.info("Frame profile (frame budget: %.1f ms)", self.frame_time)
+        for screen_name, metrics in sorted(self.metrics.items()):
+            logging.info("  %s: %d frames (%d over budget)", screen_name, metrics.frames,
+                         metrics.frames_over_budget)
+            logging.info("    frame time [ms]: %s", metrics.frame_time.describe())
+            logging.info("    update time [ms]: %s", metrics.update_time.describe())
+            logging.info("    draw time [ms]: %s", metrics.draw_time.describe())
+            for name, histogram in metrics.draw_calls.items():
+                logging.info("    %s calls on screen: %s", name, histogram.describe())
+
+    def _update_controller(self, controller: ScreenController) -> Optional[ScreenController]:
+        start_time = time.perf_counter()
+        new_screen = super()._update_controller(controller)
+        self.active_screen = type(controller).__name__
+        self._get_frame_sample(self.active_screen).update_time += \
+            (time.perf_counter() - start_time) * 1_000
+        return new_screen
+
+    def _draw_screen(self, screen: ScreenController, draw_as_secondary: bool) -> None:
+        self.draw_call_counter.reset()
+        start_time = time.perf_counter()
+        super()._draw_screen(screen, draw_as_secondary)
+        sample = self._get_frame_sample(type(screen).__name__)
+        sample.draw_time += (time.perf_counter() - start_time) * 1_000
+        for name, calls in self.draw_call_counter.reset().items():
+            sample.draw_calls[name] += calls
+
+    def _get_frame_sample(self, screen_name: str) -> FrameSample:
+        sample = self.frame_samples.get(screen_name)
+        if sample is None:
+            sample = self.frame_samples[screen_name] = FrameSample()
+        return sample
+
+    def _end_frame(self) -> None:
+        if self.governor.is_idle:
+            self.frame_samples = {}
+        if not self.frame_samples:
+            return
+        for screen_name, sample in self.frame_samples.items():
+            self.metrics.setdefault(screen_name, ScreenMetrics()).add(sample)
+        frame_time = sum(sample.update_time + sample.draw_time
+                         for sample in self.frame_samples.values())
+        if self.active_screen:
+            active_metrics = self.metrics.setdefault(self.active_screen, ScreenMetrics())
+            active_metrics.frame_time.add(frame_time)
+            if frame_time > self.frame_time:
+                active_metrics.frames_over_budget += 1
+        self.overlay_lines = self._build_overlay_lines(frame_time)
+        self.frame_samples = {}
+        self.active_screen = None
+
+    def _build_overlay_lines(self, frame_time: float) -> List[Tuple[str, int]]:
+        frame_color = OVERLAY_OVER_BUDGET_COLOR if frame_time > self.frame_time \
+            else OVERLAY_TEXT_COLOR
+        lines = [(f"FRAME {frame_time:6.2f} MS / {self.frame_time:.1f} MS", frame_color),
+                 (f"{'SCREEN':<24} {'UPD':>5} {'DRW':>5} {'BLT':>4} {'BLTM':>4} {'TXT':>4}",
+                  OVERLAY_HEADER_COLOR),
+                 ("(DRAW CALLS ON SCREEN ONLY)", OVERLAY_HEADER_COLOR)]
+        for screen_name, sample in self.frame_samples.items():
+            calls = sample.draw_calls
+            lines.append((f"{screen_name[:24]:<24} {sample.update_time:5.2f} "
+                          f"{sample.draw_time:5.2f} {calls['blt']:4d} {calls['bltm']:4d} "
+                          f"{calls['text']:4d}", OVERLAY_TEXT_COLOR))
+        return lines
+
+    def _draw_overlay(self) -> None:
+        if self.overlay_visible and self.overlay_lines and not self.governor.is_idle:
+            x, y = OVERLAY_POSITION
+            overlay_rect = Rect.from_coords(
+                x, y, max(len(text) for text, _ in self.overlay_lines) * pyxel.FONT_WIDTH + 2,
+                len(self.overlay_lines) * pyxel.FONT_HEIGHT + 2)
+            if self.overlay_rect and self.overlay_rect != overlay_rect:
+                self._invalidate_screens()
+            backend = get_backend()
+            backend.rect(overlay_rect.x, overlay_rect.y, overlay_rect.w, overlay_rect.h,
+                         OVERLAY_BACKGROUND_COLOR)
+            for i, (text, color) in enumerate(self.overlay_lines):
+                backend.text(x + 1, y + 1 + i * pyxel.FONT_HEIGHT, text, color)
+            self.overlay_rect = overlay_rect
+        elif not self.overlay_visible and self.overlay_rect:
+            # Screens which are redrawn partially have to get rid of the overlay
+            self._invalidate_screens()
+            self.overlay_rect = None
+
+    def _invalidate_screens(self) -> None:
+        for screen in self.controllers_stack:
+            screen.invalidate()
@@ -2,9 +2,8 @@
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
-import pyxel
-
 from bansoko.graphics import Point, Layer, Rect
+from bansoko.graphics.backend import get_backend
 from bansoko.graphics.sprite import Sprite
 from bansoko.graphics.text import draw_text
 from bansoko.graphics.tilemap import Tilemap
@@ -43,7 +42,7 @@ class Screen:
         If background color is specified then screen is cleared with that color first.
         """
         if self.background_color is not None:
-            pyxel.cls(self.background_color)
+            get_backend().cls(self.background_color)
         if self.background_tilemap:
             self.background_tilemap.draw(Layer(0))
         if self.elements:
@@ -0,0 +1,4 @@
+"""Module exposing headless solvers of Bansoko levels (does not depend on Pyxel).
+
+Solvers are used by offline tools only, they are not fast enough to be used while the game runs.
+"""
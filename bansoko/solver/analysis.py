@@ -0,0 +1,242 @@
+"""Module exposing static analysis of levels (used for pruning and guiding the search)."""
+from base64 import b64encode, b64decode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
+from itertools import chain
+from typing import Tuple, FrozenSet, Iterable, List, Dict, Any, AbstractSet
+from zlib import compress, decompress, error as ZlibError
+
+from bansoko.game import GameError
+from bansoko.game.tiles import TileGrid, TileFlag
+from bansoko.graphics import Direction, Rect
+
+UNREACHABLE = 0xFF
+MARKED_CELL = "X"
+UNMARKED_CELL = "."
+
+
+@dataclass(frozen=True)
+class LevelAnalysis:
+    """Static analysis of a level, which does not depend on crates positions.
+
+    Cells are identified by their indexes in the tile grid (tile_y * width + tile_x).
+    Distances are measured in pushes needed to move a crate (ignoring other crates).
+
+    Attributes:
+        width - width of the analysed tile grid
+        height - height of the analysed tile grid
+        cargo_bays - cells of all cargo bays (in the order used by goal_distances)
+        dead_squares - walkable cells from which a crate can never be pushed to any cargo bay
+                       ("simple" dead squares)
+        tunnels - walkable cells enclosed by walls from both sides (either horizontally or
+                  vertically), so they can only be passed straight through
+        goal_distances - for each cell, distances from that cell to every cargo bay (UNREACHABLE
+                         if a crate cannot be pushed from the cell to the cargo bay)
+    """
+    width: int
+    height: int
+    cargo_bays: Tuple[int, ...]
+    dead_squares: FrozenSet[int]
+    tunnels: FrozenSet[int]
+    goal_distances: Tuple[Tuple[int, ...], ...]
+
+    @classmethod
+    def from_json(cls, json_data: Any, grid: TileGrid) -> "LevelAnalysis":
+        """Create the analysis of a level from resources metadata (see as_json).
+
+        :param json_data: input JSON containing the analysis of the level
+        :param grid: tile grid of the analysed level
+        :return: analysis of the level
+        """
+        rect = Rect.from_list(json_data["rect"])
+        if rect.x < 0 or rect.y < 0 or rect.x + rect.w > grid.width \
+                or rect.y + rect.h > grid.height:
+            raise GameError("Level analysis does not match the level")
+        cells = _rect_cells(rect, grid.width)
+        dead_squares = _marked_cells(json_data["dead_squares"], cells)
+        reachable_cells = [cell for cell in cells
+                           if grid.cells[cell] & TileFlag.WALKABLE and cell not in dead_squares]
+        cargo_bays = tuple(cargo_bay_cells(grid))
+        try:
+            distances = decompress(b64decode(json_data["goal_distances"], validate=True))
+        except (BinasciiError, ZlibError) as error:
+            raise GameError("Level analysis has malformed goal distances") from error
+        if len(distances) != len(reachable_cells) * len(cargo_bays):
+            raise GameError("Level analysis does not match the level")
+
+        goal_distances = [(UNREACHABLE,) * len(cargo_bays)] * len(grid.cells)
+        for i, cell in enumerate(reachable_cells):
+            goal_distances[cell] = tuple(distances[i * len(cargo_bays):(i + 1) * len(cargo_bays)])
+        return cls(width=grid.width, height=grid.height, cargo_bays=cargo_bays,
+                   dead_squares=dead_squares, tunnels=_marked_cells(json_data["tunnels"], cells),
+                   goal_distances=tuple(goal_distances))
+
+    @property
+    def as_json(self) -> Dict[str, Any]:
+        """The analysis represented as JSON data (as stored in resources metadata file).
+
+        Only the bounding rectangle of analysed (walkable) cells is stored. Dead squares and
+        tunnels are stored as strings of marked cells (row by row). Goal distances are stored
+        only for cells a crate can be pushed from to any cargo bay (cell by cell, distances to all
+        cargo bays for every cell) as zlib compressed and Base64 encoded bytes.
+        """
+        reachable_cells = [cell for cell, distances in enumerate(self.goal_distances)
+                           if min(distances, default=UNREACHABLE) != UNREACHABLE]
+        analysed_cells = reachable_cells + list(self.dead_squares | self.tunnels)
+        rect = Rect.from_coords(0, 0, 0, 0)
+        if analysed_cells:
+            left = min(cell % self.width for cell in analysed_cells)
+            top = min(cell // self.width for cell in analysed_cells)
+            rect = Rect.from_coords(
+                left, top, max(cell % self.width for cell in analysed_cells) - left + 1,
+                max(cell // self.width for cell in analysed_cells) - top + 1)
+        cells = _rect_cells(rect, self.width)
+        distances = bytes(
+            chain.from_iterable(self.goal_distances[cell] for cell in reachable_cells))
+        return {
+            "rect": rect.as_list,
+            "dead_squares": _marked_string(self.dead_squares, cells),
+            "tunnels": _marked_string(self.tunnels, cells),
+            "goal_distances": b64encode(compress(distances, 9)).decode()
+        }
+
+
+def direction_offsets(width: int) -> Tuple[int, ...]:
+    """Offsets between neighbouring cells for all directions (in Direction order).
+
+    :param width: width of the tile grid
+    :return: cell offsets for all directions
+    """
+    return tuple(direction.dx + direction.dy * width for direction in list(Direction))
+
+
+def walkable_cells(grid: TileGrid) -> bytearray:
+    """Create a map of walkable cells of given tile grid.
+
+    :param grid: tile grid to create the map for
+    :return: array with 1 for walkable cells and 0 for all other cells
+    """
+    return bytearray(1 if cell & TileFlag.WALKABLE else 0 for cell in grid.cells)
+
+
+def cargo_bay_cells(grid: TileGrid) -> List[int]:
+    """List all cargo bay cells of given tile grid."""
+    return [i for i, cell in enumerate(grid.cells) if cell & TileFlag.CARGO_BAY]
+
+
+def analyze_level(grid: TileGrid) -> LevelAnalysis:
+    """Perform static analysis of the level described by given tile grid.
+
+    Distances to cargo bays are calculated by "pulling" a crate backwards from each cargo bay
+    (crate can be pulled from cell A to neighbouring cell B only when the cell behind B is
+    walkable, since that's where the robot would stand when pushing it).
+
+    :param grid: tile grid of the level
+    :return: static analysis of the level
+    """
+    walkable = walkable_cells(grid)
+    offsets = direction_offsets(grid.width)
+    cargo_bays = cargo_bay_cells(grid)
+    distances = [pull_distances(walkable, [cargo_bay], offsets) for cargo_bay in cargo_bays]
+    goal_distances = tuple(zip(*distances)) if distances else tuple(() for _ in walkable)
+    dead_squares = frozenset(i for i, is_walkable in enumerate(walkable)
+                             if is_walkable and min(goal_distances[i], default=0) == UNREACHABLE)
+    return LevelAnalysis(width=grid.width, height=grid.height, cargo_bays=tuple(cargo_bays),
+                         dead_squares=dead_squares, tunnels=tunnel_cells(walkable, offsets),
+                         goal_distances=goal_distances)
+
+
+def tunnel_cells(walkable: bytearray, offsets: Tuple[int, ...]) -> FrozenSet[int]:
+    """Find all tunnel cells (walkable cells enclosed by walls from both sides).
+
+    :param walkable: map of walkable cells
+    :param offsets: cell offsets for all directions (in Direction order)
+    :return: all tunnel cells
+    """
+    up_offset, down_offset, left_offset, right_offset = offsets
+    return frozenset(
+        i for i, is_walkable in enumerate(walkable)
+        if is_walkable and (
+            _is_wall(walkable, i + up_offset) and _is_wall(walkable, i + down_offset)
+            or _is_wall(walkable, i + left_offset) and _is_wall(walkable, i + right_offset)))
+
+
+def pull_distances(walkable: bytearray, goals: Iterable[int],
+                   offsets: Tuple[int, ...]) -> bytearray:
+    """Calculate distances (in pushes) from all cells to the nearest of given goals.
+
+    :param walkable: map of walkable cells
+    :param goals: cells crates should be pushed to
+    :param offsets: cell offsets for all directions
+    :return: distances for all cells (UNREACHABLE if crate cannot be pushed to any goal)
+    """
+    size = len(walkable)
+    distances = bytearray([UNREACHABLE]) * size
+    frontier = []
+    for goal in goals:
+        distances[goal] = 0
+        frontier.append(goal)
+
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for cell in frontier:
+            for offset in offsets:
+                pulled_to = cell + offset
+                robot_at = pulled_to + offset
+                if not (0 <= pulled_to < size and 0 <= robot_at < size):
+                    continue
+                if walkable[pulled_to] and walkable[robot_at] \
+                        and distances[pulled_to] == UNREACHABLE:
+                    distances[pulled_to] = min(distance, UNREACHABLE - 1)
+                    next_frontier.append(pulled_to)
+        frontier = next_frontier
+    return distances
+
+
+def walk_distances(walkable: bytearray, start: int, offsets: Tuple[int, ...],
+                   blocked: AbstractSet[int]) -> Dict[int, int]:
+    """Calculate walking distances from given cell to all cells reachable from it.
+
+    Cells next to walkable cells are expected to be in the map (level is enclosed by walls).
+
+    :param walkable: map of walkable cells
+    :param start: cell the walk starts at
+    :param offsets: cell offsets for all directions
+    :param blocked: walkable cells that cannot be stepped on (for example, occupied by crates)
+    :return: walking distances indexed by reachable cells
+    """
+    distances = {start: 0}
+    frontier = [start]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for cell in frontier:
+            for offset in offsets:
+                neighbour = cell + offset
+                if walkable[neighbour] and neighbour not in blocked \
+                        and neighbour not in distances:
+                    distances[neighbour] = distance
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+    return distances
+
+
+def _is_wall(walkable: bytearray, cell: int) -> bool:
+    return not (0 <= cell < len(walkable) and walkable[cell])
+
+
+def _rect_cells(rect: Rect, width: int) -> List[int]:
+    return [point.y * width + point.x for point in rect.inside_points()]
+
+
+def _marked_string(marked_cells: FrozenSet[int], cells: List[int]) -> str:
+    return "".join(MARKED_CELL if cell in marked_cells else UNMARKED_CELL for cell in cells)
+
+
+def _marked_cells(marks: str, cells: List[int]) -> FrozenSet[int]:
+    if len(marks) != len(cells):
+        raise GameError("Level analysis does not match the level")
+    return frozenset(cell for cell, mark in zip(cells, marks) if mark == MARKED_CELL)
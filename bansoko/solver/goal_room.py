@@ -0,0 +1,172 @@
+"""Module exposing goal room analysis (used for goal room macro pushes of the solver).
+
+Goal room is a part of the level which contains all cargo bays and which can be entered only
+through a single cell (the entrance). Crates entering such room can be pushed straight to their
+cargo bays in precomputed order, so the search does not have to consider any other pushes inside
+the room.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Tuple, FrozenSet, Optional, Dict, Iterable, Iterator, Set, Deque
+
+from bansoko.solver.analysis import walk_distances
+
+# crate cell and index of the direction of the push
+Push = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class RoomFill:
+    """Pushes moving a single crate from the entrance of goal room to its cargo bay.
+
+    Attributes:
+        cargo_bay - cell of the cargo bay the crate is pushed to
+        pushes - all pushes (the first one pushes the crate from the entrance)
+        moves - number of robot moves needed to make the pushes (not counting the walk to the
+                first push)
+    """
+    cargo_bay: int
+    pushes: Tuple[Push, ...]
+    moves: int
+
+
+@dataclass(frozen=True)
+class GoalRoom:
+    """Room containing all cargo bays, which can be entered only through a single cell.
+
+    Attributes:
+        entrance - cell the crates are pushed into the room from
+        cells - all cells of the room (entrance excluded)
+        fills - pushes of crates entering the room (in order the crates should enter it)
+    """
+    entrance: int
+    cells: FrozenSet[int]
+    fills: Tuple[RoomFill, ...]
+
+
+def find_goal_room(walkable: bytearray, cargo_bays: Iterable[int], offsets: Tuple[int, ...],
+                   crates: Iterable[int], robot: int) -> Optional[GoalRoom]:
+    """Find the goal room of a level (the smallest one, if there are more of them).
+
+    Only empty rooms (without any crates inside), that the robot starts outside of and that are
+    entered from a cell next to them, are taken into account. Room is rejected when no order of
+    filling its cargo bays can be found.
+
+    :param walkable: map of walkable cells
+    :param cargo_bays: cells of all cargo bays
+    :param offsets: cell offsets for all directions (in Direction order)
+    :param crates: cells initially occupied by crates
+    :param robot: cell the robot starts at
+    :return: goal room of the level *OR* None - if level does not have one
+    """
+    goals = frozenset(cargo_bays)
+    crates = frozenset(crates)
+    if not goals:
+        return None
+
+    area = frozenset(i for i, is_walkable in enumerate(walkable) if is_walkable)
+    room: Optional[FrozenSet[int]] = None
+    room_entrance = 0
+    for entrance in area - goals:
+        cells = frozenset(walk_distances(walkable, next(iter(goals)), offsets, {entrance}))
+        if not any(entrance + offset in cells for offset in offsets):
+            continue
+        if goals <= cells and robot not in cells and not cells & crates \
+                and (room is None or len(cells) < len(room)):
+            room, room_entrance = cells, entrance
+    if room is None:
+        return None
+
+    fills = _fill_order(walkable, room_entrance, room, goals, offsets)
+    return GoalRoom(room_entrance, room, fills) if fills else None
+
+
+def _fill_order(walkable: bytearray, entrance: int, room: FrozenSet[int], goals: FrozenSet[int],
+                offsets: Tuple[int, ...]) -> Optional[Tuple[RoomFill, ...]]:
+    # Crates are pulled out of the filled room one by one (the one closest to the entrance
+    # first), so the room is filled in the reversed order
+    area = room | {entrance}
+    exits = frozenset(entrance + offset for offset in offsets
+                      if walkable[entrance + offset] and entrance + offset not in area)
+    area_walkable = bytearray(len(walkable))
+    for cell in area:
+        area_walkable[cell] = 1
+    entrance_distances = walk_distances(area_walkable, entrance, offsets, set())
+    filled = set(goals)
+    fills = []
+    while filled:
+        for goal in sorted(filled, key=entrance_distances.__getitem__):
+            pushes = _pull_out(area, exits, (goal, entrance), filled - {goal}, offsets)
+            if pushes:
+                break
+        else:
+            return None
+        filled.remove(goal)
+        fills.append(RoomFill(goal, pushes, _count_moves(pushes, area_walkable, filled, offsets)))
+    return tuple(reversed(fills))
+
+
+def _pull_out(area: FrozenSet[int], exits: FrozenSet[int], start: Tuple[int, int],
+              obstacles: Set[int], offsets: Tuple[int, ...]) -> Optional[Tuple[Push, ...]]:
+    # 0-1 BFS over states (crate cell, robot cell) minimizing the number of pulls (walks of
+    # the robot are free). Crate has to be pulled to the entrance, with the robot leaving the room
+    # through one of exits (cells next to the entrance, that's where the robot stands when pushing
+    # the crate into the room).
+    pulls: Dict[Tuple[int, int], int] = {start: 0}
+    parents: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    frontier: Deque[Tuple[int, int]] = deque([start])
+    while frontier:
+        state = frontier.popleft()
+        if state[1] in exits:
+            return _pulls_to_pushes(state, start, parents, offsets)
+        for successor, is_pull in _pull_successors(state, area, exits, obstacles, offsets):
+            successor_pulls = pulls[state] + is_pull
+            if successor_pulls < pulls.get(successor, successor_pulls + 1):
+                pulls[successor] = successor_pulls
+                parents[successor] = state
+                if is_pull:
+                    frontier.append(successor)
+                else:
+                    frontier.appendleft(successor)
+    return None
+
+
+def _pull_successors(state: Tuple[int, int], area: FrozenSet[int], exits: FrozenSet[int],
+                     obstacles: Set[int],
+                     offsets: Tuple[int, ...]) -> Iterator[Tuple[Tuple[int, int], bool]]:
+    # States reached by a single step of the robot (and is the crate pulled during the step).
+    # Robot can leave the room only when pulling the crate to the entrance.
+    crate, robot = state
+    for offset in offsets:
+        neighbour = robot + offset
+        is_pull = robot - offset == crate
+        if is_pull and neighbour in exits:
+            yield (robot, neighbour), True
+        elif neighbour in area and neighbour != crate and neighbour not in obstacles:
+            yield (crate, neighbour), False
+            if is_pull:
+                yield (robot, neighbour), True
+
+
+def _pulls_to_pushes(state: Tuple[int, int], start: Tuple[int, int],
+                     parents: Dict[Tuple[int, int], Tuple[int, int]],
+                     offsets: Tuple[int, ...]) -> Tuple[Push, ...]:
+    # Crate pulled from cell A to cell B is pushed from B to A, so pushes are the pulls made
+    # backwards (from given state to the start one)
+    pushes = []
+    while state != start:
+        parent = parents[state]
+        if parent[0] != state[0]:
+            pushes.append((state[0], offsets.index(parent[0] - state[0])))
+        state = parent
+    return tuple(pushes)
+
+
+def _count_moves(pushes: Tuple[Push, ...], area_walkable: bytearray, obstacles: Set[int],
+                 offsets: Tuple[int, ...]) -> int:
+    # Robot moves needed to make all pushes (pushes themselves and walks between them)
+    moves = len(pushes)
+    for (previous_crate, _), (crate, direction_index) in zip(pushes, pushes[1:]):
+        distances = walk_distances(area_walkable, previous_crate, offsets, obstacles | {crate})
+        moves += distances[crate - offsets[direction_index]]
+    return moves
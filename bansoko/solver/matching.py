@@ -0,0 +1,130 @@
+"""Module exposing minimum cost bipartite matching (used as a lower bound of pushes)."""
+from dataclasses import dataclass
+from itertools import islice
+from operator import sub
+from typing import Sequence, List, Tuple
+
+CostMatrix = Sequence[Sequence[int]]
+
+# Slacks of columns are never negative, so negative slack marks columns already visited in a phase
+VISITED = -1.0
+
+
+@dataclass(frozen=True)
+class Matching:
+    """Assignment of rows to distinct columns with the minimal total cost.
+
+    Matching is found by the Hungarian algorithm (with potentials). Potentials are kept, so when
+    costs of a single row of a square matrix change the matching can be updated in O(n^2) time
+    instead of solving the whole problem again in O(n^3) time.
+    Number of rows must not be greater than the number of columns.
+
+    Attributes:
+        cost - total cost of the matching
+        row_potentials - dual potentials of rows (1-based, first item unused)
+        column_potentials - dual potentials of columns (1-based, first item unused)
+        column_rows - row (1-based) assigned to every column (1-based), 0 for unassigned columns
+    """
+    cost: int
+    row_potentials: Tuple[int, ...]
+    column_potentials: Tuple[int, ...]
+    column_rows: Tuple[int, ...]
+
+    @classmethod
+    def solve(cls, costs: CostMatrix) -> "Matching":
+        """Find the minimal cost matching of given cost matrix.
+
+        :param costs: matrix of costs of assigning every row to every column
+        :return: minimal cost matching
+        """
+        num_columns = len(costs[0]) if costs else 0
+        row_potentials = [0] * (len(costs) + 1)
+        column_potentials = [0] * (num_columns + 1)
+        column_rows = [0] * (num_columns + 1)
+        for row in range(1, len(costs) + 1):
+            _augment(costs, row, row_potentials, column_potentials, column_rows)
+        return cls._create(costs, row_potentials, column_potentials, column_rows)
+
+    def update_row(self, costs: CostMatrix, row: int) -> "Matching":
+        """Find the minimal cost matching after costs of a single row have changed.
+
+        :param costs: matrix of costs (with changed costs of given row)
+        :param row: index of the row that has changed (0-based)
+        :return: minimal cost matching of given cost matrix
+        """
+        if len(self.row_potentials) != len(self.column_potentials):
+            # potentials of unassigned columns would be invalid after removing the row
+            return self.solve(costs)
+
+        row_costs = costs[row]
+        row_potential = min(map(sub, row_costs, islice(self.column_potentials, 1, None)))
+        row_potentials = self.row_potentials[:row + 1] + (row_potential,) \
+            + self.row_potentials[row + 2:]
+        assigned_column = self.column_rows.index(row + 1)
+        if row_costs[assigned_column - 1] - self.column_potentials[assigned_column] \
+                == row_potential:
+            # The row is still tight with its column, so the matching remains optimal (and its
+            # cost changes as much as the potential of the row, since costs of all assigned pairs
+            # are sums of potentials of their rows and columns)
+            return Matching(cost=self.cost + row_potential - self.row_potentials[row + 1],
+                            row_potentials=row_potentials,
+                            column_potentials=self.column_potentials,
+                            column_rows=self.column_rows)
+
+        column_potentials = list(self.column_potentials)
+        column_rows = [0 if assigned_row == row + 1 else assigned_row
+                       for assigned_row in self.column_rows]
+        augmented_potentials = list(row_potentials)
+        _augment(costs, row + 1, augmented_potentials, column_potentials, column_rows)
+        return self._create(costs, augmented_potentials, column_potentials, column_rows)
+
+    def assignment(self) -> List[int]:
+        """Column (0-based) assigned to every row (0-based)."""
+        assignment = [0] * (len(self.row_potentials) - 1)
+        for column, row in enumerate(self.column_rows):
+            if row != 0:
+                assignment[row - 1] = column - 1
+        return assignment
+
+    @classmethod
+    def _create(cls, costs: CostMatrix, row_potentials: List[int], column_potentials: List[int],
+                column_rows: List[int]) -> "Matching":
+        cost = sum(costs[row - 1][column - 1] for column, row in enumerate(column_rows) if row)
+        return cls(cost=cost, row_potentials=tuple(row_potentials),
+                   column_potentials=tuple(column_potentials), column_rows=tuple(column_rows))
+
+
+def _augment(costs: CostMatrix, row: int, row_potentials: List[int],
+             column_potentials: List[int], column_rows: List[int]) -> None:
+    # Single phase of the Hungarian algorithm: find the shortest augmenting path from given
+    # (unassigned) row while keeping potentials feasible. Column 0 is a virtual column.
+    column_rows[0] = row
+    column = 0
+    min_slack = [float("inf")] * len(column_rows)
+    way = [0] * len(column_rows)
+    while column_rows[column] != 0:
+        min_slack[column] = VISITED
+        row_potential = row_potentials[column_rows[column]]
+        row_costs = costs[column_rows[column] - 1]
+        delta, next_column = float("inf"), 0
+        for j in range(1, len(way)):
+            column_slack = min_slack[j]
+            if column_slack != VISITED:
+                slack = row_costs[j - 1] - row_potential - column_potentials[j]
+                if slack < column_slack:
+                    min_slack[j] = column_slack = slack
+                    way[j] = column
+                if column_slack < delta:
+                    delta = column_slack
+                    next_column = j
+        for j, column_slack in enumerate(min_slack):
+            if column_slack == VISITED:
+                row_potentials[column_rows[j]] += int(delta)
+                column_potentials[j] -= int(delta)
+            else:
+                min_slack[j] -= delta
+        column = next_column
+    while column != 0:
+        column_rows[column] = column_rows[way[column]]
+        column = way[column]
+    column_rows[0] = 0
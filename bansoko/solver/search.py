@@ -0,0 +1,649 @@
+"""Module exposing Solver - A* search for optimal solutions of Bansoko levels.
+
+The search operates on push-level states: a state is a set of crates positions and the position
+of the robot, and a transition between states is a single crate push (walking between pushes is
+"free" in terms of search nodes, but it is accounted in the cost when solving for moves).
+Optionally, transitions can be macro pushes: a crate pushed into a tunnel is pushed through it at
+once and a crate entering the goal room is pushed straight to its cargo bay (see goal_room).
+
+Solver is meant for offline tools (like the solvability verifier), not for the game itself: small
+levels are solved in milliseconds, but only 6 of 62 classic levels of the main bundle are solved
+within 10 seconds, so it's not fast enough for hints or par scores. Expanding a state is already
+incremental (reachable area, deadlock checks and matching are updated from the parent), so it's
+the number of expanded states (thousands per second) that would have to go down.
+"""
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from enum import Enum, unique
+from typing import Optional, Tuple, Dict, FrozenSet, List, Iterator, Iterable
+
+from bansoko.game import GameError
+from bansoko.game.board import Move
+from bansoko.game.tiles import TileGrid, LevelDescriptor
+from bansoko.graphics import Direction, TilePosition
+from bansoko.solver.analysis import LevelAnalysis, UNREACHABLE, analyze_level, walkable_cells, \
+    direction_offsets, walk_distances
+from bansoko.solver.goal_room import GoalRoom, Push, find_goal_room
+from bansoko.solver.matching import Matching
+
+ZOBRIST_SEED = 0x5EED
+DEADLOCK_COST = 1_000_000
+LURD_CHARS = {Direction.UP: "u", Direction.DOWN: "d", Direction.LEFT: "l", Direction.RIGHT: "r"}
+
+
+def _ring_patterns() -> Tuple[bool, ...]:
+    # For every pattern of cells of the 8-neighbourhood of a cell (bits clockwise from the north),
+    # whether its orthogonal cells are all in the same run of neighbouring cells, so removing the
+    # cell from an area cannot disconnect the area (paths through the cell can go around it)
+    patterns = []
+    for pattern in range(256):
+        start = next((i for i in range(8) if not pattern >> i & 1), None)
+        if start is None:
+            patterns.append(True)
+            continue
+        runs, run = {}, 0
+        for step in range(1, 9):
+            i = (start + step) % 8
+            if pattern >> i & 1:
+                if not pattern >> (i - 1) % 8 & 1:
+                    run += 1
+                runs[i] = run
+        patterns.append(len({runs[i] for i in (0, 2, 4, 6) if i in runs}) <= 1)
+    return tuple(patterns)
+
+
+SIMPLE_RING_PATTERNS = _ring_patterns()
+
+
+@unique
+class SolverMetric(Enum):
+    """Metric minimized by the solver."""
+    PUSHES = 0
+    MOVES = 1
+
+
+@unique
+class SolverStatus(Enum):
+    """Final status of the search."""
+    SOLVED = 0
+    UNSOLVABLE = 1
+    NODES_LIMIT_REACHED = 2
+    TIME_LIMIT_REACHED = 3
+
+
+@dataclass(frozen=True)
+class SolverLimits:
+    """Limits of resources the solver can use.
+
+    Attributes:
+        max_nodes - maximal number of expanded nodes (None means no limit)
+        time_limit - maximal time of the search in seconds (None means no limit)
+    """
+    max_nodes: Optional[int] = None
+    time_limit: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Solution:
+    """Solution of a level as a sequence of robot moves.
+
+    Attributes:
+        moves - all moves of the robot (walks and pushes)
+    """
+    moves: Tuple[Move, ...]
+
+    @property
+    def pushes(self) -> int:
+        """Number of pushes in the solution."""
+        return sum(1 for move in self.moves if move.push)
+
+    @property
+    def steps(self) -> int:
+        """Number of steps (moves) in the solution."""
+        return len(self.moves)
+
+    @property
+    def lurd(self) -> str:
+        """The solution in LURD notation (lowercase for walks, uppercase for pushes)."""
+        return "".join(LURD_CHARS[move.direction].upper() if move.push
+                       else LURD_CHARS[move.direction] for move in self.moves)
+
+
+@dataclass(frozen=True)
+class SolverResult:
+    """Result of solving a level.
+
+    Attributes:
+        status - final status of the search
+        metric - metric that has been minimized
+        solution - found solution (None if the level has not been solved)
+        optimal - is the solution guaranteed to be optimal for the metric
+        expanded_nodes - number of states expanded during the search
+        generated_nodes - number of states generated during the search
+        elapsed_time - duration of the search in seconds
+    """
+    status: SolverStatus
+    metric: SolverMetric
+    solution: Optional[Solution]
+    optimal: bool
+    expanded_nodes: int
+    generated_nodes: int
+    elapsed_time: float
+
+    @property
+    def is_solved(self) -> bool:
+        """Value indicating whether the level has been solved."""
+        return self.status == SolverStatus.SOLVED
+
+
+@dataclass(frozen=True)
+class _Node:  # pylint: disable=too-many-instance-attributes
+    cost: int
+    matching: Matching
+    crates_order: Tuple[int, ...]
+    crates: FrozenSet[int]
+    crates_mask: int
+    crates_key: int
+    robot: int
+    parent_key: int
+    parent_area: Optional[int]
+    pushes: Tuple[Push, ...]
+
+
+class Solver:  # pylint: disable=too-many-instance-attributes
+    """Solver finds push-optimal or move-optimal solutions of levels using A* search.
+
+    Only the initial state of the level is solved (as defined by tile grid and level descriptor),
+    so the solver does not depend on any running game.
+    States are identified by Zobrist hashes (collisions of 64-bit hashes are ignored), crates
+    are never pushed to dead squares and freeze deadlocks are pruned. Cells reachable by the robot
+    are kept as bit masks (bit of every cell set), so the area of a state is updated from the area
+    of its parent rather than searched from scratch. The heuristic
+    is the minimal cost matching of crates to cargo bays, which is admissible for both metrics
+    (states without any matching are deadlocked and pruned as well).
+    Macro pushes (tunnels and goal room) cut down the number of states by orders of magnitude, but
+    solutions found with them are no longer guaranteed to be optimal.
+
+    Attributes:
+        grid - tile grid of the level
+        descriptor - descriptor of initial state of the level
+        analysis - static analysis of the level
+        goal_room - goal room of the level (None if the level does not have one)
+        tunnel_axes - tunnel cells crates can be pushed through along given axis (vertical axis
+                      first, horizontal axis next)
+    """
+
+    def __init__(self, grid: TileGrid, descriptor: LevelDescriptor,
+                 analysis: Optional[LevelAnalysis] = None) -> None:
+        self.grid = grid
+        self.descriptor = descriptor
+        self.analysis = analysis or analyze_level(grid)
+        self.walkable = walkable_cells(grid)
+        self.cargo_bays = frozenset(self.analysis.cargo_bays)
+        self.goal_costs = tuple(
+            tuple(DEADLOCK_COST if distance == UNREACHABLE else distance for distance in row)
+            for row in self.analysis.goal_distances)
+        self.offsets = direction_offsets(grid.width)
+        rng = random.Random(ZOBRIST_SEED)
+        self.crate_keys = tuple(rng.getrandbits(64) for _ in self.walkable)
+        self.robot_keys = tuple(rng.getrandbits(64) for _ in self.walkable)
+        if any(self.walkable[self.cell(TilePosition(x, y))]
+               for x in range(grid.width) for y in range(grid.height)
+               if x in (0, grid.width - 1) or y in (0, grid.height - 1)):
+            raise GameError("Level is not enclosed by walls")
+        self.goal_room = find_goal_room(
+            self.walkable, self.cargo_bays, self.offsets,
+            (self.cell(position) for position in descriptor.crate_spawns),
+            self.cell(descriptor.start))
+        up_offset, _, left_offset, _ = self.offsets
+        self.tunnel_axes = tuple(
+            frozenset(cell for cell in self.analysis.tunnels
+                      if not self.walkable[cell - offset] and not self.walkable[cell + offset])
+            for offset in (left_offset, up_offset))
+        self.walkable_mask = cells_mask(i for i, walkable in enumerate(self.walkable) if walkable)
+        self.targets_mask = self.walkable_mask & ~cells_mask(self.analysis.dead_squares)
+        self.cargo_bays_mask = cells_mask(self.cargo_bays)
+        self.level_mask = self.flood(1 << self.cell(descriptor.start), self.walkable_mask)
+        width = grid.width
+        # Positions of the 8-neighbourhood of a cell (clockwise from the north) in the bit mask
+        # shifted, so the north-west neighbour is its lowest bit
+        self.ring_bits = (1, 2, width + 2, 2 * width + 2, 2 * width + 1, 2 * width, width, 0)
+
+    def cell(self, position: TilePosition) -> int:
+        """Convert tile position to the cell index used by the solver.
+
+        :param position: tile position to be converted
+        :return: index of the cell at given position
+        """
+        return position.tile_y * self.grid.width + position.tile_x
+
+    def solve(self, metric: SolverMetric = SolverMetric.PUSHES,
+              limits: SolverLimits = SolverLimits(), weight: float = 1.0,
+              macros: bool = False) -> SolverResult:
+        """Search for the solution of the level.
+
+        :param metric: metric to be minimized (pushes or moves)
+        :param limits: limits of resources the search can use
+        :param weight: weight of the heuristic (values greater than 1 make the search faster, but
+                       the solution is no longer guaranteed to be optimal)
+        :param macros: should tunnel and goal room macro pushes be used (they make the search
+                       much faster, but the solution is no longer guaranteed to be optimal)
+        :return: result of the search
+        """
+        return _Search(self, metric, limits, weight, macros).run()
+
+    def flood(self, area: int, free: int) -> int:
+        """Extend the area by all free cells connected to it.
+
+        Cells on edges of the grid are never free (level is enclosed by walls), so shifting masks
+        by a row or a column never wraps the area around the grid.
+
+        :param area: bit mask of cells of the area
+        :param free: bit mask of cells the area can be extended with
+        :return: bit mask of cells of the extended area
+        """
+        width = self.grid.width
+        while True:
+            grown = (area | area << 1 | area >> 1 | area << width | area >> width) & free
+            if grown == area:
+                return area
+            area = grown
+
+    def splits_area(self, area: int, cell: int) -> bool:
+        """Test whether the area may get disconnected when the cell is removed from it.
+
+        :param area: bit mask of cells of the area
+        :param cell: cell of the area to be removed
+        :return: True - if the area may get disconnected *OR* False - if it surely stays connected
+        """
+        width = self.grid.width
+        ring = area >> (cell - width - 1) & ((1 << (2 * width + 3)) - 1)
+        pattern = 0
+        for i, bit in enumerate(self.ring_bits):
+            pattern |= (ring >> bit & 1) << i
+        return not SIMPLE_RING_PATTERNS[pattern]
+
+    def robot_distances(self, robot: int, crates: FrozenSet[int]) -> Dict[int, int]:
+        """Calculate walking distances from the robot to all cells it can reach.
+
+        :param robot: cell the robot is at
+        :param crates: cells occupied by crates
+        :return: walking distances indexed by cells reachable by the robot
+        """
+        return walk_distances(self.walkable, robot, self.offsets, crates)
+
+    def match_crates(self, crates: Tuple[int, ...]) -> Matching:
+        """Find the minimal cost matching of crates to cargo bays.
+
+        Cost of the matching is the lower bound of pushes needed to complete the level (or it is
+        not less than DEADLOCK_COST if crates cannot be matched with cargo bays at all).
+
+        :param crates: cells occupied by crates
+        :return: minimal cost matching of crates to cargo bays
+        """
+        return Matching.solve([self.goal_costs[cell] for cell in crates])
+
+    def is_deadlocked(self, cell: int, crates: FrozenSet[int]) -> bool:
+        """Test whether the crate pushed to given cell caused a freeze deadlock.
+
+        Crate is frozen when it can be pushed along neither of axes (because of walls, dead squares
+        or other frozen crates). Freeze deadlock occurs when a frozen crate is not in cargo bay.
+
+        :param cell: cell of the pushed crate
+        :param crates: cells occupied by crates
+        :return: True - if the push caused a deadlock *OR* False - otherwise
+        """
+        frozen_crates: List[int] = []
+        if not self._is_frozen(cell, crates, {}, frozen_crates):
+            return False
+        return any(crate not in self.cargo_bays for crate in frozen_crates)
+
+    def _is_frozen(self, cell: int, crates: FrozenSet[int], checked: Dict[int, Optional[bool]],
+                   frozen_crates: List[int]) -> bool:
+        # Crates being checked (None in checked) are treated as walls: they cannot be pushed
+        # until this one is, so if this crate turns out to be frozen, they are frozen too. If it
+        # does not, crates found frozen under that assumption are checked off as not frozen.
+        checked[cell] = None
+        first_frozen = len(frozen_crates)
+        up_offset, down_offset, left_offset, right_offset = self.offsets
+        frozen = self._is_blocked(cell + up_offset, cell + down_offset, crates, checked,
+                                  frozen_crates) \
+            and self._is_blocked(cell + left_offset, cell + right_offset, crates, checked,
+                                 frozen_crates)
+        if frozen:
+            frozen_crates.append(cell)
+        else:
+            for crate in frozen_crates[first_frozen:]:
+                checked[crate] = False
+            del frozen_crates[first_frozen:]
+        checked[cell] = frozen
+        return frozen
+
+    def _is_blocked(self, first: int, second: int, crates: FrozenSet[int],
+                    checked: Dict[int, Optional[bool]], frozen_crates: List[int]) -> bool:
+        if not self.walkable[first] or not self.walkable[second]:
+            return True
+        dead_squares = self.analysis.dead_squares
+        if first in dead_squares and second in dead_squares:
+            return True
+        for neighbour in (first, second):
+            if neighbour not in crates:
+                continue
+            if neighbour not in checked:
+                if self._is_frozen(neighbour, crates, checked, frozen_crates):
+                    return True
+            elif checked[neighbour] is not False:
+                # Crates checked before are blocking only when being checked or found frozen
+                # (the ones not shown to be frozen might still be movable)
+                return True
+        return False
+
+    def walk_path(self, start: int, destination: int, crates: FrozenSet[int]) -> List[Move]:
+        """Find the shortest walk of the robot between two cells.
+
+        :param start: cell the robot starts at
+        :param destination: cell the robot should walk to
+        :param crates: cells occupied by crates
+        :return: moves of the shortest walk
+        """
+        directions = list(Direction)
+        came_from: Dict[int, Tuple[int, int]] = {start: (start, -1)}
+        frontier = [start]
+        while frontier and destination not in came_from:
+            next_frontier = []
+            for cell in frontier:
+                for direction_index, offset in enumerate(self.offsets):
+                    neighbour = cell + offset
+                    if self.walkable[neighbour] and neighbour not in crates \
+                            and neighbour not in came_from:
+                        came_from[neighbour] = (cell, direction_index)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        if destination not in came_from:
+            raise GameError("Robot cannot reach cell " + str(destination))
+
+        path = []
+        cell = destination
+        while cell != start:
+            cell, direction_index = came_from[cell]
+            path.append(Move(directions[direction_index]))
+        return path[::-1]
+
+
+class _Search:  # pylint: disable=too-many-instance-attributes
+    """Single run of A* search (holding open and closed sets of states)."""
+
+    def __init__(self, solver: Solver, metric: SolverMetric, limits: SolverLimits,
+                 weight: float, macros: bool) -> None:
+        self.solver = solver
+        self.metric = metric
+        self.limits = limits
+        self.weight = weight
+        self.macros = macros
+        self.goal_room = solver.goal_room if macros else None
+        self.tunnel_axes = solver.tunnel_axes if macros else (frozenset(), frozenset())
+        self.open_nodes: List[Tuple[float, int, int, _Node]] = []
+        self.best_costs: Dict[int, int] = {}
+        self.came_from: Dict[int, Tuple[int, Tuple[Push, ...]]] = {}
+        self.generated_nodes = 0
+        self.start_time = time.perf_counter()
+        self.start_crates = frozenset(solver.cell(p) for p in solver.descriptor.crate_spawns)
+
+    def run(self) -> SolverResult:
+        """Run the search until the solution is found or limits are reached."""
+        solver = self.solver
+        crates = tuple(solver.cell(position) for position in solver.descriptor.crate_spawns)
+        crates_key = 0
+        for cell in crates:
+            crates_key ^= solver.crate_keys[cell]
+        if len(crates) > len(solver.cargo_bays):
+            return self._result(SolverStatus.UNSOLVABLE)
+        matching = solver.match_crates(crates)
+        if matching.cost >= DEADLOCK_COST:
+            return self._result(SolverStatus.UNSOLVABLE)
+
+        self.add_node(_Node(0, matching, crates, self.start_crates, cells_mask(crates), crates_key,
+                            solver.cell(solver.descriptor.start), 0, None, ()))
+        while self.open_nodes:
+            status = self._check_limits()
+            if status:
+                return self._result(status)
+
+            node = heapq.heappop(self.open_nodes)[3]
+            if node.cost > self.best_costs[node.crates_key ^ solver.robot_keys[node.robot]]:
+                # The same state has been reached at lower cost after this node was added
+                continue
+            area = self._reachable_area(node)
+            distances: Optional[Dict[int, int]] = None
+            if self.metric == SolverMetric.PUSHES:
+                # Robot position is normalized to the top-left cell of the area
+                robot = (area & -area).bit_length() - 1
+            else:
+                robot = node.robot
+                distances = solver.robot_distances(node.robot, node.crates)
+            key = node.crates_key ^ solver.robot_keys[robot]
+            if key in self.came_from:
+                continue
+            self.came_from[key] = (node.parent_key, node.pushes)
+            if node.matching.cost == 0:
+                return self._result(SolverStatus.SOLVED, self._solution(key))
+            for robot, crate, direction_index in self._pushes(node, area):
+                successor = self._push(node, key, area, (crate, direction_index),
+                                       distances[robot] if distances else 0)
+                if successor:
+                    self.add_node(successor)
+        return self._result(SolverStatus.UNSOLVABLE)
+
+    def _reachable_area(self, node: _Node) -> int:
+        # Cells reachable by the robot. Push frees the cell the crate was pushed from (next to the
+        # area of the parent), so the area of the parent can only grow, unless the crate has been
+        # pushed into it and split it in two (only then it's searched from scratch)
+        solver = self.solver
+        free = solver.walkable_mask & ~node.crates_mask
+        if node.parent_area is None:
+            return solver.flood(1 << node.robot, free)
+        crate, direction_index = node.pushes[-1]
+        destination = crate + solver.offsets[direction_index]
+        area = node.parent_area | 1 << node.pushes[0][0]
+        if area >> destination & 1:
+            if solver.splits_area(area, destination):
+                return solver.flood(1 << node.robot, free)
+            area ^= 1 << destination
+        return solver.flood(area, free)
+
+    def _pushes(self, node: _Node, area: int) -> Iterator[Tuple[int, int, int]]:
+        # All pushes robot can make (robot cell, crate cell and direction index), except those
+        # that push crates to walls, other crates or dead squares
+        if self.macros:
+            corral_pushes = self._corral_pushes(node, area)
+            if corral_pushes is not None:
+                yield from corral_pushes
+                return
+        crates_mask = node.crates_mask
+        targets = self.solver.targets_mask & ~crates_mask
+        for direction_index, offset in enumerate(self.solver.offsets):
+            # Crates with the robot standing behind and a target cell in front of them
+            if offset > 0:
+                crates = crates_mask & area << offset & targets >> offset
+            else:
+                crates = crates_mask & area >> -offset & targets << -offset
+            for crate in mask_cells(crates):
+                yield crate - offset, crate, direction_index
+
+    def _corral_pushes(self, node: _Node, area: int) -> Optional[List[Tuple[int, int, int]]]:
+        # Corral is an area the robot cannot reach, which is fenced by crates. When the crates
+        # can be pushed only into the corral and the robot can make all such pushes (PI-corral),
+        # the corral has to be entered sooner or later and other pushes can wait until it is.
+        # Pushes into the PI-corral with fewest of them are returned (None if there is no
+        # PI-corral, an empty list if there is a PI-corral that cannot be entered at all).
+        solver = self.solver
+        width = solver.grid.width
+        unreached = solver.level_mask & ~node.crates_mask & ~area
+        best_pushes: Optional[List[Tuple[int, int, int]]] = None
+        while unreached:
+            corral = solver.flood(unreached & -unreached, unreached)
+            unreached &= ~corral
+            fence = (corral << 1 | corral >> 1 | corral << width | corral >> width) \
+                & node.crates_mask
+            if not fence & ~solver.cargo_bays_mask and not corral & solver.cargo_bays_mask:
+                continue
+            pushes = self._pi_corral_pushes(corral, fence, area)
+            if pushes is not None and (best_pushes is None or len(pushes) < len(best_pushes)):
+                best_pushes = pushes
+        return best_pushes
+
+    def _pi_corral_pushes(self, corral: int, fence: int,
+                          area: int) -> Optional[List[Tuple[int, int, int]]]:
+        # Pushes of fence crates into the corral (None if it is not a PI-corral). Other crates are
+        # not treated as obstacles, since they can be moved before the corral is entered
+        walkable = self.solver.walkable
+        dead_squares = self.solver.analysis.dead_squares
+        pushes = []
+        for crate in mask_cells(fence):
+            for direction_index, offset in enumerate(self.solver.offsets):
+                robot, destination = crate - offset, crate + offset
+                if not walkable[destination] or destination in dead_squares \
+                        or fence >> destination & 1:
+                    continue
+                if not walkable[robot] or (corral | fence) >> robot & 1:
+                    # Robot cannot get there before the corral is entered
+                    continue
+                if not corral >> destination & 1 or not area >> robot & 1:
+                    return None
+                pushes.append((robot, crate, direction_index))
+        return pushes
+
+    def _push(self, node: _Node, key: int, area: int, push: Push,
+              distance: int) -> Optional[_Node]:
+        # pylint: disable=too-many-locals
+        solver = self.solver
+        crate = push[0]
+        pushes, moves = self._macro(node.crates, crate, push[1])
+        if not pushes:
+            return None
+        robot = pushes[-1][0]
+        destination = robot + solver.offsets[pushes[-1][1]]
+        cost = node.cost + (distance + moves if self.metric == SolverMetric.MOVES else len(pushes))
+        crates_key = node.crates_key ^ solver.crate_keys[crate] ^ solver.crate_keys[destination]
+        if cost >= self.best_costs.get(crates_key ^ solver.robot_keys[robot], cost + 1):
+            # Checked before anything else, since most of generated states have been reached before
+            return None
+        crates = node.crates.difference((crate,)).union((destination,))
+        if solver.is_deadlocked(destination, crates):
+            return None
+        crates_order, matching = self._update_matching(node, crate, destination)
+        if matching.cost >= DEADLOCK_COST:
+            return None
+        return _Node(cost=cost, matching=matching, crates_order=crates_order, crates=crates,
+                     crates_mask=node.crates_mask ^ 1 << crate ^ 1 << destination,
+                     crates_key=crates_key, robot=robot, parent_key=key, parent_area=area,
+                     pushes=pushes)
+
+    def _update_matching(self, node: _Node, crate: int,
+                         destination: int) -> Tuple[Tuple[int, ...], Matching]:
+        # Only the row of the pushed crate changes, so the matching of the node is updated
+        crate_id = node.crates_order.index(crate)
+        crates_order = node.crates_order[:crate_id] + (destination,) \
+            + node.crates_order[crate_id + 1:]
+        return crates_order, node.matching.update_row(
+            [self.solver.goal_costs[cell] for cell in crates_order], crate_id)
+
+    def _macro(self, crates: FrozenSet[int], crate: int,
+               direction_index: int) -> Tuple[Tuple[Push, ...], int]:
+        # Pushes (and number of robot moves) made when robot pushes the crate in given direction
+        # (no pushes if the push should not be made at all)
+        goal_room = self.goal_room
+        offset = self.solver.offsets[direction_index]
+        if goal_room and (crate in goal_room.cells or crate + offset in goal_room.cells):
+            return self._goal_room_macro(goal_room, crates, crate, direction_index)
+
+        # Crate is pushed through the tunnel for as long as the robot follows it inside the tunnel
+        pushes = [(crate, direction_index)]
+        tunnels = self.tunnel_axes[direction_index // 2]
+        walkable = self.solver.walkable
+        dead_squares = self.solver.analysis.dead_squares
+        while crate in tunnels and crate + offset in tunnels \
+                and crate + offset not in self.solver.cargo_bays:
+            crate += offset
+            destination = crate + offset
+            if not walkable[destination] or destination in crates \
+                    or destination in dead_squares or goal_room and crate == goal_room.entrance:
+                break
+            pushes.append((crate, direction_index))
+        return tuple(pushes), len(pushes)
+
+    @staticmethod
+    def _goal_room_macro(goal_room: GoalRoom, crates: FrozenSet[int], crate: int,
+                         direction_index: int) -> Tuple[Tuple[Push, ...], int]:
+        # Crates placed in the room are never pushed again, while crates entering it are pushed
+        # straight to the next cargo bay to be filled
+        if crate != goal_room.entrance:
+            return (), 0
+        fill = goal_room.fills[len(crates & goal_room.cells)]
+        if fill.pushes[0] != (crate, direction_index):
+            return (), 0
+        return fill.pushes, fill.moves
+
+    def add_node(self, node: _Node) -> None:
+        """Add node to the open set (unless the same state has been reached at lower cost)."""
+        key = node.crates_key ^ self.solver.robot_keys[node.robot]
+        if node.cost >= self.best_costs.get(key, node.cost + 1):
+            return
+        self.best_costs[key] = node.cost
+        self.generated_nodes += 1
+        priority = node.cost + self.weight * node.matching.cost
+        heapq.heappush(self.open_nodes, (priority, -node.cost, self.generated_nodes, node))
+
+    def _check_limits(self) -> Optional[SolverStatus]:
+        if self.limits.max_nodes is not None and len(self.came_from) >= self.limits.max_nodes:
+            return SolverStatus.NODES_LIMIT_REACHED
+        if self.limits.time_limit is not None \
+                and time.perf_counter() - self.start_time >= self.limits.time_limit:
+            return SolverStatus.TIME_LIMIT_REACHED
+        return None
+
+    def _solution(self, key: int) -> Solution:
+        pushes: List[Push] = []
+        parent_key, node_pushes = self.came_from[key]
+        while node_pushes:
+            pushes.extend(reversed(node_pushes))
+            parent_key, node_pushes = self.came_from[parent_key]
+
+        solver = self.solver
+        directions = list(Direction)
+        crates = self.start_crates
+        robot = solver.cell(solver.descriptor.start)
+        moves: List[Move] = []
+        for crate, direction_index in reversed(pushes):
+            offset = solver.offsets[direction_index]
+            moves.extend(solver.walk_path(robot, crate - offset, crates))
+            moves.append(Move(directions[direction_index], push=True))
+            crates = crates.difference((crate,)).union((crate + offset,))
+            robot = crate
+        return Solution(tuple(moves))
+
+    def _result(self, status: SolverStatus, solution: Optional[Solution] = None) -> SolverResult:
+        return SolverResult(status=status, metric=self.metric, solution=solution,
+                            optimal=solution is not None and self.weight == 1.0
+                            and not self.macros,
+                            expanded_nodes=len(self.came_from),
+                            generated_nodes=self.generated_nodes,
+                            elapsed_time=time.perf_counter() - self.start_time)
+
+
+def cells_mask(cells: Iterable[int]) -> int:
+    """Create a bit mask of given cells (bit of every cell set)."""
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+
+def mask_cells(mask: int) -> Iterator[int]:
+    """Iterate over cells of given bit mask (in ascending order)."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
@@ -0,0 +1 @@
+"""Module exposing command line tools for Bansoko developers."""
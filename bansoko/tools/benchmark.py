@@ -0,0 +1,173 @@
+"""Allocation benchmark for Bansoko game loop.
+
+Plays every level of the bundle with random (but repeatable) input and reports how many geometry
+objects are created per frame, how much memory a single instance takes and how long a frame takes.
+With --headless levels are rendered offscreen with NumPy (no display is needed).
+
+Usage:
+    benchmark [-h] [--version] [--bundle <name>] [--frames <num>] [--seed <num>] [--headless]
+
+Options:
+    -h, --help              Show this screen.
+    --version               Show version.
+    --bundle <name>         Specify resources bundle name [default: main]
+    --frames <num>          Number of frames played on every level [default: 300]
+    --seed <num>            Seed of the random input [default: 0]
+    --headless              Render offscreen with NumPy instead of Pyxel.
+"""
+import gc
+import logging
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, List, Optional, Sequence
+
+import pyxel
+from docopt import docopt
+
+from bansoko import __version__, GAME_FRAME_TIME_IN_MS
+from bansoko.game import GameError
+from bansoko.game.bundle import load_bundle
+from bansoko.game.game_object import ObjectPosition
+from bansoko.game.level import Level, InputAction
+from bansoko.game.level_template import LevelTemplate
+from bansoko.graphics import SCREEN_WIDTH, SCREEN_HEIGHT, Point, Size, Rect, TilePosition, Layer
+from bansoko.graphics.backend import use_backend
+from bansoko.graphics.dirty_rects import DirtyRects
+from bansoko.graphics.numpy_backend import NumpyBackend
+from bansoko.tools.logger import configure_logger
+
+GEOMETRY_TYPES = (Point, Size, Rect, TilePosition, Layer, ObjectPosition)
+MAX_INPUT_HOLD_FRAMES = 20
+
+
+class AllocationCounter:
+    """Context manager counting instances of geometry types created while it's active.
+
+    Instances are counted by tracing calls of their __init__ methods (so it slows the code down
+    considerably, don't use it for measuring time).
+
+    Attributes:
+        counts - number of created instances by type name
+    """
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+
+    def __enter__(self) -> "AllocationCounter":
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        sys.setprofile(None)
+
+    def per_frame(self, type_name: str, num_frames: int) -> float:
+        """Average number of instances of given type created per frame.
+
+        :param type_name: name of the type
+        :param num_frames: number of frames the counter has been active for
+        :return: number of instances created per frame
+        """
+        return self.counts[type_name] / num_frames
+
+    def _profile(self, frame: FrameType, event: str, _arg: Any) -> None:
+        if event == "call" and frame.f_code.co_name == "__init__":
+            instance_type = type(frame.f_locals.get("self"))
+            if instance_type in GEOMETRY_TYPES:
+                self.counts[instance_type.__name__] += 1
+
+
+def instance_size(instance: Any) -> int:
+    """Memory taken by given instance (including its __dict__ if it has one).
+
+    :param instance: instance to be measured
+    :return: size of the instance in bytes
+    """
+    size = sys.getsizeof(instance)
+    if hasattr(instance, "__dict__"):
+        size += sys.getsizeof(instance.__dict__)
+    return size
+
+
+def play_levels(templates: Sequence[LevelTemplate], num_frames: int, seed: int) -> None:
+    """Play given number of frames on every level (updating and drawing it) with random input.
+
+    :param templates: templates of the levels to be played
+    :param num_frames: number of frames played on every level
+    :param seed: seed of the random input
+    """
+    actions: List[Optional[InputAction]] = [None, *InputAction]
+    for template in templates:
+        rng = random.Random(seed)
+        level = Level(template)
+        dirty_rects = DirtyRects()
+        input_action = None
+        for frame in range(num_frames):
+            if frame % MAX_INPUT_HOLD_FRAMES == 0:
+                input_action = rng.choice(actions)
+            level.process_input(input_action)
+            level.update(GAME_FRAME_TIME_IN_MS)
+            level.track_changes(dirty_rects)
+            dirty_rects.clear()
+            level.draw()
+
+
+def print_report(templates: Sequence[LevelTemplate], num_frames: int, seed: int) -> None:
+    """Run the benchmark and print its report.
+
+    :param templates: templates of the levels to be played
+    :param num_frames: number of frames played on every level
+    :param seed: seed of the random input
+    """
+    total_frames = num_frames * len(templates)
+    with AllocationCounter() as counter:
+        play_levels(templates, num_frames, seed)
+
+    gc.collect()
+    collections_before = gc.get_stats()[0]["collections"]
+    start_time = time.perf_counter()
+    play_levels(templates, num_frames, seed)
+    frame_time = (time.perf_counter() - start_time) / total_frames
+    collections = gc.get_stats()[0]["collections"] - collections_before
+
+    samples = (Point(0, 0), Size(), Rect.from_coords(0, 0, 0, 0), TilePosition(), Layer(0),
+               ObjectPosition(TilePosition()))
+    print(f"{'Type':<16}  {'Created/frame':>13}  {'Size [B]':>8}")
+    for sample in samples:
+        type_name = type(sample).__name__
+        print(f"{type_name:<16}  {counter.per_frame(type_name, total_frames):>13.2f}  "
+              f"{instance_size(sample):>8}")
+    print(f"Played {total_frames} frames ({frame_time * 1_000:.3f} ms per frame, "
+          f"{collections} GC collections of generation 0)")
+
+
+def main() -> None:
+    """Main entry point."""
+    arguments = docopt(__doc__, version=__version__)
+    configure_logger()
+    gamedata_path = Path(__file__).resolve().parent.parent.joinpath("gamedata")
+    resource_filename = str(gamedata_path.joinpath(arguments["--bundle"] + ".pyxres"))
+    metadata_filename = str(gamedata_path.joinpath(arguments["--bundle"] + ".meta"))
+
+    try:
+        if arguments["--headless"]:
+            with use_backend(NumpyBackend.from_file(resource_filename)):
+                bundle = load_bundle(metadata_filename)
+                print_report(bundle.level_templates, int(arguments["--frames"]),
+                             int(arguments["--seed"]))
+            return
+        pyxel.init(width=SCREEN_WIDTH, height=SCREEN_HEIGHT)
+        pyxel.load(resource_filename)
+        bundle = load_bundle(metadata_filename)
+    except GameError as error:
+        logging.exception(error)
+        sys.exit(1)
+
+    print_report(bundle.level_templates, int(arguments["--frames"]), int(arguments["--seed"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Golden images regression harness for Bansoko rendering.
+
+Renders (offscreen, with NumPy) every screen of the bundle and the first frame of every level,
+compares them with golden images (in parallel) and prints the report. Rendered images and diffs
+of images that do not match are written to the output directory.
+
+Usage:
+    golden [-h] [--version] [--bundle <name>] [--golden-dir <dir>] [--output-dir <dir>]
+           [--workers <num>] [--update]
+
+Options:
+    -h, --help              Show this screen.
+    --version               Show version.
+    --bundle <name>         Specify resources bundle name [default: main]
+    --golden-dir <dir>      Directory of golden images [default: golden]
+    --output-dir <dir>      Directory rendered images and diffs are written to
+                            [default: golden-out]
+    --workers <num>         Number of worker processes (number of CPUs by default)
+    --update                Replace golden images with the rendered ones.
+"""
+import logging
+import struct
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from enum import Enum, unique
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from docopt import docopt
+
+from bansoko import __version__
+from bansoko.game import GameError
+from bansoko.game.bundle import Bundle, load_bundle
+from bansoko.game.context import GameContext
+from bansoko.game.profile import LevelScore, create_or_load_profile
+from bansoko.graphics import Rect
+from bansoko.graphics.backend import use_backend
+from bansoko.graphics.numpy_backend import NumpyBackend, PALETTE
+from bansoko.gui.navigator import ScreenController
+from bansoko.tools.logger import configure_logger
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_INDEXED_COLOR = 3
+DIFF_COLOR = 8
+DIMMED_COLOR = 1
+
+ControllerFactory = Callable[[GameContext], ScreenController]
+
+
+def first_level_playfield(context: GameContext) -> ScreenController:
+    """Create Playfield screen controller of the first level (skipping How To Play screen)."""
+    return context.get_playfield_screen(0, skip_how_to_play=True)
+
+
+# Screen controllers drawn for named screens of the bundle (from bottom to top, because
+# semi-transparent screens are drawn on top of the previous ones - as ScreenNavigator does)
+SCREEN_CONTROLLERS: Dict[str, Tuple[ControllerFactory, ...]] = {
+    "main_menu": (GameContext.get_main_menu,),
+    "playfield": (first_level_playfield,),
+    "choose_level": (GameContext.get_choose_level_screen,),
+    "game_paused": (first_level_playfield, lambda context: context.get_game_paused_screen(0)),
+    "level_completed": (first_level_playfield, lambda context: context.get_level_completed_screen(
+        LevelScore(0, completed=True, pushes=12, steps=34, time_in_ms=56789))),
+    "how_to_play": (first_level_playfield, GameContext.get_how_to_play_screen),
+    "victory": (GameContext.get_victory_screen,),
+    "exit": (GameContext.get_main_menu, lambda context: context.get_exit_screen(lambda: None))
+}
+
+
+@unique
+class GoldenStatus(Enum):
+    """Final status of the check of a single image."""
+    MATCHED = 0
+    DIFFERENT = 1
+    MISSING = 2
+    UPDATED = 3
+    FAILED = 4
+
+
+@dataclass(frozen=True)
+class GoldenImage:
+    """Image checked by the harness - either a named screen or the first frame of a level.
+
+    Attributes:
+        screen_name - name of the screen (None if it's a level)
+        level_num - number of the level (None if it's a screen)
+    """
+    screen_name: Optional[str] = None
+    level_num: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Name of the image (name of its PNG file without the extension)."""
+        if self.level_num is not None:
+            return f"level_{self.level_num:03d}"
+        return f"screen_{self.screen_name}"
+
+
+@dataclass(frozen=True)
+class HarnessConfig:
+    """Files and directories used by the harness.
+
+    Attributes:
+        resource_filename - name of Pyxel's resource file of the bundle
+        metadata_filename - name of the metadata file of the bundle
+        golden_dir - directory of golden images
+        output_dir - directory rendered images and diffs are written to
+        update - should golden images be replaced with the rendered ones
+    """
+    resource_filename: str
+    metadata_filename: str
+    golden_dir: Path
+    output_dir: Path
+    update: bool = False
+
+
+@dataclass(frozen=True)
+class GoldenReport:
+    """Result of the check of a single image.
+
+    Attributes:
+        name - name of the image
+        status - final status of the check
+        diff_pixels - number of pixels that differ from the golden image
+        diff_rect - bounding rectangle of pixels that differ (None if there are no differences)
+    """
+    name: str
+    status: GoldenStatus
+    diff_pixels: int = 0
+    diff_rect: Optional[Rect] = None
+
+
+def write_png(path: Path, pixels: np.ndarray) -> None:
+    """Save pixels as an 8-bit indexed PNG image (with Pyxel's palette).
+
+    :param path: path of the image file
+    :param pixels: colors of all pixels (2d array indexed by [y, x])
+    """
+    height, width = pixels.shape
+    # Every row is prefixed with its filter type (0 - no filtering)
+    rows = np.hstack((np.zeros((height, 1), dtype=np.uint8), pixels.astype(np.uint8)))
+    chunks = (
+        (b"IHDR", struct.pack(">IIBBBBB", width, height, 8, PNG_INDEXED_COLOR, 0, 0, 0)),
+        (b"PLTE", b"".join(color.to_bytes(3, "big") for color in PALETTE)),
+        (b"IDAT", zlib.compress(rows.tobytes(), 9)),
+        (b"IEND", b""))
+    with open(path, "wb") as png_file:
+        png_file.write(PNG_SIGNATURE)
+        for chunk_type, data in chunks:
+            png_file.write(struct.pack(">I", len(data)) + chunk_type + data)
+            png_file.write(struct.pack(">I", zlib.crc32(chunk_type + data)))
+
+
+def read_png(path: Path) -> np.ndarray:
+    """Load pixels of a PNG image written by write_png.
+
+    Only 8-bit indexed images with no filtering are supported (golden images are supposed to be
+    replaced with --update option, not edited).
+
+    :param path: path of the image file
+    :return: colors of all pixels (2d array indexed by [y, x])
+    """
+    try:
+        data = path.read_bytes()
+        chunks: Dict[bytes, bytes] = {}
+        offset = len(PNG_SIGNATURE)
+        while offset < len(data):
+            (length,) = struct.unpack_from(">I", data, offset)
+            chunk_type = data[offset + 4:offset + 8]
+            chunks[chunk_type] = chunks.get(chunk_type, b"") + data[offset + 8:offset + 8 + length]
+            offset += length + 12
+        width, height, bit_depth, color_type, _, _, interlace = struct.unpack(
+            ">IIBBBBB", chunks[b"IHDR"])
+        rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(
+            height, width + 1)
+    except (OSError, KeyError, ValueError, struct.error, zlib.error) as error:
+        raise GameError(f"Unable to load PNG image '{path}'") from error
+
+    if not data.startswith(PNG_SIGNATURE) or (bit_depth, color_type, interlace) != (
+            8, PNG_INDEXED_COLOR, 0) or rows[:, 0].any():
+        raise GameError(f"Unsupported format of PNG image '{path}'")
+    return rows[:, 1:]
+
+
+@lru_cache(maxsize=None)
+def load_renderer(resource_filename: str, metadata_filename: str) -> Tuple[NumpyBackend, Bundle]:
+    """Load the headless render backend and the bundle (once per process).
+
+    :param resource_filename: name of Pyxel's resource file of the bundle
+    :param metadata_filename: name of the metadata file of the bundle
+    :return: render backend and bundle
+    """
+    backend = NumpyBackend.from_file(resource_filename)
+    with use_backend(backend):
+        return backend, load_bundle(metadata_filename)
+
+
+def render_image(image: GoldenImage, backend: NumpyBackend, bundle: Bundle) -> np.ndarray:
+    """Render given image (the same way ScreenNavigator draws the first frame of screens).
+
+    Every image is rendered with a new player profile, so it does not depend on the images
+    rendered before.
+
+    :param image: image to be rendered
+    :param backend: render backend to be used
+    :param bundle: bundle the image is rendered from
+    :return: rendered pixels
+    """
+    with tempfile.TemporaryDirectory() as profile_dir, use_backend(backend):
+        context = GameContext(bundle, create_or_load_profile(
+            bundle, Path(profile_dir).joinpath("profile.dat")))
+        backend.clip()
+        backend.cls(0)
+        if image.level_num is not None:
+            controllers = [context.get_playfield_screen(image.level_num, skip_how_to_play=True)]
+        elif image.screen_name in SCREEN_CONTROLLERS:
+            controllers = [factory(context) for factory in SCREEN_CONTROLLERS[image.screen_name]]
+        else:
+            bundle.get_screen(image.screen_name or "").draw()
+            controllers = []
+
+        for i, controller in enumerate(controllers):
+            controller.activate()
+            controller.draw(draw_as_secondary=i < len(controllers) - 1)
+        return backend.pixels.copy()
+
+
+def diff_image(golden: np.ndarray, rendered: np.ndarray) -> np.ndarray:
+    """Create an image highlighting the differences between golden and rendered image.
+
+    :param golden: pixels of the golden image
+    :param rendered: pixels of the rendered image (of the same size as the golden one)
+    :return: pixels of the diff (differing pixels on top of the dimmed rendered image)
+    """
+    dimmed = np.where(rendered == 0, 0, DIMMED_COLOR)
+    return np.where(golden != rendered, DIFF_COLOR, dimmed).astype(np.uint8)
+
+
+def check_image(image: GoldenImage, config: HarnessConfig) -> GoldenReport:
+    """Render a single image and compare it with the golden one (executed in worker processes).
+
+    :param image: image to be checked
+    :param config: files and directories used by the harness
+    :return: report of the check
+    """
+    golden_path = config.golden_dir.joinpath(image.name + ".png")
+    try:
+        rendered = render_image(image, *load_renderer(config.resource_filename,
+                                                      config.metadata_filename))
+        if config.update:
+            config.golden_dir.mkdir(parents=True, exist_ok=True)
+            write_png(golden_path, rendered)
+            return GoldenReport(image.name, GoldenStatus.UPDATED)
+
+        config.output_dir.mkdir(parents=True, exist_ok=True)
+        if not golden_path.is_file():
+            write_png(config.output_dir.joinpath(image.name + ".png"), rendered)
+            return GoldenReport(image.name, GoldenStatus.MISSING)
+
+        golden = read_png(golden_path)
+        if golden.shape != rendered.shape:
+            write_png(config.output_dir.joinpath(image.name + ".png"), rendered)
+            return GoldenReport(image.name, GoldenStatus.DIFFERENT,
+                                diff_pixels=rendered.size)
+        diff_ys, diff_xs = np.nonzero(golden != rendered)
+        if not diff_ys.size:
+            return GoldenReport(image.name, GoldenStatus.MATCHED)
+
+        write_png(config.output_dir.joinpath(image.name + ".png"), rendered)
+        write_png(config.output_dir.joinpath(image.name + "_diff.png"),
+                  diff_image(golden, rendered))
+    except (GameError, OSError):
+        logging.exception("Unable to check image %s", image.name)
+        return GoldenReport(image.name, GoldenStatus.FAILED)
+
+    return GoldenReport(image.name, GoldenStatus.DIFFERENT, diff_pixels=int(diff_ys.size),
+                        diff_rect=Rect.from_coords(
+                            int(diff_xs.min()), int(diff_ys.min()),
+                            int(diff_xs.max() - diff_xs.min()) + 1,
+                            int(diff_ys.max() - diff_ys.min()) + 1))
+
+
+def check_images(images: List[GoldenImage], config: HarnessConfig,
+                 max_workers: Optional[int] = None) -> List[GoldenReport]:
+    """Check given images in parallel (spreading images across worker processes).
+
+    :param images: images to be checked
+    :param config: files and directories used by the harness
+    :param max_workers: number of worker processes (None means number of CPUs)
+    :return: reports of all images (in the order of given images)
+    """
+    reports: Dict[GoldenImage, GoldenReport] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(check_image, image, config): image for image in images}
+        for future in as_completed(futures):
+            image = futures[future]
+            try:
+                reports[image] = future.result()
+            except BrokenProcessPool:
+                logging.exception("Worker checking image %s has crashed", image.name)
+                reports[image] = GoldenReport(image.name, GoldenStatus.FAILED)
+    return [reports[image] for image in images]
+
+
+def list_images(bundle: Bundle) -> List[GoldenImage]:
+    """List all images of the bundle checked by the harness.
+
+    :param bundle: bundle to be checked
+    :return: all named screens of the bundle and first frames of all levels
+    """
+    return [GoldenImage(screen_name=screen_name) for screen_name in bundle.screens] + [
+        GoldenImage(level_num=level_num) for level_num in range(bundle.num_levels)]
+
+
+def print_report(reports: List[GoldenReport]) -> None:
+    """Print the report of the check of all images."""
+    print(f"{'Image':<24}  {'Status':<9}  {'Pixels':>6}  Differences")
+    for report in reports:
+        diff_rect = report.diff_rect
+        differences = f"{diff_rect.w}x{diff_rect.h} at ({diff_rect.x}, {diff_rect.y})" \
+            if diff_rect else "-"
+        print(f"{report.name:<24}  {report.status.name:<9}  {report.diff_pixels:>6}  "
+              f"{differences}")
+    matched = sum(1 for report in reports
+                  if report.status in (GoldenStatus.MATCHED, GoldenStatus.UPDATED))
+    print(f"{matched} of {len(reports)} images match the golden ones")
+
+
+def main() -> None:
+    """Main entry point."""
+    arguments = docopt(__doc__, version=__version__)
+    # Every image is rendered with a new player profile, its creation is not worth logging
+    configure_logger(logging.WARNING)
+    gamedata_path = Path(__file__).resolve().parent.parent.joinpath("gamedata")
+    config = HarnessConfig(
+        resource_filename=str(gamedata_path.joinpath(arguments["--bundle"] + ".pyxres")),
+        metadata_filename=str(gamedata_path.joinpath(arguments["--bundle"] + ".meta")),
+        golden_dir=Path(arguments["--golden-dir"]).joinpath(arguments["--bundle"]),
+        output_dir=Path(arguments["--output-dir"]).joinpath(arguments["--bundle"]),
+        update=arguments["--update"])
+    max_workers = int(arguments["--workers"]) if arguments["--workers"] else None
+
+    try:
+        _, bundle = load_renderer(config.resource_filename, config.metadata_filename)
+    except GameError as error:
+        logging.exception(error)
+        sys.exit(1)
+
+    reports = check_images(list_images(bundle), config, max_workers)
+    print_report(reports)
+    if any(report.status not in (GoldenStatus.MATCHED, GoldenStatus.UPDATED)
+           for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
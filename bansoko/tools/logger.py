@@ -0,0 +1,13 @@
+"""Module exposing set up of logging shared by command line tools."""
+import logging
+
+
+def configure_logger(level: int = logging.INFO) -> None:
+    """Sets up a logger printing messages of a command line tool to the standard error.
+
+    :param level: minimal level of logged messages
+    """
+    logging.basicConfig(format="%(levelname)s%(message)s", level=level)
+    logging.addLevelName(logging.ERROR, "** ERROR: ")
+    logging.addLevelName(logging.WARN, "WARN: ")
+    logging.addLevelName(logging.INFO, "")
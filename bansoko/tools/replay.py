@@ -0,0 +1,135 @@
+"""Headless replayer of Bansoko input recordings.
+
+Feeds the input recorded by the game (started with --record option) back through game screens,
+frame by frame with the fixed frame time, as fast as possible. No window is opened (screens are
+drawn offscreen with NumPy), so it can be used for reproducing reported bugs and as a benchmark.
+
+Usage:
+    replay [-h] [--version] [--bundle <name>] [--repeat <num>] [--no-draw] [--screenshot <file>]
+           <recording>
+
+Options:
+    -h, --help              Show this screen.
+    --version               Show version.
+    --bundle <name>         Specify resources bundle name [default: main]
+    --repeat <num>          Number of times the recording is replayed [default: 1]
+    --no-draw               Replay the game logic only (without drawing screens).
+    --screenshot <file>     Save the last frame of the replay as PNG image.
+"""
+import logging
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from docopt import docopt
+
+from bansoko import __version__, GAME_FRAME_TIME_IN_MS
+from bansoko.game import GameError
+from bansoko.game.bundle import Bundle
+from bansoko.game.context import GameContext
+from bansoko.game.profile import create_or_load_profile, GAME_PROFILE_FILENAME
+from bansoko.game.recording import InputRecording, InputPlayer
+from bansoko.graphics.backend import use_backend
+from bansoko.graphics.numpy_backend import NumpyBackend
+from bansoko.gui.input import use_input_source
+from bansoko.gui.navigator import ScreenNavigator
+from bansoko.tools.golden import load_renderer, write_png
+from bansoko.tools.logger import configure_logger
+
+
+@dataclass(frozen=True)
+class ReplayReport:
+    """Result of a single replay of input recording.
+
+    Attributes:
+        frames - number of replayed frames
+        wall_time - wall time of the replay (in seconds)
+        final_screen - name of the screen controller active at the end of the replay (None if
+                       the game has been exited)
+    """
+    frames: int
+    wall_time: float
+    final_screen: Optional[str]
+
+
+def replay_recording(recording: InputRecording, bundle: Bundle, backend: NumpyBackend,
+                     draw: bool = True) -> ReplayReport:
+    """Replay the input recording (starting from the main menu, as the game does).
+
+    The game is started with the snapshot of the player profile from the recording (so player's
+    profile file is not affected by the replay).
+
+    :param recording: input recording to be replayed
+    :param bundle: bundle the recording has been made with
+    :param backend: render backend screens are drawn with
+    :param draw: should screens be drawn (or only updated)
+    :return: report of the replay
+    """
+    if recording.bundle_sha1 != bundle.sha1:
+        raise GameError("Input recording has been made with a different bundle")
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        profile_file_path = Path(profile_dir).joinpath(GAME_PROFILE_FILENAME)
+        profile_file_path.write_bytes(recording.profile_data)
+        context = GameContext(bundle, create_or_load_profile(bundle, profile_file_path),
+                              turbo_mode=recording.turbo_mode)
+        player = InputPlayer(recording)
+
+        start_time = time.perf_counter()
+        frames = 0
+        with use_input_source(player), use_backend(backend):
+            navigator = ScreenNavigator(context.get_main_menu(), lambda: None,
+                                        GAME_FRAME_TIME_IN_MS)
+            while not player.finished and navigator.controllers_stack:
+                navigator.update()
+                if draw:
+                    navigator.draw()
+                frames += 1
+        wall_time = time.perf_counter() - start_time
+
+    stack = navigator.controllers_stack
+    return ReplayReport(frames, wall_time, type(stack[-1]).__name__ if stack else None)
+
+
+def print_report(reports: List[ReplayReport]) -> None:
+    """Print the report of all replays."""
+    frames = sum(report.frames for report in reports)
+    wall_time = max(sum(report.wall_time for report in reports), sys.float_info.epsilon)
+    game_time = frames * GAME_FRAME_TIME_IN_MS / 1_000
+    final_screen = reports[-1].final_screen or "(game exited)"
+    print(f"Replayed {frames} frames ({len(reports)} x {reports[-1].frames} frames) "
+          f"in {wall_time:.3f}s")
+    print(f"{frames / wall_time:.0f} frames per second, {game_time / wall_time:.1f}x faster "
+          "than real time")
+    print(f"Final screen: {final_screen}")
+
+
+def main() -> None:
+    """Main entry point."""
+    arguments = docopt(__doc__, version=__version__)
+    # Every replay is started with a new player profile, its creation is not worth logging
+    configure_logger(logging.WARNING)
+    gamedata_path = Path(__file__).resolve().parent.parent.joinpath("gamedata")
+
+    try:
+        recording = InputRecording.load(arguments["<recording>"])
+        backend, bundle = load_renderer(
+            str(gamedata_path.joinpath(arguments["--bundle"] + ".pyxres")),
+            str(gamedata_path.joinpath(arguments["--bundle"] + ".meta")))
+        draw = not arguments["--no-draw"]
+        reports = [replay_recording(recording, bundle, backend, draw)
+                   for _ in range(int(arguments["--repeat"]))]
+        if arguments["--screenshot"]:
+            write_png(Path(arguments["--screenshot"]), backend.pixels)
+    except GameError as error:
+        logging.exception(error)
+        sys.exit(1)
+
+    print_report(reports)
+
+
+if __name__ == "__main__":
+    main()
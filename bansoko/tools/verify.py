@@ -0,0 +1,424 @@
+"""Solvability verifier for Bansoko bundles.
+
+Solves every level of the bundle (in parallel) and prints the report. By default solver uses macro
+pushes (tunnels and goal rooms), so reported solutions are valid, but not necessarily optimal.
+With --no-macros solutions are optimal for given metric (see Optimal column), but the search is
+much slower.
+
+Levels the solver runs out of budget for are neither solved nor proven unsolvable, so they are
+reported as unverified. Verifier exits with status 1 if any level is unsolvable (or the solver
+crashed) and with status 2 if any level is unverified (unless --allow-unverified is given).
+
+Results are cached, so a level is solved again only when it has changed (or with a larger budget
+than the one it ran out of). Cached solutions are checked by replaying them on the board, which
+takes milliseconds. Solver is not fast enough for most levels of the main bundle (they are
+classic Sokoban levels), so only a few of them are verified within default limits and every
+unverified level takes the whole time limit. The first run over the main bundle takes about 10
+minutes on a single CPU, the following ones take about a second.
+
+Usage:
+    verify [-h] [--version] [--bundle <name>] [--metric <metric>] [--no-macros]
+           [--time-limit <sec>] [--memory-limit <mb>] [--workers <num>] [--cache <file>]
+           [--no-cache] [--allow-unverified]
+
+Options:
+    -h, --help              Show this screen.
+    --version               Show version.
+    --bundle <name>         Specify resources bundle name [default: main]
+    --metric <metric>       Metric minimized by the solver (pushes or moves) [default: pushes]
+    --no-macros             Do not use macro pushes (so solutions are optimal for the metric)
+    --time-limit <sec>      Time budget for solving a single level (in seconds) [default: 10]
+    --memory-limit <mb>     Memory budget for solving a single level (in MB) [default: 1024]
+    --workers <num>         Number of worker processes (number of CPUs by default)
+    --cache <file>          File verification results are cached in [default: verify-cache.json]
+    --no-cache              Solve all levels again (results are still written to the cache)
+    --allow-unverified      Exit with status 0 even if some levels have not been verified
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from enum import Enum, unique
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from docopt import docopt, DocoptExit
+from jsonschema import validate, ValidationError
+
+from bansoko import __version__
+from bansoko.game import GameError
+from bansoko.game.board import Board
+from bansoko.game.bundle import load_bundle
+from bansoko.game.metadata_schema import LEVEL_ANALYSIS_JSON_SCHEMA
+from bansoko.game.tiles import TileGrid, LevelDescriptor
+from bansoko.graphics.backend import use_backend
+from bansoko.graphics.numpy_backend import NumpyBackend
+from bansoko.solver.analysis import LevelAnalysis
+from bansoko.solver.search import Solver, SolverLimits, SolverMetric, LURD_CHARS
+from bansoko.tools.logger import configure_logger
+
+if sys.platform != "win32":
+    import resource
+
+BYTES_IN_MB = 1024 * 1024
+LURD_DIRECTIONS = {char: direction for direction, char in LURD_CHARS.items()}
+
+
+@unique
+class LevelStatus(Enum):
+    """Final status of verification of a single level."""
+    SOLVED = 0
+    UNSOLVABLE = 1
+    NODES_LIMIT_REACHED = 2
+    TIME_LIMIT_REACHED = 3
+    MEMORY_LIMIT_REACHED = 4
+    FAILED = 5
+
+    @property
+    def is_unverified(self) -> bool:
+        """Value indicating whether solver ran out of budget (so solvability is unknown)."""
+        return self in (LevelStatus.NODES_LIMIT_REACHED, LevelStatus.TIME_LIMIT_REACHED,
+                        LevelStatus.MEMORY_LIMIT_REACHED)
+
+
+@dataclass(frozen=True)
+class LevelTask:
+    """Level to be verified (everything the solver needs, without any Pyxel resources).
+
+    Attributes:
+        level_num - number of the level
+        grid - tile grid of the level
+        descriptor - descriptor of the level
+        analysis - static analysis of the level (loaded from the bundle, None if the bundle
+                   does not contain it)
+    """
+    level_num: int
+    grid: TileGrid
+    descriptor: LevelDescriptor
+    analysis: Optional[LevelAnalysis]
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Resources every worker can use for solving a single level.
+
+    Attributes:
+        metric - metric minimized by the solver
+        macros - should the solver use macro pushes
+        time_limit - time limit (in seconds)
+        memory_limit - memory limit (in bytes)
+    """
+    metric: SolverMetric
+    macros: bool
+    time_limit: float
+    memory_limit: int
+
+
+@dataclass(frozen=True)
+class LevelReport:  # pylint: disable=too-many-instance-attributes
+    """Result of verification of a single level.
+
+    Attributes:
+        level_num - number of the level
+        status - final status of the verification
+        pushes - number of pushes of the solution (None if level has not been solved)
+        moves - number of moves of the solution (None if level has not been solved)
+        optimal - is the solution guaranteed to be optimal for the metric
+        expanded_nodes - number of states expanded by the solver
+        wall_time - wall time of the verification (in seconds)
+        solution - the solution in LURD notation (None if level has not been solved)
+        cached - has the result been taken from the cache (instead of solving the level)
+    """
+    level_num: int
+    status: LevelStatus
+    pushes: Optional[int] = None
+    moves: Optional[int] = None
+    optimal: bool = False
+    expanded_nodes: int = 0
+    wall_time: float = 0.0
+    solution: Optional[str] = None
+    cached: bool = False
+
+
+def verify_level(task: LevelTask, budget: Budget) -> LevelReport:
+    """Solve a single level within given budget (executed in worker processes).
+
+    :param task: level to be verified
+    :param budget: resources the solver can use
+    :return: report of the verification
+    """
+    if sys.platform != "win32":
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_DATA)
+        memory_limit = budget.memory_limit if hard_limit == resource.RLIM_INFINITY \
+            else min(budget.memory_limit, hard_limit)
+        resource.setrlimit(resource.RLIMIT_DATA, (memory_limit, hard_limit))
+
+    start_time = time.perf_counter()
+    out_of_memory = False
+    try:
+        result = Solver(task.grid, task.descriptor, task.analysis).solve(
+            budget.metric, SolverLimits(time_limit=budget.time_limit), macros=budget.macros)
+    except MemoryError:
+        # Report is created outside of the handler, so the memory used by solver is released
+        out_of_memory = True
+    wall_time = time.perf_counter() - start_time
+
+    if out_of_memory:
+        return LevelReport(task.level_num, LevelStatus.MEMORY_LIMIT_REACHED, wall_time=wall_time)
+    solution = result.solution
+    return LevelReport(
+        level_num=task.level_num,
+        status=LevelStatus[result.status.name],
+        pushes=solution.pushes if solution else None,
+        moves=solution.steps if solution else None,
+        optimal=result.optimal,
+        expanded_nodes=result.expanded_nodes,
+        wall_time=wall_time,
+        solution=solution.lurd if solution else None)
+
+
+def verify_levels(tasks: List[LevelTask], budget: Budget,
+                  max_workers: Optional[int] = None) -> List[LevelReport]:
+    """Verify given levels in parallel (spreading levels across worker processes).
+
+    :param tasks: levels to be verified
+    :param budget: resources the solver can use for solving every single level
+    :param max_workers: number of worker processes (None means number of CPUs)
+    :return: reports of all levels (sorted by level numbers)
+    """
+    reports = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(verify_level, task, budget): task for task in tasks}
+        for future in as_completed(futures):
+            level_num = futures[future].level_num
+            try:
+                report = future.result()
+            except BrokenProcessPool:
+                logging.exception("Worker verifying level %d has crashed", level_num)
+                report = LevelReport(level_num, LevelStatus.FAILED)
+            except Exception:  # pylint: disable=broad-except
+                # Error of a single level should not stop verification of the other ones
+                logging.exception("Solver has crashed while verifying level %d", level_num)
+                report = LevelReport(level_num, LevelStatus.FAILED)
+            logging.info("Level %d: %s", level_num, report.status.name)
+            reports.append(report)
+    return sorted(reports, key=lambda level_report: level_report.level_num)
+
+
+def cache_key(task: LevelTask, budget: Budget) -> str:
+    """Key of the cached result of verification of given level (SHA1 of the level and the way it
+    is solved, so any change of the level invalidates the result).
+
+    :param task: level to be verified
+    :param budget: resources the solver can use
+    :return: key of the result in the cache
+    """
+    level = f"{task.grid.width}x{task.grid.height}:{task.grid.cells.hex()}:" \
+            f"{budget.metric.name}:{budget.macros}"
+    return hashlib.sha1(level.encode()).hexdigest()
+
+
+def load_cache(cache_filename: str) -> Dict[str, Any]:
+    """Load cached results of verification (written by save_cache).
+
+    :param cache_filename: name of the cache file
+    :return: cached results indexed by cache keys (empty if there is no valid cache file)
+    """
+    try:
+        with open(cache_filename, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logging.warning("Unable to read verification cache '%s', levels are solved again",
+                        cache_filename)
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(cache_filename: str, cache: Dict[str, Any], tasks: List[LevelTask],
+               budget: Budget, reports: List[LevelReport]) -> None:
+    """Write results of verification to the cache (results of levels that crashed are not cached).
+
+    :param cache_filename: name of the cache file
+    :param cache: previously cached results (updated with given reports)
+    :param tasks: verified levels
+    :param budget: resources the solver could use
+    :param reports: reports of verified levels (in the order of tasks)
+    """
+    for task, report in zip(tasks, reports):
+        if report.status != LevelStatus.FAILED and not report.cached:
+            cache[cache_key(task, budget)] = {
+                "status": report.status.name,
+                "pushes": report.pushes,
+                "moves": report.moves,
+                "optimal": report.optimal,
+                "expanded_nodes": report.expanded_nodes,
+                "solution": report.solution,
+                "time_limit": budget.time_limit,
+                "memory_limit": budget.memory_limit
+            }
+    try:
+        with open(cache_filename, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file, indent=4)
+    except OSError:
+        logging.warning("Unable to write verification cache '%s'", cache_filename)
+
+
+def cached_report(task: LevelTask, budget: Budget, cache: Dict[str, Any]) -> Optional[LevelReport]:
+    """Report of verification of given level based on its cached result.
+
+    Cached solutions are replayed on the board, unverified levels are solved again only with a
+    larger budget and proofs of unsolvability are trusted.
+
+    :param task: level to be verified
+    :param budget: resources the solver can use
+    :param cache: cached results of verification
+    :return: report of the verification *OR* None - if the level has to be solved again
+    """
+    entry = cache.get(cache_key(task, budget))
+    if not isinstance(entry, dict) or entry.get("status") not in LevelStatus.__members__:
+        return None
+    status = LevelStatus[entry["status"]]
+    if status.is_unverified and (entry.get("time_limit", 0) < budget.time_limit
+                                 or entry.get("memory_limit", 0) < budget.memory_limit):
+        return None
+    start_time = time.perf_counter()
+    if status == LevelStatus.SOLVED and not replay_solution(task, entry.get("solution")):
+        logging.warning("Cached solution of level %d does not solve it", task.level_num)
+        return None
+    return LevelReport(
+        level_num=task.level_num,
+        status=status,
+        pushes=entry.get("pushes"),
+        moves=entry.get("moves"),
+        optimal=bool(entry.get("optimal")),
+        expanded_nodes=entry.get("expanded_nodes", 0),
+        wall_time=time.perf_counter() - start_time,
+        solution=entry.get("solution"),
+        cached=True)
+
+
+def replay_solution(task: LevelTask, solution: Any) -> bool:
+    """Test whether given solution completes the level.
+
+    :param task: level the solution is for
+    :param solution: the solution in LURD notation (lowercase for walks, uppercase for pushes)
+    :return: True - if the solution completes the level *OR* False - otherwise
+    """
+    if not isinstance(solution, str):
+        return False
+    board = Board(task.grid, task.descriptor)
+    for char in solution:
+        direction = LURD_DIRECTIONS.get(char.lower())
+        move = board.plan_move(direction) if direction else None
+        if not move or move.push != char.isupper():
+            return False
+        board.apply(move)
+    return board.is_completed
+
+
+def load_level_tasks(resource_filename: str, metadata_filename: str) -> List[LevelTask]:
+    """Load all levels of the bundle (through the headless backend, so no display is needed).
+
+    :param resource_filename: name of Pyxel's resource file of the bundle
+    :param metadata_filename: name of the metadata file of the bundle
+    :return: levels to be verified
+    """
+    if not os.path.isfile(resource_filename):
+        raise GameError(f"Unable to find Pyxel resource file '{resource_filename}'")
+    if not os.path.isfile(metadata_filename):
+        raise GameError(f"Unable to find resources metadata file '{metadata_filename}'")
+
+    with open(metadata_filename, encoding="utf-8") as metadata_file:
+        levels_data = json.load(metadata_file)["levels"]["level_templates"]
+    with use_backend(NumpyBackend.from_file(resource_filename)):
+        bundle = load_bundle(metadata_filename)
+        return [LevelTask(level_num, template.grid, template.descriptor,
+                          load_level_analysis(levels_data[level_num], template.grid))
+                for level_num, template in enumerate(bundle.level_templates)]
+
+
+def load_level_analysis(json_data: Any, grid: TileGrid) -> Optional[LevelAnalysis]:
+    """Load static analysis of a level precomputed by resource builder.
+
+    Game itself does not need the analysis, so it's validated and loaded only here (and levels of
+    bundles built without it are analysed by the solver).
+
+    :param json_data: input JSON containing level template metadata
+    :param grid: tile grid of the level
+    :return: analysis of the level *OR* None - if the bundle does not contain it
+    """
+    if not json_data.get("analysis"):
+        return None
+    try:
+        validate(json_data["analysis"], LEVEL_ANALYSIS_JSON_SCHEMA)
+    except ValidationError as validation_error:
+        raise GameError("Incorrect format of level analysis") from validation_error
+    return LevelAnalysis.from_json(json_data["analysis"], grid)
+
+
+def print_report(reports: List[LevelReport]) -> None:
+    """Print the report of verification of all levels."""
+    print(f"{'Level':>5}  {'Status':<20}  {'Pushes':>6}  {'Moves':>6}  {'Optimal':>7}  "
+          f"{'Nodes':>9}  {'Time [s]':>8}")
+    for report in reports:
+        pushes = report.pushes if report.pushes is not None else "-"
+        moves = report.moves if report.moves is not None else "-"
+        optimal = ("yes" if report.optimal else "no") if report.status == LevelStatus.SOLVED \
+            else "-"
+        print(f"{report.level_num:>5}  {report.status.name:<20}  {pushes:>6}  {moves:>6}  "
+              f"{optimal:>7}  {report.expanded_nodes:>9}  {report.wall_time:>8.2f}")
+    solved = sum(1 for report in reports if report.status == LevelStatus.SOLVED)
+    unverified = sum(1 for report in reports if report.status.is_unverified)
+    cached = sum(1 for report in reports if report.cached)
+    total_time = sum(report.wall_time for report in reports)
+    print(f"Solved {solved} of {len(reports)} levels, {unverified} unverified, {cached} cached "
+          f"(total solving time {total_time:.2f}s)")
+
+
+def main() -> None:
+    """Main entry point."""
+    arguments = docopt(__doc__, version=__version__)
+    configure_logger()
+    gamedata_path = Path(__file__).resolve().parent.parent.joinpath("gamedata")
+    if arguments["--metric"].upper() not in SolverMetric.__members__:
+        raise DocoptExit(f"Unknown metric '{arguments['--metric']}' (use pushes or moves)")
+    budget = Budget(
+        metric=SolverMetric[arguments["--metric"].upper()],
+        macros=not arguments["--no-macros"],
+        time_limit=float(arguments["--time-limit"]),
+        memory_limit=int(arguments["--memory-limit"]) * BYTES_IN_MB)
+    max_workers = int(arguments["--workers"]) if arguments["--workers"] else None
+
+    try:
+        tasks = load_level_tasks(
+            str(gamedata_path.joinpath(arguments["--bundle"] + ".pyxres")),
+            str(gamedata_path.joinpath(arguments["--bundle"] + ".meta")))
+    except GameError as error:
+        logging.exception(error)
+        sys.exit(1)
+
+    cache = {} if arguments["--no-cache"] else load_cache(arguments["--cache"])
+    cached_reports = {task.level_num: cached_report(task, budget, cache) for task in tasks}
+    solved_reports = verify_levels([task for task in tasks if not cached_reports[task.level_num]],
+                                   budget, max_workers)
+    reports = sorted([report for report in cached_reports.values() if report] + solved_reports,
+                     key=lambda level_report: level_report.level_num)
+    save_cache(arguments["--cache"], cache, tasks, budget, reports)
+    print_report(reports)
+    if any(report.status in (LevelStatus.UNSOLVABLE, LevelStatus.FAILED) for report in reports):
+        sys.exit(1)
+    if not arguments["--allow-unverified"] \
+            and any(report.status.is_unverified for report in reports):
+        logging.error("Some levels have not been verified within the budget")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,9 @@ from typing import List, Dict, Any, Generator, Tuple
 import pyxel
 
 from bansoko import LEVEL_THUMBNAIL_IMAGE_BANK, LEVEL_WIDTH, LEVEL_HEIGHT, LEVEL_BASE_TILEMAP
+from bansoko.game.tiles import TileGrid, TileType
 from bansoko.graphics import Point, Direction, Size, TILE_SIZE
+from bansoko.solver.analysis import LevelAnalysis, analyze_level
 from resbuilder import ResourceError
 from resbuilder.resources.backgrounds import TilemapGenerator
 from resbuilder.resources.level_themes import LevelTheme
@@ -41,6 +43,15 @@ class _PreprocessedLevel:
             (self.size.width % 2) * TILE_SIZE // 2,
             (self.size.height % 2) * TILE_SIZE // 2)
 
+    def analyze(self) -> LevelAnalysis:
+        """Perform static analysis of the level (dead squares, tunnels, distances to cargo bays).
+
+        :return: static analysis of the level
+        """
+        grid = TileGrid.from_tile_types(LEVEL_WIDTH, LEVEL_HEIGHT,
+                                        (TileType[tile.name] for tile in self.tilemap_data))
+        return analyze_level(grid)
+
     def tile_positions(self) -> Generator[Tuple[Point, Point], None, None]:
         """Generator for iterating over all valid tile positions inside both level and Pyxel's
         mega-tilemap (from top-left to bottom-right)."""
@@ -184,6 +195,8 @@ def process_levels(input_data: Any, level_themes: List[LevelTheme],
     then stored in Pyxel's mega-tilemaps along with resources metadata file.
     Level theme is assigned basing on a level number.
     Floor tiles are automatically generated basing on player starting position and walls positions.
+    Levels are also statically analysed (dead squares, tunnels, distances to cargo bays) for the
+    solver and the solvability verifier (the game itself neither reads nor validates the analysis).
 
     :param input_data: input data from JSON file (root -> levels)
     :param level_themes: collection of processed level themes that level can use
@@ -209,7 +222,8 @@ def process_levels(input_data: Any, level_themes: List[LevelTheme],
             "tileset": level_theme_id,
             "draw_offset": level_draw_offset.as_list,
             "robot_sprite_pack_ref": level_theme.robot_sprite_pack,
-            "crate_sprite_pack_ref": level_theme.crate_sprite_pack
+            "crate_sprite_pack_ref": level_theme.crate_sprite_pack,
+            "analysis": preprocessed_level.analyze().as_json
         })
         logging.info("Level %d (%dx%d tileset:%d) added", level_num, preprocessed_level.size.width,
                      preprocessed_level.size.height, level_theme_id)
@@ -28,6 +28,7 @@ setup(
         "Topic :: Games/Entertainment :: Puzzle Games"
     ],
     install_requires=["setuptools", "pyxel", "docopt", "jsonschema"],
+    extras_require={"headless": ["numpy"]},
     packages=find_packages(exclude=["resbuilder", "resbuilder.*"]),
     package_data={
         "bansoko": ["gamedata/main.pyxres", "gamedata/main.meta"]
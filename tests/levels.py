@@ -0,0 +1,32 @@
+"""Levels described in the common Sokoban notation, shared by tests."""
+from typing import Tuple
+
+from bansoko.game.board import Board
+from bansoko.game.tiles import TileGrid, TileType, LevelDescriptor
+from bansoko.solver.search import Solver
+
+TILE_TYPES = {
+    "#": TileType.WALL,
+    " ": TileType.FLOOR,
+    "@": TileType.START,
+    "$": TileType.INITIAL_CRATE_POSITION,
+    "*": TileType.CRATE_INITIALLY_PLACED,
+    ".": TileType.CARGO_BAY
+}
+
+
+def create_level(*rows: str) -> Tuple[TileGrid, LevelDescriptor]:
+    """Create tile grid and descriptor of the level described by rows of tiles."""
+    grid = TileGrid.from_tile_types(len(rows[0]), len(rows),
+                                    [TILE_TYPES[tile] for row in rows for tile in row])
+    return grid, LevelDescriptor.from_grid(grid, 0)
+
+
+def create_board(*rows: str) -> Board:
+    """Create board of the level described by rows of tiles."""
+    return Board(*create_level(*rows))
+
+
+def create_solver(*rows: str) -> Solver:
+    """Create solver of the level described by rows of tiles."""
+    return Solver(*create_level(*rows))
@@ -0,0 +1,143 @@
+"""Tests of the board history (run with: python -m unittest discover tests)."""
+import random
+import unittest
+from typing import List, Tuple
+from unittest.mock import patch
+
+from levels import create_board
+from bansoko.game.board import Board, Move, KEYFRAME_INTERVAL
+from bansoko.graphics import Direction, TilePosition
+
+# Open room, so the robot can wander around and push crates for hundreds of moves
+LEVEL = ("##########",
+         "#        #",
+         "#  $  .  #",
+         "#   *    #",
+         "#  @  $  #",
+         "# .      #",
+         "#        #",
+         "##########")
+
+BoardState = Tuple[TilePosition, Direction, Tuple[TilePosition, ...], int, int, int, int]
+
+
+def make_random_moves(board: Board, num_moves: int, seed: int) -> List[Move]:
+    """Make given number of random (valid) moves on the board."""
+    rng = random.Random(seed)
+    moves: List[Move] = []
+    while len(moves) < num_moves:
+        move = board.plan_move(rng.choice(list(Direction)))
+        if move:
+            board.apply(move)
+            moves.append(move)
+    return moves
+
+
+def board_state(board: Board) -> BoardState:
+    """State of the board (everything seeking is expected to restore)."""
+    return (board.robot_position, board.face_direction, tuple(board.crates), board.placed_crates,
+            board.statistics.pushes, board.statistics.steps, board.move_index)
+
+
+def step_to(board: Board, move_index: int) -> None:
+    """Undo or redo moves one by one until given number of moves from history is applied."""
+    while board.move_index < move_index:
+        board.redo()
+    while board.move_index > move_index:
+        board.undo()
+
+
+class BoardSeekTest(unittest.TestCase):
+    """Tests of seeking through the history of moves."""
+
+    NUM_MOVES = 5 * KEYFRAME_INTERVAL + 10
+
+    def test_seek_matches_undo_and_redo(self) -> None:
+        """Seeking (across keyframe boundaries, in both directions) gives the same state as
+        undoing or redoing moves one by one."""
+        board = create_board(*LEVEL)
+        reference = create_board(*LEVEL)
+        for move in make_random_moves(board, self.NUM_MOVES, seed=1):
+            reference.apply(move)
+        targets = (0, KEYFRAME_INTERVAL, KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL + 1,
+                   3 * KEYFRAME_INTERVAL + 5, 2 * KEYFRAME_INTERVAL, 2 * KEYFRAME_INTERVAL - 3,
+                   self.NUM_MOVES, 1, self.NUM_MOVES - 1, 4 * KEYFRAME_INTERVAL)
+        for move_index in targets:
+            with self.subTest(from_index=board.move_index, to_index=move_index):
+                board.seek(move_index)
+                step_to(reference, move_index)
+                self.assertEqual(board_state(reference), board_state(board))
+                self.assertEqual(reference.crates_index, board.crates_index)
+
+    def test_seek_replays_at_most_keyframe_interval_moves(self) -> None:
+        """Seeking far away is done from the nearest keyframe (not by stepping through the whole
+        history)."""
+        board = create_board(*LEVEL)
+        make_random_moves(board, self.NUM_MOVES, seed=7)
+        for move_index in (0, self.NUM_MOVES, KEYFRAME_INTERVAL - 1, 4 * KEYFRAME_INTERVAL + 1,
+                           KEYFRAME_INTERVAL + KEYFRAME_INTERVAL // 2):
+            with self.subTest(from_index=board.move_index, to_index=move_index), \
+                    patch.object(board, "redo", wraps=board.redo) as redo, \
+                    patch.object(board, "undo", wraps=board.undo) as undo:
+                board.seek(move_index)
+                self.assertEqual(move_index, board.move_index)
+                self.assertLessEqual(redo.call_count + undo.call_count, KEYFRAME_INTERVAL)
+
+    def test_seek_is_clamped_to_history(self) -> None:
+        """Seeking outside of the history stops at its first or its last move."""
+        board = create_board(*LEVEL)
+        make_random_moves(board, 2 * KEYFRAME_INTERVAL, seed=2)
+        board.seek(-10)
+        self.assertEqual(0, board.move_index)
+        self.assertEqual(0, board.statistics.steps)
+        board.seek(10 * KEYFRAME_INTERVAL)
+        self.assertEqual(2 * KEYFRAME_INTERVAL, board.move_index)
+        self.assertFalse(board.can_redo)
+
+    def test_apply_truncates_history(self) -> None:
+        """Move made after seeking back removes undone moves (and their keyframes) from
+        history."""
+        board = create_board(*LEVEL)
+        make_random_moves(board, 3 * KEYFRAME_INTERVAL + 10, seed=3)
+        board.seek(KEYFRAME_INTERVAL + 5)
+        new_moves = make_random_moves(board, KEYFRAME_INTERVAL, seed=4)
+        self.assertEqual(2 * KEYFRAME_INTERVAL + 5, len(board.history))
+        self.assertEqual(3, len(board.keyframes))
+        self.assertFalse(board.can_redo)
+
+        # Keyframes taken after truncation describe the new history, not the undone one
+        reference = create_board(*LEVEL)
+        for move_code in board.history:
+            reference.apply(Move.from_code(move_code))
+        self.assertEqual(new_moves, [Move.from_code(code)
+                                     for code in board.history[KEYFRAME_INTERVAL + 5:]])
+        for move_index in (0, 2 * KEYFRAME_INTERVAL, 2 * KEYFRAME_INTERVAL + 5):
+            with self.subTest(move_index=move_index):
+                board.seek(move_index)
+                step_to(reference, move_index)
+                self.assertEqual(board_state(reference), board_state(board))
+
+    def test_face_direction_after_seeking_back(self) -> None:
+        """After seeking back, the robot faces the direction of the first undone move."""
+        board = create_board(*LEVEL)
+        make_random_moves(board, 2 * KEYFRAME_INTERVAL + 20, seed=5)
+        for move_index in (2 * KEYFRAME_INTERVAL + 3, KEYFRAME_INTERVAL, 7, 0):
+            with self.subTest(move_index=move_index):
+                board.seek(move_index)
+                self.assertEqual(Move.from_code(board.history[move_index]).direction,
+                                 board.face_direction)
+
+    def test_face_direction_after_seeking_forward(self) -> None:
+        """After seeking forward, the robot faces the direction of the last redone move."""
+        board = create_board(*LEVEL)
+        make_random_moves(board, 2 * KEYFRAME_INTERVAL + 20, seed=6)
+        board.seek(0)
+        for move_index in (5, KEYFRAME_INTERVAL + 1, 2 * KEYFRAME_INTERVAL + 20):
+            with self.subTest(move_index=move_index):
+                board.seek(move_index)
+                self.assertEqual(Move.from_code(board.history[move_index - 1]).direction,
+                                 board.face_direction)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+"""Tests of the level solver (run with: python -m unittest discover tests)."""
+import random
+import unittest
+from typing import Tuple, FrozenSet, Iterable
+
+from levels import create_solver
+from bansoko.game.board import Board, Move
+from bansoko.graphics import TilePosition
+from bansoko.solver.matching import Matching
+from bansoko.solver.search import Solver, SolverMetric, SolverStatus
+
+
+def crate_cells(solver: Solver) -> FrozenSet[int]:
+    """Cells occupied by crates at the start of the level."""
+    return frozenset(solver.cell(position) for position in solver.descriptor.crate_spawns)
+
+
+def cell_at(solver: Solver, x: int, y: int) -> int:
+    """Cell of the solver at given tile position."""
+    return solver.cell(TilePosition(x, y))
+
+
+class FreezeDeadlockTest(unittest.TestCase):
+    """Tests of freeze deadlock detection."""
+
+    def test_crates_pinned_against_each_other_are_not_frozen(self) -> None:
+        """Crates blocking each other are not frozen as long as they can be pushed aside."""
+        solver = create_solver(
+            "########",
+            "#  #   #",
+            "#  $$  #",
+            "#   @ .#",
+            "#     .#",
+            "########")
+        # Each crate blocks the other one horizontally, but both can still be pushed vertically
+        # (the left one is blocked by the wall above, the right one is not)
+        self.assertFalse(solver.is_deadlocked(cell_at(solver, 3, 2), crate_cells(solver)))
+        self.assertFalse(solver.is_deadlocked(cell_at(solver, 4, 2), crate_cells(solver)))
+
+    def test_crates_pinned_in_row_are_not_frozen(self) -> None:
+        """Crate checked before (and not found frozen) does not block its neighbours."""
+        solver = create_solver(
+            "#########",
+            "#  # #  #",
+            "#  $$$  #",
+            "#     @.#",
+            "#      .#",
+            "#      .#",
+            "#########")
+        # Outer crates can be pushed only horizontally (so they are checked against the middle
+        # one), which cannot be pushed horizontally, but can still be pushed vertically
+        crates = crate_cells(solver)
+        for x in (3, 4, 5):
+            self.assertFalse(solver.is_deadlocked(cell_at(solver, x, 2), crates))
+
+    def test_crates_pinned_against_wall_are_frozen(self) -> None:
+        """Crates blocking each other along a wall are frozen."""
+        solver = create_solver(
+            "#######",
+            "#  $$ #",
+            "#  @..#",
+            "#######")
+        self.assertTrue(solver.is_deadlocked(cell_at(solver, 3, 1), crate_cells(solver)))
+
+    def test_frozen_crates_in_cargo_bays_are_not_deadlocked(self) -> None:
+        """Frozen crates are not a deadlock when all of them are in cargo bays."""
+        solver = create_solver(
+            "#######",
+            "#  ** #",
+            "#  @  #",
+            "#######")
+        self.assertFalse(solver.is_deadlocked(cell_at(solver, 3, 1), crate_cells(solver)))
+
+
+class MatchingTest(unittest.TestCase):
+    """Tests of updating the minimal cost matching after costs of a single row have changed."""
+
+    def test_updated_matching_is_minimal(self) -> None:
+        rng = random.Random(0)
+        for size in range(1, 6):
+            costs = [[rng.randrange(10) for _ in range(size)] for _ in range(size)]
+            matching = Matching.solve(costs)
+            for _ in range(50):
+                row = rng.randrange(size)
+                costs[row] = [rng.randrange(10) for _ in range(size)]
+                matching = matching.update_row(costs, row)
+                with self.subTest(size=size, costs=costs):
+                    self.assertEqual(Matching.solve(costs).cost, matching.cost)
+                    self.assertEqual(matching.cost, sum(
+                        costs[row][column] for row, column in enumerate(matching.assignment())))
+
+
+class SolverTest(unittest.TestCase):
+    """Tests of solutions found by the solver."""
+
+    LEVELS: Tuple[Tuple[str, ...], ...] = (
+        ("########",
+         "#  #   #",
+         "# $$ @ #",
+         "#   #  #",
+         "#.  .  #",
+         "########"),
+        # Goal room (entered through the cell left of cargo bays)
+        ("############",
+         "##  #  @ # #",
+         "#   ###$$###",
+         "#   #     ##",
+         "#   #     ##",
+         "#. .   # # #",
+         "#   #      #",
+         "############"),
+        ("############",
+         "# ###@  #  #",
+         "# . ##$$#  #",
+         "# .##      #",
+         "#  ##   $ ##",
+         "#          #",
+         "#.  #      #",
+         "############"),
+    )
+
+    def test_solutions_complete_levels(self) -> None:
+        """Solutions (with and without macro pushes) can be replayed on the board."""
+        for rows in self.LEVELS:
+            for metric in SolverMetric:
+                for macros in (False, True):
+                    with self.subTest(level=rows, metric=metric, macros=macros):
+                        solver = create_solver(*rows)
+                        result = solver.solve(metric, macros=macros)
+                        self.assertEqual(SolverStatus.SOLVED, result.status)
+                        self.assertEqual(not macros, result.optimal)
+                        assert result.solution is not None
+                        self.assertTrue(self._replay(solver, result.solution.moves))
+
+    # Levels with push-optimal and move-optimal solution lengths (as found by exhaustive search
+    # over all states of the robot and crates). Optimal solutions for one metric are longer in
+    # the other one.
+    OPTIMAL_LEVELS: Tuple[Tuple[Tuple[str, ...], int, int], ...] = (
+        (LEVELS[0], 8, 26),
+        (LEVELS[1], 17, 39),
+        (LEVELS[2], 29, 60),
+        # 3 pushes need 17 moves, while 15 moves need 5 pushes
+        (("#######",
+          "#   #@#",
+          "#  $  #",
+          "# #   #",
+          "# .   #",
+          "#######"), 3, 15),
+        # 9 pushes need 35 moves, while 33 moves need 11 pushes
+        (("########",
+          "##     #",
+          "#   #$ #",
+          "#@   $ #",
+          "# . . ##",
+          "########"), 9, 33),
+        # 5 pushes need 21 moves, while 18 moves need 7 pushes
+        (("#######",
+          "#     #",
+          "#.  $ #",
+          "#  $#.#",
+          "#  @  #",
+          "#######"), 5, 18),
+    )
+
+    def test_optimal_solutions(self) -> None:
+        """Solutions found without macro pushes are push-optimal or move-optimal."""
+        for rows, pushes, moves in self.OPTIMAL_LEVELS:
+            with self.subTest(level=rows):
+                solver = create_solver(*rows)
+                push_result = solver.solve(SolverMetric.PUSHES)
+                move_result = solver.solve(SolverMetric.MOVES)
+                assert push_result.solution is not None and move_result.solution is not None
+                self.assertEqual(pushes, push_result.solution.pushes)
+                self.assertEqual(moves, move_result.solution.steps)
+                self.assertTrue(push_result.optimal and move_result.optimal)
+                self.assertTrue(self._replay(solver, push_result.solution.moves))
+                self.assertTrue(self._replay(solver, move_result.solution.moves))
+
+    def test_unsolvable_level(self) -> None:
+        """Level with a crate in a corner is reported as unsolvable."""
+        solver = create_solver(
+            "#######",
+            "#$   .#",
+            "#  @  #",
+            "#######")
+        self.assertEqual(SolverStatus.UNSOLVABLE, solver.solve(macros=True).status)
+
+    def test_unreachable_cargo_bay(self) -> None:
+        """Level with a cargo bay walled off from the rest of the level is reported as
+        unsolvable."""
+        solver = create_solver(
+            "#######",
+            "#@    #",
+            "####$ #",
+            "#  #  #",
+            "###.# #",
+            "#######")
+        self.assertIsNone(solver.goal_room)
+        for macros in (False, True):
+            self.assertEqual(SolverStatus.UNSOLVABLE, solver.solve(macros=macros).status)
+
+    @staticmethod
+    def _replay(solver: Solver, moves: Iterable[Move]) -> bool:
+        board = Board(solver.grid, solver.descriptor)
+        for move in moves:
+            if board.plan_move(move.direction) != move:
+                return False
+            board.apply(move)
+        return board.is_completed
+
+
+if __name__ == "__main__":
+    unittest.main()